@@ -1,15 +1,33 @@
 # ai_teacher.py
 import json
-from openai import OpenAI
+import threading
+import time
+from contextlib import contextmanager
+from openai import APIConnectionError, DefaultHttpxClient, OpenAI
 import os
 from dotenv import load_dotenv
 
+import cassette as cassette_mod
+from json_stream import JsonObjectStream
+from metrics import estimate_cost, get_recorder
+from pregrade import fallback_grade, pregrade
+from resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, call_with_retry
+from response_cache import ResponseCache, make_key
+
+try:
+    # openai SDK bản mới chạy trên httpx2, bản cũ trên httpx
+    import httpx2 as httpx
+except ImportError:
+    import httpx
+
 load_dotenv()
 
-def check_sentence(target_word: str, user_sentence: str) -> dict:
-    client = OpenAI(api_key=os.getenv("vocab_teacher_key"))
+MODEL = "gpt-4o-mini"
+
+# Tăng mỗi khi sửa SYSTEM_PROMPT -> kết quả cache của prompt cũ không bị dùng lại
+PROMPT_VERSION = "1"
 
-    SYSTEM_PROMPT = """
+SYSTEM_PROMPT = """
 You are an English teacher. The learner is Vietnamese.
 Your task:
 1. Check if the student used the target word correctly.
@@ -25,19 +43,475 @@ Respond ONLY in JSON with keys:
 }
 """
 
-    user_message = f"""
+# Chấm nhiều câu trong 1 request: cùng tiêu chí chấm, trả về mảng kết quả
+BATCH_SYSTEM_PROMPT = """
+You are an English teacher. The learners are Vietnamese.
+You will receive a JSON array of items {"index", "target_word", "sentence"}.
+For EACH item:
+1. Check if the student used the target word correctly.
+2. Check grammar & naturalness.
+3. Explain clearly in Vietnamese.
+4. Provide ONE improved sentence using the target word.
+Respond ONLY in JSON:
+{
+  "results": [
+    {
+      "index": int (same index as the input item),
+      "is_correct_usage": true/false,
+      "score": float (0..1),
+      "feedback_vi": "string",
+      "suggested_sentence": "string"
+    }
+  ]
+}
+"""
+
+# Câu mẫu + gợi ý cách dùng cho 1 từ (hiện ở màn đặt câu)
+HINT_PROMPT_VERSION = "hint-1"
+
+HINT_PROMPT = """
+You are an English teacher. The learner is Vietnamese.
+Given ONE target English word or phrase:
+1. Write ONE natural, simple example sentence using it.
+2. Give a short usage hint in Vietnamese (meaning, common collocations/structure).
+Respond ONLY in JSON with keys:
+{
+  "example_sentence": "string",
+  "hint_vi": "string"
+}
+"""
+
+RESULT_KEYS = ("is_correct_usage", "score", "feedback_vi", "suggested_sentence")
+
+# Giới hạn mỗi request batch: số token (ước lượng) của phần câu gửi đi và số câu,
+# để request không quá dài và câu trả lời không bị cắt giữa chừng
+BATCH_TOKEN_BUDGET = 2000
+BATCH_MAX_ITEMS = 20
+
+# Client dùng chung cho mọi lần gọi: giữ kết nối keep-alive (khỏi TLS handshake lại)
+# Timeout rõ ràng cho TỪNG lần thử: kết nối chậm thì báo lỗi sớm thay vì treo cả phút
+ATTEMPT_TIMEOUT = 20.0
+TIMEOUT = httpx.Timeout(ATTEMPT_TIMEOUT, connect=5.0)
+POOL_LIMITS = httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=60.0)
+
+# Retry do RETRY_POLICY lo (có jitter + deadline tổng), SDK không tự retry nữa.
+# API lỗi liên tiếp -> BREAKER ngắt, check_sentence trả ngay kết quả chấm sơ bộ
+# trên máy thay vì bắt người học chờ timeout hết lần này tới lần khác.
+MAX_RETRIES = 0
+RETRY_POLICY = RetryPolicy(max_attempts=3, base_delay=0.5, max_delay=4.0, deadline=45.0)
+BREAKER = CircuitBreaker(failure_threshold=5, reset_timeout=30.0)
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> OpenAI:
+    """Tạo client lười ở lần gọi đầu, các lần sau (mọi thread) dùng lại."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OpenAI(
+                    api_key=os.getenv("vocab_teacher_key"),
+                    # None -> SDK tự lấy OPENAI_BASE_URL / mặc định của OpenAI
+                    base_url=os.getenv("vocab_teacher_base_url") or None,
+                    timeout=TIMEOUT,
+                    max_retries=MAX_RETRIES,
+                    http_client=DefaultHttpxClient(timeout=TIMEOUT, limits=POOL_LIMITS),
+                )
+    return _client
+
+
+def reset_client():
+    """Đóng client hiện tại (vd: sau khi đổi key / base url); lần gọi sau tạo lại."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+
+
+# Cache kết quả chấm (RAM + file SQLite cạnh code), tạo lười ở lần gọi đầu
+CACHE_FILE = "ai_cache.sqlite3"
+_cache = None
+
+
+def get_cache() -> ResponseCache:
+    global _cache
+    if _cache is None:
+        with _client_lock:
+            if _cache is None:
+                base_dir = os.path.dirname(os.path.abspath(__file__))
+                _cache = ResponseCache(os.path.join(base_dir, CACHE_FILE))
+    return _cache
+
+
+# Ghi / phát lại các lần gọi model (cassette.py): benchmark, thử lại lỗi mà không cần mạng
+_cassette = None
+
+
+def use_cassette(path: str = None, mode: str = "replay"):
+    """Bật cassette ở file path (chế độ record / replay / auto); path=None -> tắt."""
+    global _cassette
+    _cassette = cassette_mod.Cassette(path, mode) if path else None
+    return _cassette
+
+
+if os.getenv("vocab_teacher_cassette"):
+    use_cassette(os.getenv("vocab_teacher_cassette"), os.getenv("vocab_teacher_cassette_mode") or "auto")
+
+
+# ---------- Đo đạc (metrics.py) ----------
+
+@contextmanager
+def _measure(call: str):
+    """
+    Bản ghi metrics cho 1 lần chấm: code bên trong điền source / ttfb / token...,
+    wall time + chi phí được tính khi ra khỏi khối rồi gửi cho get_recorder().
+    """
+    stats = {
+        "call": call, "model": MODEL, "source": "api", "cache_hit": False, "retries": 0,
+        "ttfb_ms": None, "prompt_tokens": None, "completion_tokens": None, "error": None,
+    }
+    start = time.perf_counter()
+    try:
+        yield stats
+    except GeneratorExit:
+        stats["error"] = "cancelled"    # người dùng bỏ ngang stream
+        raise
+    except Exception as e:
+        stats["error"] = type(e).__name__
+        raise
+    finally:
+        stats["wall_ms"] = (time.perf_counter() - start) * 1000
+        stats["cost_usd"] = estimate_cost(MODEL, stats["prompt_tokens"], stats["completion_tokens"])
+        get_recorder().record(stats)
+
+
+def _record_usage(stats: dict, usage):
+    if stats is not None and usage is not None:
+        stats["prompt_tokens"] = usage.prompt_tokens
+        stats["completion_tokens"] = usage.completion_tokens
+
+
+# ---------- Chấm 1 câu ----------
+
+def check_sentence(target_word: str, user_sentence: str, use_cache: bool = True) -> dict:
+    with _measure("check_sentence") as stats:
+        return _check_sentence(target_word, user_sentence, use_cache, stats)
+
+
+def _check_sentence(target_word: str, user_sentence: str, use_cache: bool, stats: dict) -> dict:
+    # Câu sai rõ ràng (thiếu từ mục tiêu, quá ngắn...) -> chấm luôn trên máy
+    offline = pregrade(target_word, user_sentence)
+    if offline is not None:
+        stats["source"] = "pregrade"
+        return offline
+
+    cache_key = make_key(target_word, user_sentence, PROMPT_VERSION, MODEL)
+    if use_cache:
+        cached = get_cache().get(cache_key)
+        if cached is not None:
+            stats["source"] = "cache"
+            stats["cache_hit"] = True
+            return cached
+
+    try:
+        result = _chat_json(SYSTEM_PROMPT, _user_message(target_word, user_sentence), stats)
+    except Exception as e:
+        if not is_unavailable(e):
+            raise
+        print("AI không phản hồi, dùng chấm sơ bộ:", e)
+        stats["source"] = "fallback"
+        stats["error"] = type(e).__name__
+        return fallback_grade(target_word, user_sentence)
+    if use_cache:
+        get_cache().put(cache_key, result)
+    return result
+
+
+def check_sentence_stream(target_word: str, user_sentence: str, use_cache: bool = True):
+    """
+    Giống check_sentence nhưng stream: generator trả về từng sự kiện
+    (kind, key, value) ngay khi model viết tới:
+    - ("value", "is_correct_usage" / "score" / ..., giá trị) khi 1 field xong
+    - ("delta", "feedback_vi" / "suggested_sentence", đoạn text mới)
+    - ("done", None, dict kết quả đầy đủ) ở cuối
+    """
+    with _measure("check_sentence_stream") as stats:
+        yield from _check_sentence_stream(target_word, user_sentence, use_cache, stats)
+
+
+def _check_sentence_stream(target_word: str, user_sentence: str, use_cache: bool, stats: dict):
+    offline = pregrade(target_word, user_sentence)
+    if offline is not None:
+        stats["source"] = "pregrade"
+        for key, value in offline.items():
+            yield "value", key, value
+        yield "done", None, offline
+        return
+
+    cache_key = make_key(target_word, user_sentence, PROMPT_VERSION, MODEL)
+    if use_cache:
+        cached = get_cache().get(cache_key)
+        if cached is not None:
+            stats["source"] = "cache"
+            stats["cache_hit"] = True
+            for key, value in cached.items():
+                yield "value", key, value
+            yield "done", None, cached
+            return
+
+    if _cassette is not None:
+        # cassette lưu kết quả hoàn chỉnh -> phát lại như cache, không stream
+        try:
+            result = _chat_json(SYSTEM_PROMPT, _user_message(target_word, user_sentence), stats)
+        except Exception as e:
+            if not is_unavailable(e):
+                raise
+            print("AI không phản hồi, dùng chấm sơ bộ:", e)
+            stats["source"] = "fallback"
+            stats["error"] = type(e).__name__
+            result = fallback_grade(target_word, user_sentence)
+        for key, value in result.items():
+            yield "value", key, value
+        if use_cache and not result.get("fallback"):
+            get_cache().put(cache_key, result)
+        yield "done", None, result
+        return
+
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": _user_message(target_word, user_sentence)}
+    ]
+    start = time.perf_counter()
+    try:
+        # retry được tới lúc server bắt đầu trả; đứt giữa stream thì báo lỗi
+        stream = _call_api(
+            lambda client: client.chat.completions.create(
+                model=MODEL,
+                messages=messages,
+                response_format={"type": "json_object"},
+                stream=True,
+                stream_options={"include_usage": True},   # chunk cuối có usage
+            ),
+            stats,
+        )
+    except Exception as e:
+        if not is_unavailable(e):
+            raise
+        print("AI không phản hồi, dùng chấm sơ bộ:", e)
+        stats["source"] = "fallback"
+        stats["error"] = type(e).__name__
+        offline = fallback_grade(target_word, user_sentence)
+        for key, value in offline.items():
+            yield "value", key, value
+        yield "done", None, offline
+        return
+
+    parser = JsonObjectStream()
+    with stream:
+        for chunk in stream:
+            _record_usage(stats, getattr(chunk, "usage", None))
+            if not chunk.choices:
+                continue
+            text = chunk.choices[0].delta.content
+            if text:
+                if stats["ttfb_ms"] is None:
+                    # với stream, "byte đầu" có ích là đoạn text đầu tiên của model
+                    stats["ttfb_ms"] = (time.perf_counter() - start) * 1000
+                yield from parser.feed(text)
+
+    if not parser.done:
+        raise ValueError("Phản hồi JSON của model bị cắt giữa chừng")
+    result = parser.result
+    if use_cache:
+        get_cache().put(cache_key, result)
+    yield "done", None, result
+
+
+def _user_message(target_word: str, user_sentence: str) -> str:
+    return f"""
 Từ mục tiêu: {target_word}
 Câu của học viên: {user_sentence}
 """
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": user_message}
-        ],
-        response_format={"type": "json_object"}   # CHUẨN SDK MỚI
-    )
+
+def is_retryable(exc: Exception) -> bool:
+    """Lỗi tạm thời (mất kết nối, timeout, 408/409/429, 5xx) -> đáng thử lại."""
+    if isinstance(exc, APIConnectionError):   # gồm cả APITimeoutError
+        return True
+    status = getattr(exc, "status_code", None)
+    return status in (408, 409, 429) or (status is not None and status >= 500)
+
+
+def is_unavailable(exc: Exception) -> bool:
+    """API đang không dùng được (đã retry hết / đang bị ngắt) -> dùng chấm sơ bộ."""
+    return isinstance(exc, CircuitOpenError) or is_retryable(exc)
+
+
+def _call_api(request, stats: dict = None):
+    """
+    request(client) với timeout từng lần thử, retry + breaker theo RETRY_POLICY / BREAKER.
+    stats (nếu có) được đếm số lần retry.
+    """
+    def attempt(remaining):
+        timeout = max(0.1, min(ATTEMPT_TIMEOUT, remaining))
+        return request(get_client().with_options(timeout=timeout))
+
+    def on_retry(retry, exc, delay):
+        if stats is not None:
+            stats["retries"] += 1
+
+    return call_with_retry(attempt, RETRY_POLICY, BREAKER, retryable=is_retryable, on_retry=on_retry)
+
+
+def _chat_json(system_prompt: str, user_message: str, stats: dict = None) -> dict:
+    tape = _cassette
+    if tape is not None:
+        key = cassette_mod.make_key(MODEL, system_prompt, user_message)
+        entry = tape.lookup(key)    # replay mà chưa có -> CassetteMiss
+        if entry is not None:
+            if stats is not None:
+                stats["source"] = "replay"
+                usage = entry.get("usage") or {}
+                stats["prompt_tokens"] = usage.get("prompt_tokens")
+                stats["completion_tokens"] = usage.get("completion_tokens")
+            return entry["response"]
+
+    def request(client):
+        start = time.perf_counter()
+        # streaming_response: vào được khối with ngay khi có header -> đo TTFB
+        with client.chat.completions.with_streaming_response.create(
+            model=MODEL,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_message}
+            ],
+            response_format={"type": "json_object"}   # CHUẨN SDK MỚI
+        ) as raw:
+            if stats is not None:
+                stats["ttfb_ms"] = (time.perf_counter() - start) * 1000
+            return raw.parse()
+
+    response = _call_api(request, stats)
+    _record_usage(stats, response.usage)
 
     json_text = response.choices[0].message.content
-    return json.loads(json_text)
\ No newline at end of file
+    data = json.loads(json_text)
+    if tape is not None:
+        usage = response.usage
+        tape.record(key, MODEL, system_prompt, user_message, data, {
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+        } if usage is not None else None)
+    return data
+
+
+# ---------- Chấm nhiều câu 1 lần ----------
+
+def _estimate_tokens(text: str) -> int:
+    # ước lượng thô ~4 ký tự / token, đủ để chia batch
+    return len(text) // 4 + 1
+
+
+def _split_batches(items: list, token_budget: int, max_items: int) -> list:
+    """Chia [(index, item_json)] thành các batch không vượt token_budget / max_items."""
+    batches, current, used = [], [], 0
+    for index, item_json in items:
+        cost = _estimate_tokens(item_json)
+        if current and (used + cost > token_budget or len(current) >= max_items):
+            batches.append(current)
+            current, used = [], 0
+        current.append((index, item_json))
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _grade_batch(batch: list) -> dict:
+    """Gửi 1 batch, trả về {index: kết quả} cho các câu model trả về hợp lệ."""
+    user_message = "[\n" + ",\n".join(item_json for _, item_json in batch) + "\n]"
+    data = _chat_json(BATCH_SYSTEM_PROMPT, user_message)
+
+    wanted = {index for index, _ in batch}
+    graded = {}
+    results = data.get("results") if isinstance(data, dict) else None
+    for result in results if isinstance(results, list) else []:
+        if not isinstance(result, dict):
+            continue
+        # không sửa dict của response (có thể là bản ghi cassette / cache)
+        index = result.get("index")
+        if index in wanted and all(key in result for key in RESULT_KEYS):
+            graded[index] = {key: value for key, value in result.items() if key != "index"}
+    return graded
+
+
+def check_sentences_batch(
+    pairs: list,
+    use_cache: bool = True,
+    token_budget: int = BATCH_TOKEN_BUDGET,
+    max_items: int = BATCH_MAX_ITEMS,
+) -> list:
+    """
+    Chấm nhiều cặp (từ mục tiêu, câu) với ít request nhất có thể.
+    Trả về list kết quả cùng thứ tự với pairs (mỗi phần tử giống check_sentence).
+
+    - Câu sai rõ ràng được chấm ngay trên máy (pregrade).
+    - Câu đã có trong cache thì không gửi lại.
+    - Phần còn lại gom thành các batch theo token_budget / max_items.
+    - Câu bị model bỏ sót hoặc trả sai định dạng (hoặc cả batch lỗi)
+      được chấm lại từng câu bằng check_sentence.
+    """
+    results = [None] * len(pairs)
+    keys = [make_key(word, sentence, PROMPT_VERSION, MODEL) for word, sentence in pairs]
+
+    todo = []
+    for i, (word, sentence) in enumerate(pairs):
+        cached = pregrade(word, sentence)
+        if cached is None and use_cache:
+            cached = get_cache().get(keys[i])
+        if cached is not None:
+            results[i] = cached
+        else:
+            item = {"index": i, "target_word": word, "sentence": sentence}
+            todo.append((i, json.dumps(item, ensure_ascii=False)))
+
+    for batch in _split_batches(todo, token_budget, max_items):
+        if len(batch) == 1:
+            # 1 câu thì prompt đơn ngắn hơn -> để vòng chấm riêng bên dưới lo
+            continue
+        try:
+            graded = _grade_batch(batch)
+        except Exception as e:
+            print("Lỗi chấm batch, chấm lại từng câu:", e)
+            graded = {}
+        for index, result in graded.items():
+            results[index] = result
+            if use_cache:
+                get_cache().put(keys[index], result)
+
+    # Câu model bỏ sót -> chấm riêng
+    for i, (word, sentence) in enumerate(pairs):
+        if results[i] is None:
+            results[i] = check_sentence(word, sentence, use_cache=use_cache)
+    return results
+
+
+# ---------- Câu mẫu / gợi ý cho từ ----------
+
+def get_word_hint(target_word: str, use_cache: bool = True) -> dict:
+    """{"example_sentence", "hint_vi"} cho target_word, dùng chung cache với phần chấm."""
+    cache_key = make_key(target_word, "", HINT_PROMPT_VERSION, MODEL)
+    if use_cache:
+        cached = get_cache().get(cache_key)
+        if cached is not None:
+            return cached
+
+    result = _chat_json(HINT_PROMPT, f"Từ mục tiêu: {target_word}")
+    if not all(isinstance(result.get(key), str) for key in ("example_sentence", "hint_vi")):
+        raise ValueError("Phản hồi gợi ý thiếu example_sentence / hint_vi")
+    if use_cache:
+        get_cache().put(cache_key, result)
+    return result
@@ -0,0 +1,150 @@
+# answer_variants.py
+"""
+Tách 1 entry tiếng Anh thành tập các đáp án chấp nhận được.
+
+Ví dụ:
+    'Rule out (v) + something' -> {'rule out', 'rule out something', 'rule out sth'}
+    'whittle sth down'         -> {'whittle down', 'whittle sth down', 'whittle something down'}
+    'be + predisposed'         -> {'predisposed', 'be predisposed'}
+    'colour, color (N)'        -> {'colour', 'color', ...}
+
+Luật:
+- Luôn giữ clean_en(en) (đáp án kiểu cũ) trong tập.
+- Dấu ',' / ';' ngoài ngoặc: các cách viết thay thế nhau.
+- Ngoặc chỉ chứa tag loại từ, vd (N), (N/adj): bỏ. Ngoặc khác: phần tùy chọn.
+- Placeholder cấu trúc (N, V, V-ing, sth, sb, ...): có hoặc không đều được.
+- Đoạn 'be' / 'to be' đứng riêng giữa các dấu '+', và 'to' ở đầu cụm: tùy chọn.
+- Từ có dấu '/', vd 'a/an': mỗi bên là 1 lựa chọn.
+"""
+import functools
+import itertools
+import re
+
+from vocab_store import clean_en
+
+# Giới hạn số biến thể mỗi entry, tránh bùng nổ tổ hợp với entry dài
+MAX_VARIANTS = 64
+
+# Số chuỗi en được nhớ tập đáp án (đủ cho deck lớn, vẫn có giới hạn RAM)
+VARIANTS_CACHE_SIZE = 1 << 16
+
+POS_TAGS = {
+    "n", "noun", "v", "verb", "adj", "adjective", "adv", "adverb",
+    "phrv", "phr verb", "phrverb", "idiom", "prep", "preposition",
+}
+
+# Placeholder không có nghĩa khi gõ đáp án -> bỏ được
+PLACEHOLDERS = {
+    "n", "v", "adj", "o", "v-ing", "ving", "n/v-ing", "v-ing/n",
+    "n/ving", "ving/n", "n/v", "v/n",
+}
+
+# Placeholder tân ngữ -> bỏ được hoặc viết theo các cách tương đương
+OBJECT_WORDS = {
+    "sth": ("something", "sth"),
+    "something": ("something", "sth"),
+    "sb": ("somebody", "someone", "sb"),
+    "somebody": ("somebody", "someone", "sb"),
+    "someone": ("somebody", "someone", "sb"),
+}
+
+OPTIONAL_SEGMENTS = {"be", "to be"}
+
+_PAREN_RE = re.compile(r"\(([^)]*)\)")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def _split_alternatives(s: str):
+    """Tách theo ',' và ';' nằm ngoài ngoặc."""
+    parts, depth, buf = [], 0, []
+    for ch in s:
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth = max(0, depth - 1)
+        if ch in ",;" and depth == 0:
+            parts.append("".join(buf))
+            buf = []
+        else:
+            buf.append(ch)
+    parts.append("".join(buf))
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _is_pos_tag(content: str) -> bool:
+    tags = [t.strip().lower() for t in re.split(r"[/,]", content)]
+    return bool(tags) and all(t in POS_TAGS for t in tags)
+
+
+def _token_choices(token: str):
+    low = token.lower()
+    if low in PLACEHOLDERS:
+        return ("",)
+    if low in OBJECT_WORDS:
+        return ("",) + OBJECT_WORDS[low]
+    if "/" in low and not low.startswith("/") and not low.endswith("/"):
+        return tuple(low.split("/"))
+    return (low,)
+
+
+def _expand(alt: str):
+    # Ngoặc: tag loại từ -> bỏ; nội dung khác -> đánh dấu tùy chọn
+    optional_parts = []
+
+    def _mark(match):
+        content = match.group(1).strip()
+        if not content or _is_pos_tag(content):
+            return " "
+        optional_parts.append(content.lower())
+        return f" \x00{len(optional_parts) - 1} "
+
+    s = _PAREN_RE.sub(_mark, alt)
+
+    slots = []
+    for segment in s.split("+"):
+        seg = _SPACES_RE.sub(" ", segment).strip()
+        if not seg:
+            continue
+        if seg.lower() in OPTIONAL_SEGMENTS:
+            slots.append(("", seg.lower()))
+            continue
+        for token in seg.split(" "):
+            if token.startswith("\x00"):
+                content = optional_parts[int(token[1:])]
+                if " " in content:
+                    slots.append(("", content))
+                else:
+                    slots.append(("",) + tuple(c for c in _token_choices(content) if c))
+            else:
+                slots.append(_token_choices(token))
+
+    # 'to' ở đầu cụm (to + V) là tùy chọn
+    if len(slots) > 1 and slots[0] == ("to",):
+        slots[0] = ("", "to")
+
+    for combo in itertools.islice(itertools.product(*slots), MAX_VARIANTS):
+        text = _SPACES_RE.sub(" ", " ".join(p for p in combo if p)).strip()
+        if text:
+            yield text
+
+
+@functools.lru_cache(maxsize=VARIANTS_CACHE_SIZE)
+def accepted_variants(en: str) -> frozenset:
+    """
+    Tập các đáp án (đã chuẩn hóa) được chấp nhận cho phần tiếng Anh en.
+    Nhớ theo chuỗi en (lru_cache) -> dùng lại được với mọi backend, kể cả
+    SQLite vốn tạo dict entry mới mỗi lần get / find.
+    """
+    variants = {clean_en(en)}
+    for alt in _split_alternatives(en or ""):
+        variants.update(_expand(alt))
+    variants.discard("")
+    return frozenset(variants)
+
+
+def accepted_answers(entry: dict) -> frozenset:
+    """
+    Tập đáp án của 1 entry. Cache theo chuỗi en (accepted_variants), nên sửa en
+    thì tự tính lại; tính lười thay vì lúc load để deck lớn không chậm khi mở app.
+    """
+    return accepted_variants(entry["en"])
@@ -0,0 +1,50 @@
+# bench_ai_client.py
+"""
+So sánh chi phí mỗi lần gọi check_sentence (không tính thời gian model):
+- cũ : tạo OpenAI client mới mỗi lần -> kết nối HTTP mới mỗi lần
+- mới: client dùng chung (get_client) -> tái dùng kết nối keep-alive
+
+Chạy với server giả lập API OpenAI ngay trên máy (fake_openai.py, trả JSON có sẵn),
+nên không cần key và không tốn token.
+
+Chạy: python bench_ai_client.py [số lần gọi]
+"""
+import os
+import sys
+import time
+
+from fake_openai import FakeOpenAIServer
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    server = FakeOpenAIServer().start()
+    os.environ["vocab_teacher_base_url"] = server.base_url
+    os.environ.setdefault("vocab_teacher_key", "bench")
+
+    import ai_teacher
+
+    def run(fresh_client: bool):
+        ai_teacher.reset_client()
+        server.stats["connections"] = 0
+        start = time.perf_counter()
+        for i in range(calls):
+            if fresh_client:
+                ai_teacher.reset_client()
+            # câu phải qua được pregrade thì mới thật sự gọi API
+            ai_teacher.check_sentence("rule out", f"We cannot rule out plan {i} yet.", use_cache=False)
+        elapsed = time.perf_counter() - start
+        return elapsed / calls * 1000, server.stats["connections"]
+
+    run(False)   # làm nóng: import, JIT của httpx/pydantic...
+    for name, fresh in (("client mới mỗi lần", True), ("client dùng chung", False)):
+        ms, conns = run(fresh)
+        print(f"{name:<20} {ms:7.3f} ms / lần gọi   ({conns} kết nối TCP cho {calls} lần gọi)")
+
+    ai_teacher.reset_client()
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# bench_grading.py
+"""
+Benchmark tải cho đường chấm câu (ai_teacher.check_sentence / check_sentence_stream),
+chạy hoàn toàn trên máy với server giả lập (fake_openai.py) hoặc cassette.
+
+- N lần chấm, chạy song song `concurrency` thread (như nhiều người học / nhiều
+  câu chấm cùng lúc), không dùng cache kết quả.
+- In ra throughput (lần chấm / giây), p50 / p95 / p99 / max thời gian chấm,
+  TTFB, số lần chấm theo nguồn (api / fallback / replay...), retry, và số
+  request / kết nối / lỗi phía server.
+
+Chạy:
+    python bench_grading.py --requests 200 --concurrency 8 --latency lognormal:300,0.5
+    python bench_grading.py --errors 500:0.05,reset:0.01 --stream
+    python bench_grading.py --record grading.cassette.jsonl    # ghi lại
+    python bench_grading.py --replay grading.cassette.jsonl    # phát lại, không cần server
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fake_openai import FakeOpenAIServer
+from metrics import get_recorder, percentile
+
+TARGET_WORD = "rule out"
+
+
+def _sentence(i: int) -> str:
+    # câu phải qua được pregrade (có từ mục tiêu, đủ dài) thì mới tới API
+    return f"We cannot rule out option number {i} before the meeting."
+
+
+def _grade_once(ai_teacher, i: int, stream: bool) -> float:
+    start = time.perf_counter()
+    if stream:
+        for _ in ai_teacher.check_sentence_stream(TARGET_WORD, _sentence(i), use_cache=False):
+            pass
+    else:
+        ai_teacher.check_sentence(TARGET_WORD, _sentence(i), use_cache=False)
+    return (time.perf_counter() - start) * 1000
+
+
+def _fmt_ms(value) -> str:
+    return "-" if value is None else f"{value:8.1f}"
+
+
+def run(args):
+    server = None
+    if not args.replay:
+        server = FakeOpenAIServer(
+            latency=args.latency, errors=args.errors, chunk_ms=args.chunk_ms, seed=args.seed
+        ).start()
+        os.environ["vocab_teacher_base_url"] = server.base_url
+    os.environ.setdefault("vocab_teacher_key", "bench")
+
+    import ai_teacher
+
+    ai_teacher.reset_client()
+    if args.replay:
+        ai_teacher.use_cassette(args.replay, "replay")
+    elif args.record:
+        ai_teacher.use_cassette(args.record, "record")
+
+    # làm nóng: import, kết nối đầu tiên... không tính vào kết quả
+    _grade_once(ai_teacher, -1, args.stream)
+    recorder = get_recorder()
+    recorder.reset()
+    if server is not None:
+        server.stats.update(connections=0, requests=0, errors=0)
+
+    latencies, failures = [], 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [pool.submit(_grade_once, ai_teacher, i, args.stream) for i in range(args.requests)]
+        for future in futures:
+            try:
+                latencies.append(future.result())
+            except Exception as e:
+                failures += 1
+                if failures <= 3:
+                    print("Lỗi:", repr(e))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    summary = recorder.summary()
+    ttfb = summary["histograms"].get("all.ttfb_ms", {})
+    print(f"{args.requests} lần chấm, {args.concurrency} luồng, "
+          f"{'stream' if args.stream else 'không stream'}, "
+          f"{'replay ' + args.replay if args.replay else 'độ trễ ' + args.latency}")
+    print(f"throughput : {args.requests / elapsed:8.1f} lần / giây  ({elapsed:.2f} s)")
+    print(f"thời gian  : p50 {_fmt_ms(percentile(latencies, 50))}  p95 {_fmt_ms(percentile(latencies, 95))}  "
+          f"p99 {_fmt_ms(percentile(latencies, 99))}  max {_fmt_ms(latencies[-1] if latencies else None)} ms")
+    print(f"TTFB       : p50 {_fmt_ms(ttfb.get('p50'))}  p95 {_fmt_ms(ttfb.get('p95'))}  "
+          f"p99 {_fmt_ms(ttfb.get('p99'))} ms")
+    print(f"theo nguồn : {summary['by_source']}   retry: {summary['retries']}   lỗi ném ra: {failures}")
+    if server is not None:
+        print(f"server     : {server.stats['requests']} request, {server.stats['connections']} kết nối, "
+              f"{server.stats['errors']} lỗi chèn vào")
+
+    ai_teacher.use_cassette(None)
+    ai_teacher.reset_client()
+    if server is not None:
+        server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tải đường chấm câu (offline)")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", default="lognormal:300,0.5", help="phân bố độ trễ server giả (ms)")
+    parser.add_argument("--errors", default="", help='lỗi chèn vào, vd "500:0.05,reset:0.01"')
+    parser.add_argument("--chunk-ms", type=float, default=0.0, help="trễ giữa các đoạn khi stream")
+    parser.add_argument("--stream", action="store_true", help="dùng check_sentence_stream")
+    parser.add_argument("--seed", type=int, default=None)
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--record", default=None, help="ghi các lần gọi vào file cassette")
+    group.add_argument("--replay", default=None, help="phát lại từ file cassette, không cần server")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
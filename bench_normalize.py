@@ -0,0 +1,57 @@
+# bench_normalize.py
+"""
+So sánh chi phí lấy đáp án chuẩn hóa cho mỗi câu trả lời:
+- cũ : clean_en với re.sub(pattern string) mỗi lần check_answer
+- mới: clean_en với pattern compile sẵn
+- mới: đọc entry["key"] store đã tính sẵn (1 lần tra dict)
+
+Chạy: python bench_normalize.py
+"""
+import re
+import timeit
+
+from vocab_store import VocabStore, clean_en
+
+
+def clean_en_legacy(s: str) -> str:
+    """Bản clean_en cũ trong quiz_app (pattern string, compile lại mỗi lần gọi)."""
+    if not s:
+        return ""
+    s = s.strip()
+    s = re.sub(r"\s*\+\s*", " ", s)
+    tag_pattern = r"\s*\((?:n|noun|v|verb|adj|adjective|adv|adverb|phrv|phr\s*verb|idiom|prep|preposition)\)\s*"
+    s = re.sub(tag_pattern, " ", s, flags=re.IGNORECASE)
+    s = re.sub(r"\s*\([^)]*\)\s*$", "", s)
+    s = re.sub(r"\s+", " ", s)
+    return s.strip().lower()
+
+
+def main():
+    vocab = VocabStore().all()
+    n = len(vocab)
+    rounds = 20
+
+    def run_legacy():
+        for item in vocab:
+            clean_en_legacy(item["en"])
+
+    def run_compiled():
+        for item in vocab:
+            clean_en(item["en"])
+
+    def run_cached():
+        for item in vocab:
+            item["key"]
+
+    for name, fn in (
+        ("legacy re.sub", run_legacy),
+        ("compiled re", run_compiled),
+        ("cached key", run_cached),
+    ):
+        best = min(timeit.repeat(fn, number=rounds, repeat=5))
+        per_answer_us = best / (rounds * n) * 1e6
+        print(f"{name:<15} {per_answer_us:8.3f} µs / câu trả lời")
+
+
+if __name__ == "__main__":
+    main()
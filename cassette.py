@@ -0,0 +1,92 @@
+# cassette.py
+"""
+Ghi / phát lại (record / replay) các lần gọi model của ai_teacher.
+
+File cassette là JSONL, mỗi dòng 1 lần gọi:
+    {"key", "model", "system_prompt", "user_message", "response", "usage"}
+key = sha256 của (model, system prompt, user message).
+
+Chế độ:
+- "record": luôn gọi API thật rồi ghi lại (đè bản cũ cùng key)
+- "replay": chỉ phát lại; thiếu bản ghi -> CassetteMiss, không gọi mạng
+- "auto"  : có thì phát lại, chưa có thì gọi API và ghi lại
+
+Bật trong code: ai_teacher.use_cassette("grading.cassette.jsonl", "replay"),
+hoặc đặt biến môi trường vocab_teacher_cassette (+ vocab_teacher_cassette_mode).
+"""
+import copy
+import hashlib
+import json
+import os
+import threading
+
+MODES = ("record", "replay", "auto")
+
+
+class CassetteMiss(KeyError):
+    """Chế độ replay nhưng cassette chưa có bản ghi cho request này."""
+
+
+def make_key(model: str, system_prompt: str, user_message: str) -> str:
+    raw = json.dumps([model, system_prompt, user_message], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    def __init__(self, path: str, mode: str = "replay"):
+        if mode not in MODES:
+            raise ValueError(f"mode phải là 1 trong {MODES}")
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue    # dòng cuối ghi dở
+                self._entries[entry["key"]] = entry
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, key: str):
+        """
+        Bản sao bản ghi để phát lại (người gọi sửa thoải mái, không ảnh hưởng
+        lần phát sau), None nếu nên gọi API thật.
+        """
+        if self.mode == "record":
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry = copy.deepcopy(entry)
+        if entry is None and self.mode == "replay":
+            raise CassetteMiss(key)
+        return entry
+
+    def record(self, key: str, model: str, system_prompt: str, user_message: str,
+               response: dict, usage: dict = None):
+        if self.mode == "replay":
+            return
+        entry = {
+            "key": key,
+            "model": model,
+            "system_prompt": system_prompt,
+            "user_message": user_message,
+            "response": copy.deepcopy(response),
+            "usage": usage,
+        }
+        with self._lock:
+            self._entries[key] = entry
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
@@ -0,0 +1,283 @@
+# fake_openai.py
+"""
+Server giả lập API chat completions của OpenAI, chạy ngay trên máy:
+benchmark / thử đường chấm câu (ai_teacher) mà không cần key, mạng hay token.
+
+- Trả JSON có sẵn (CANNED_RESULT hoặc danh sách response tự đưa vào, lần lượt
+  xoay vòng) làm nội dung message, kèm usage ước lượng.
+- Độ trễ theo phân bố: "fixed:50", "uniform:20,80", "normal:100,20",
+  "lognormal:300,0.5" (trung vị 300ms, sigma 0.5 -> có đuôi dài). Đơn vị ms.
+- Chèn lỗi theo tỉ lệ: "500:0.05,429:0.02,reset:0.01,hang:0.01"
+  (mã HTTP, "reset" = cắt kết nối, "hang" = treo HANG_SECONDS giây).
+- Hỗ trợ stream=True (SSE, chia nội dung thành từng đoạn CHUNK_CHARS ký tự).
+
+Dùng trong code:
+    with FakeOpenAIServer(latency="lognormal:300,0.5", errors="500:0.05") as server:
+        os.environ["vocab_teacher_base_url"] = server.base_url
+
+Chạy riêng: python fake_openai.py --port 8765 --latency lognormal:300,0.5
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_RESULT = {
+    "is_correct_usage": True,
+    "score": 0.9,
+    "feedback_vi": "Câu dùng từ đúng ngữ cảnh.",
+    "suggested_sentence": "We cannot rule out the possibility of rain.",
+}
+
+CHUNK_CHARS = 8
+HANG_SECONDS = 120.0
+
+
+def parse_latency(spec: str, rng: random.Random):
+    """Chuỗi mô tả phân bố -> hàm trả độ trễ (giây) mỗi lần gọi."""
+    spec = (spec or "fixed:0").strip()
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v.strip()] or [0.0]
+    if kind == "fixed":
+        return lambda: values[0] / 1000
+    if kind == "uniform":
+        low, high = values[0], values[1]
+        return lambda: rng.uniform(low, high) / 1000
+    if kind == "normal":
+        mean, sd = values[0], values[1]
+        return lambda: max(0.0, rng.gauss(mean, sd)) / 1000
+    if kind == "lognormal":
+        median, sigma = values[0], values[1]
+        return lambda: median * rng.lognormvariate(0.0, sigma) / 1000
+    raise ValueError(f"Không hiểu phân bố độ trễ: {spec}")
+
+
+def parse_errors(spec: str) -> list:
+    """ "500:0.05,reset:0.01" -> [("500", 0.05), ("reset", 0.01)] """
+    errors = []
+    for part in (spec or "").split(","):
+        if not part.strip():
+            continue
+        kind, _, rate = part.strip().partition(":")
+        errors.append((kind, float(rate)))
+    return errors
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # cho phép keep-alive
+    disable_nagle_algorithm = True  # tránh trễ 40ms (Nagle + delayed ACK) khi giữ kết nối
+
+    def setup(self):
+        super().setup()
+        self.server.fake._count("connections")
+
+    def do_POST(self):
+        fake = self.server.fake
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            request = {}
+        if not self.path.rstrip("/").endswith("chat/completions"):
+            self._send_json(404, {"error": {"message": "not found", "type": "invalid_request_error"}})
+            return
+
+        fake._count("requests")
+        time.sleep(fake.latency())
+
+        error = fake.pick_error()
+        if error is not None:
+            fake._count("errors")
+            if error == "reset":
+                self.close_connection = True
+                self.connection.close()
+                return
+            if error == "hang":
+                time.sleep(HANG_SECONDS)
+                return
+            self._send_json(int(error), {"error": {"message": f"injected {error}", "type": "server_error"}})
+            return
+
+        content = json.dumps(fake.next_response(), ensure_ascii=False)
+        usage = {
+            "prompt_tokens": _estimate_tokens(json.dumps(request.get("messages", []), ensure_ascii=False)),
+            "completion_tokens": _estimate_tokens(content),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        model = request.get("model", "gpt-4o-mini")
+
+        if request.get("stream"):
+            include_usage = bool((request.get("stream_options") or {}).get("include_usage"))
+            self._send_stream(model, content, usage if include_usage else None, fake.chunk_delay)
+            return
+
+        self._send_json(200, {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        })
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, model: str, content: str, usage, chunk_delay: float):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def event(payload):
+            data = f"data: {payload}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        def chunk(delta, finish_reason=None):
+            return json.dumps({
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            })
+
+        event(chunk({"role": "assistant", "content": ""}))
+        for start in range(0, len(content), CHUNK_CHARS):
+            if chunk_delay:
+                time.sleep(chunk_delay)
+            event(chunk({"content": content[start:start + CHUNK_CHARS]}))
+        event(chunk({}, "stop"))
+        if usage is not None:
+            event(json.dumps({
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [],
+                "usage": usage,
+            }))
+        event("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeOpenAIServer:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: str = "fixed:0",
+        errors: str = "",
+        responses: list = None,
+        chunk_ms: float = 0.0,
+        seed: int = None,
+    ):
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._latency = parse_latency(latency, self._rng)
+        self.errors = parse_errors(errors)
+        self.responses = list(responses or [CANNED_RESULT])
+        self.chunk_delay = chunk_ms / 1000
+        self.stats = {"connections": 0, "requests": 0, "errors": 0}
+        self._next = 0
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def latency(self) -> float:
+        with self._rng_lock:
+            return self._latency()
+
+    def pick_error(self):
+        """Loại lỗi cần chèn cho request này, None nếu trả bình thường."""
+        with self._rng_lock:
+            roll = self._rng.random()
+        for kind, rate in self.errors:
+            if roll < rate:
+                return kind
+            roll -= rate
+        return None
+
+    def next_response(self) -> dict:
+        with self._rng_lock:
+            response = self.responses[self._next % len(self.responses)]
+            self._next += 1
+        return response
+
+    def _count(self, name: str):
+        with self._rng_lock:
+            self.stats[name] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Server giả lập OpenAI chat completions")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="fixed:0", help='vd "lognormal:300,0.5" (ms)')
+    parser.add_argument("--errors", default="", help='vd "500:0.05,429:0.02,reset:0.01"')
+    parser.add_argument("--chunk-ms", type=float, default=0.0, help="trễ giữa các đoạn khi stream")
+    parser.add_argument("--canned", default=None, help="file JSON: 1 object hoặc list object trả về")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    responses = None
+    if args.canned:
+        with open(args.canned, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        responses = data if isinstance(data, list) else [data]
+
+    server = FakeOpenAIServer(
+        args.host, args.port, args.latency, args.errors, responses, args.chunk_ms, args.seed
+    )
+    print(f"Server giả lập chạy ở {server.base_url} (Ctrl+C để dừng)")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+# grading.py
+"""
+Chấm câu bằng AI ở thread nền để cửa sổ Tk không bị đứng trong lúc chờ API.
+
+- Công việc chạy trong ThreadPoolExecutor, mỗi lần submit trả về GradeJob
+  (bọc Future).
+- Kết quả được đưa về thread UI bằng root.after: chỉ poll khi còn job đang
+  chờ, callback on_done / on_error luôn chạy trên thread Tk.
+- Giới hạn số request đang bay (max_in_flight): vượt quá thì submit trả về None.
+- cancel(tag): hủy các job của 1 màn hình khi người học chuyển sang việc khác.
+  Job chưa chạy bị hủy hẳn; job đang gọi API thì kết quả bị bỏ qua.
+- submit_stream: chấm kiểu stream, các sự kiện (điểm, từng đoạn nhận xét...)
+  được đưa về UI qua on_event ở mỗi lần poll, trước khi có kết quả cuối.
+"""
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = 2
+MAX_IN_FLIGHT = 4
+POLL_MS = 50
+
+
+_check_sentence = None
+
+
+def _default_grade(target_word: str, sentence: str) -> dict:
+    # import 1 lần ở lần chấm đầu: thiếu openai / dotenv thì app vẫn mở được,
+    # chỉ lỗi khi chấm
+    global _check_sentence
+    if _check_sentence is None:
+        from ai_teacher import check_sentence
+
+        _check_sentence = check_sentence
+    return _check_sentence(target_word, sentence)
+
+
+_check_sentence_stream = None
+
+
+def _default_stream(target_word: str, sentence: str):
+    global _check_sentence_stream
+    if _check_sentence_stream is None:
+        from ai_teacher import check_sentence_stream
+
+        _check_sentence_stream = check_sentence_stream
+    return _check_sentence_stream(target_word, sentence)
+
+
+class GradeJob:
+    def __init__(self, future, tag, on_done, on_error, on_event=None):
+        self.future = future
+        self.tag = tag
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_event = on_event
+        self.events = deque()     # sự kiện stream chờ đưa về thread UI
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+        self.future.cancel()
+
+
+class GradingExecutor:
+    def __init__(
+        self,
+        root,
+        grade_fn=None,
+        stream_fn=None,
+        max_workers: int = MAX_WORKERS,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        poll_ms: int = POLL_MS,
+    ):
+        self.root = root
+        self.grade_fn = grade_fn or _default_grade
+        self.stream_fn = stream_fn or _default_stream
+        self.max_in_flight = max_in_flight
+        self.poll_ms = poll_ms
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="grading")
+        self._lock = threading.Lock()
+        self._jobs = []
+        self._polling = False
+
+    def submit(self, target_word: str, sentence: str, on_done, on_error=None, tag=None):
+        """
+        Gửi 1 câu đi chấm. on_done(result) / on_error(exc) chạy trên thread Tk.
+        Trả về GradeJob, hoặc None nếu đã đủ max_in_flight request đang chờ.
+        """
+        with self._lock:
+            if len(self._jobs) >= self.max_in_flight:
+                return None
+            future = self._pool.submit(self.grade_fn, target_word, sentence)
+            job = GradeJob(future, tag, on_done, on_error)
+            self._jobs.append(job)
+        self._schedule_poll()
+        return job
+
+    def submit_stream(self, target_word: str, sentence: str, on_event, on_done, on_error=None, tag=None):
+        """
+        Như submit nhưng chấm kiểu stream: on_event(kind, key, value) nhận dần
+        các sự kiện của stream_fn trên thread Tk, on_done(result) khi xong.
+        """
+        with self._lock:
+            if len(self._jobs) >= self.max_in_flight:
+                return None
+            job = GradeJob(None, tag, on_done, on_error, on_event)
+            job.future = self._pool.submit(self._run_stream, job, target_word, sentence)
+            self._jobs.append(job)
+        self._schedule_poll()
+        return job
+
+    def _run_stream(self, job: GradeJob, target_word: str, sentence: str):
+        result = None
+        for kind, key, value in self.stream_fn(target_word, sentence):
+            if job.cancelled:
+                break
+            if kind == "done":
+                result = value
+            else:
+                job.events.append((kind, key, value))
+        return result
+
+    def pending(self, tag=None) -> int:
+        """Số job chưa xong (chưa bị hủy) của tag, hoặc của tất cả nếu tag=None."""
+        with self._lock:
+            return sum(
+                1 for job in self._jobs
+                if not job.cancelled and (tag is None or job.tag == tag)
+            )
+
+    def cancel(self, tag=None):
+        """Hủy các job của tag (tag=None: hủy hết)."""
+        with self._lock:
+            for job in self._jobs:
+                if tag is None or job.tag == tag:
+                    job.cancel()
+
+    def shutdown(self):
+        self.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    # ---------- Đưa kết quả về thread UI ----------
+
+    def _schedule_poll(self):
+        if self._polling:
+            return
+        self._polling = True
+        self.root.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        with self._lock:
+            finished = [job for job in self._jobs if job.cancelled or job.future.done()]
+            self._jobs = [job for job in self._jobs if job not in finished]
+            running = list(self._jobs)
+            more = bool(self._jobs)
+
+        for job in running + finished:
+            self._deliver_events(job)
+
+        for job in finished:
+            if job.cancelled:
+                continue
+            exc = job.future.exception()
+            try:
+                if exc is None:
+                    job.on_done(job.future.result())
+                elif job.on_error is not None:
+                    job.on_error(exc)
+            except Exception as e:
+                print("Lỗi khi hiển thị kết quả chấm:", e)
+
+        self._polling = False
+        if more:
+            self._schedule_poll()
+
+    def _deliver_events(self, job: GradeJob):
+        while job.events and not job.cancelled:
+            kind, key, value = job.events.popleft()
+            try:
+                job.on_event(kind, key, value)
+            except Exception as e:
+                print("Lỗi khi hiển thị kết quả chấm:", e)
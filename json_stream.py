@@ -0,0 +1,191 @@
+# json_stream.py
+"""
+Parse dần 1 JSON object khi model đang stream từng đoạn text.
+
+    parser = JsonObjectStream()
+    for chunk in chunks:
+        for kind, key, value in parser.feed(chunk):
+            ...
+
+Sự kiện:
+- ("delta", key, text): phần text mới giải mã được của 1 giá trị chuỗi
+  (chưa xong chuỗi) -> hiện dần feedback khi model còn đang viết.
+- ("value", key, value): giá trị của key đã hoàn chỉnh (chuỗi, số, bool,
+  null, hoặc object/array lồng bên trong).
+
+Chỉ cần giải mã dần các field ở tầng ngoài cùng; object/array lồng bên trong
+được gom nguyên rồi json.loads khi đóng ngoặc.
+"""
+import json
+
+_ESCAPES = {
+    '"': '"', "\\": "\\", "/": "/",
+    "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t",
+}
+
+# Trạng thái
+_BEFORE = 0         # chưa gặp '{'
+_KEY = 1            # chờ key (hoặc '}')
+_IN_KEY = 2
+_COLON = 3
+_VALUE = 4          # chờ bắt đầu value
+_IN_STRING = 5
+_IN_SCALAR = 6      # số, true/false/null
+_IN_NESTED = 7      # object / array lồng
+_AFTER_VALUE = 8    # chờ ',' hoặc '}'
+_DONE = 9
+
+
+class JsonObjectStream:
+    def __init__(self):
+        self.result = {}
+        self._state = _BEFORE
+        self._key = None
+        self._buf = []            # ký tự đã giải mã của chuỗi hiện tại
+        self._delta_from = 0      # vị trí trong _buf chưa gửi delta
+        self._escape = None       # None | "" (vừa gặp '\') | "uXXX..." (đang đọc \u)
+        self._high_surrogate = None
+        self._raw = []            # scalar / nested thô
+        self._depth = 0
+        self._nested_in_string = False
+        self._nested_escape = False
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    def feed(self, text: str) -> list:
+        events = []
+        for ch in text:
+            self._step(ch, events)
+            if self._state == _DONE:
+                break
+        # gửi phần chuỗi mới giải mã trong lần feed này (gộp thành 1 delta)
+        if self._state == _IN_STRING and self._key is not None and len(self._buf) > self._delta_from:
+            events.append(("delta", self._key, "".join(self._buf[self._delta_from:])))
+            self._delta_from = len(self._buf)
+        return events
+
+    # ---------- Máy trạng thái ----------
+
+    def _step(self, ch: str, events: list):
+        state = self._state
+        if state == _IN_STRING or state == _IN_KEY:
+            self._string_char(ch, events)
+        elif state == _BEFORE:
+            if ch == "{":
+                self._state = _KEY
+        elif state == _KEY:
+            if ch == '"':
+                self._start_string(_IN_KEY)
+            elif ch == "}":
+                self._state = _DONE
+        elif state == _COLON:
+            if ch == ":":
+                self._state = _VALUE
+        elif state == _VALUE:
+            if ch == '"':
+                self._start_string(_IN_STRING)
+            elif ch in "{[":
+                self._raw = [ch]
+                self._depth = 1
+                self._nested_in_string = False
+                self._nested_escape = False
+                self._state = _IN_NESTED
+            elif not ch.isspace():
+                self._raw = [ch]
+                self._state = _IN_SCALAR
+        elif state == _IN_SCALAR:
+            if ch in ",}" or ch.isspace():
+                self._finish_value(json.loads("".join(self._raw)), events)
+                self._after_value(ch)
+            else:
+                self._raw.append(ch)
+        elif state == _IN_NESTED:
+            self._nested_char(ch, events)
+        elif state == _AFTER_VALUE:
+            self._after_value(ch)
+
+    def _after_value(self, ch: str):
+        if ch == ",":
+            self._state = _KEY
+        elif ch == "}":
+            self._state = _DONE
+        else:
+            self._state = _AFTER_VALUE
+
+    def _finish_value(self, value, events: list):
+        self.result[self._key] = value
+        events.append(("value", self._key, value))
+        self._key = None
+
+    def _nested_char(self, ch: str, events: list):
+        self._raw.append(ch)
+        if self._nested_in_string:
+            if self._nested_escape:
+                self._nested_escape = False
+            elif ch == "\\":
+                self._nested_escape = True
+            elif ch == '"':
+                self._nested_in_string = False
+            return
+        if ch == '"':
+            self._nested_in_string = True
+        elif ch in "{[":
+            self._depth += 1
+        elif ch in "}]":
+            self._depth -= 1
+            if self._depth == 0:
+                self._finish_value(json.loads("".join(self._raw)), events)
+                self._state = _AFTER_VALUE
+
+    # ---------- Chuỗi ----------
+
+    def _start_string(self, state: int):
+        self._state = state
+        self._buf = []
+        self._delta_from = 0
+        self._escape = None
+        self._high_surrogate = None
+
+    def _string_char(self, ch: str, events: list):
+        if self._escape is not None:
+            self._escape_char(ch)
+            return
+        if ch == "\\":
+            self._escape = ""
+            return
+        if ch == '"':
+            text = "".join(self._buf)
+            if self._state == _IN_KEY:
+                self._key = text
+                self._state = _COLON
+            else:
+                if len(self._buf) > self._delta_from:
+                    events.append(("delta", self._key, "".join(self._buf[self._delta_from:])))
+                self._finish_value(text, events)
+                self._state = _AFTER_VALUE
+            return
+        self._buf.append(ch)
+
+    def _escape_char(self, ch: str):
+        if self._escape == "":
+            if ch == "u":
+                self._escape = "u"
+            else:
+                self._buf.append(_ESCAPES.get(ch, ch))
+                self._escape = None
+            return
+        # đang đọc \uXXXX (có thể bị cắt giữa 2 chunk)
+        self._escape += ch
+        if len(self._escape) < 5:
+            return
+        code = int(self._escape[1:], 16)
+        self._escape = None
+        if 0xD800 <= code <= 0xDBFF:
+            self._high_surrogate = code
+            return
+        if 0xDC00 <= code <= 0xDFFF and self._high_surrogate is not None:
+            code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+        self._high_surrogate = None
+        self._buf.append(chr(code))
@@ -4,6 +4,7 @@ from tkinter import messagebox
 
 from quiz_app import VocabGuardApp
 from reading_app import ReadingApp
+from reading_tests import ReadingPreloader
 
 
 class StudyMasterApp:
@@ -17,6 +18,10 @@ class StudyMasterApp:
         self.vocab_window = None
         self.reading_window = None
 
+        # Chuẩn bị sẵn 1 bài Reading ở thread nền -> mở Reading là hiện ngay
+        self.reading_preloader = ReadingPreloader()
+        self.reading_preloader.start()
+
         self.build_menu_ui()
 
         # Chặn đóng root nếu chưa xong cả 2
@@ -117,6 +122,9 @@ class StudyMasterApp:
             self.vocab_window.lift()
             return
 
+        # người học đang làm từ vựng -> tranh thủ chuẩn bị bài Reading tiếp theo
+        self.reading_preloader.start()
+
         self.vocab_window = tk.Toplevel(self.root)
         VocabGuardApp(
             self.vocab_window,
@@ -146,7 +154,9 @@ class StudyMasterApp:
         ReadingApp(
             self.reading_window,
             on_completed=self.on_reading_completed,
-            on_request_switch=self.switch_to_vocab_from_reading
+            on_request_switch=self.switch_to_vocab_from_reading,
+            # None nếu chưa tải xong -> ReadingApp tự tải như cũ
+            test_data=self.reading_preloader.take(),
         )
 
     def on_reading_completed(self):
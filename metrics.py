@@ -0,0 +1,172 @@
+# metrics.py
+"""
+Đo thời gian / token / chi phí của các lần chấm câu (ai_teacher).
+
+Mỗi lần gọi check_sentence / check_sentence_stream ghi 1 bản ghi (dict):
+    {"ts", "call", "model", "source", "cache_hit", "retries", "wall_ms",
+     "ttfb_ms", "prompt_tokens", "completion_tokens", "cost_usd", "error"}
+source: "pregrade" (chấm trên máy), "cache", "api", "fallback" (API lỗi),
+"replay" (phát lại từ cassette).
+
+MetricsRecorder gom các bản ghi thành histogram trong RAM (p50/p95/p99),
+dump ra file JSONL, và là nguồn dữ liệu cho bảng debug (metrics_panel.py).
+Đặt biến môi trường vocab_teacher_metrics_file -> mỗi bản ghi được ghi
+thêm ngay vào file đó.
+"""
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+
+# Giữ tối đa bấy nhiêu mẫu gần nhất cho mỗi histogram / danh sách bản ghi
+MAX_SAMPLES = 2000
+
+# USD / 1 triệu token (prompt, completion)
+PRICES_PER_MILLION = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+
+# Các chỉ số số học được gom histogram
+HISTOGRAM_FIELDS = ("wall_ms", "ttfb_ms", "prompt_tokens", "completion_tokens", "cost_usd")
+
+
+def estimate_cost(model: str, prompt_tokens, completion_tokens):
+    """Chi phí ước tính (USD), None nếu không biết giá model / không có số token."""
+    prices = PRICES_PER_MILLION.get(model)
+    if prices is None or prompt_tokens is None or completion_tokens is None:
+        return None
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+def percentile(sorted_values: list, p: float):
+    """Percentile kiểu nearest-rank trên list đã sort, None nếu rỗng."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Histogram:
+    """Giữ MAX_SAMPLES mẫu gần nhất; count / total tính trên mọi mẫu."""
+
+    def __init__(self, max_samples: int = MAX_SAMPLES):
+        self._samples = deque(maxlen=max_samples)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value: float):
+        self._samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def summary(self) -> dict:
+        values = sorted(self._samples)
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+            "max": values[-1] if values else None,
+        }
+
+
+class MetricsRecorder:
+    def __init__(self, path: str = None, max_records: int = MAX_SAMPLES):
+        self.path = path
+        self._lock = threading.Lock()
+        self._records = deque(maxlen=max_records)
+        self._histograms = {}     # (source, field) -> Histogram
+        self._counts = {}         # source -> số lần gọi
+        self._retries = 0
+        self._errors = 0
+        self._cost = 0.0
+
+    def record(self, record: dict):
+        record.setdefault("ts", time.time())
+        with self._lock:
+            self._records.append(record)
+            source = record.get("source", "api")
+            self._counts[source] = self._counts.get(source, 0) + 1
+            self._retries += record.get("retries") or 0
+            if record.get("error"):
+                self._errors += 1
+            self._cost += record.get("cost_usd") or 0.0
+            for field in HISTOGRAM_FIELDS:
+                value = record.get(field)
+                if value is None:
+                    continue
+                for key in (("all", field), (source, field)):
+                    hist = self._histograms.get(key)
+                    if hist is None:
+                        hist = self._histograms[key] = Histogram()
+                    hist.add(value)
+            if self.path:
+                self._append(self.path, [record])
+
+    def recent(self, n: int = 20) -> list:
+        with self._lock:
+            return list(self._records)[-n:]
+
+    def summary(self) -> dict:
+        """Tổng hợp: số lần gọi theo source, tỉ lệ cache hit, histogram từng chỉ số."""
+        with self._lock:
+            calls = sum(self._counts.values())
+            hits = self._counts.get("cache", 0)
+            return {
+                "calls": calls,
+                "by_source": dict(self._counts),
+                "cache_hit_rate": hits / calls if calls else None,
+                "retries": self._retries,
+                "errors": self._errors,
+                "cost_usd": self._cost,
+                "histograms": {
+                    f"{source}.{field}": hist.summary()
+                    for (source, field), hist in sorted(self._histograms.items())
+                },
+            }
+
+    def dump_jsonl(self, path: str, include_summary: bool = True) -> int:
+        """Ghi thêm các bản ghi đang giữ (và 1 dòng summary) vào file JSONL. Trả số dòng đã ghi."""
+        with self._lock:
+            lines = list(self._records)
+        if include_summary:
+            lines.append({"ts": time.time(), "summary": self.summary()})
+        with self._lock:
+            self._append(path, lines)
+        return len(lines)
+
+    def reset(self):
+        with self._lock:
+            self._records.clear()
+            self._histograms.clear()
+            self._counts.clear()
+            self._retries = 0
+            self._errors = 0
+            self._cost = 0.0
+
+    @staticmethod
+    def _append(path: str, records: list):
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                for rec in records:
+                    f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print("Lỗi ghi file metrics:", e)
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_recorder() -> MetricsRecorder:
+    """Recorder dùng chung cả app, tạo lười ở lần gọi đầu."""
+    global _recorder
+    if _recorder is None:
+        with _recorder_lock:
+            if _recorder is None:
+                _recorder = MetricsRecorder(os.getenv("vocab_teacher_metrics_file") or None)
+    return _recorder
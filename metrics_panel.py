@@ -0,0 +1,92 @@
+# metrics_panel.py
+"""
+Bảng debug: số liệu chấm câu (metrics.get_recorder()) cập nhật mỗi giây.
+Mở bằng phím F12 trong màn luyện từ vựng (chỉ khi đặt biến môi trường
+vocab_teacher_debug).
+"""
+import os
+import time
+import tkinter as tk
+
+from metrics import get_recorder
+
+REFRESH_MS = 1000
+DUMP_FILE = "ai_metrics.jsonl"
+
+
+def _fmt(value, digits: int = 1) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.{digits}f}"
+    return str(value)
+
+
+class MetricsPanel:
+    def __init__(self, parent):
+        self.recorder = get_recorder()
+        self.win = tk.Toplevel(parent)
+        self.win.title("Số liệu chấm câu (debug)")
+        self.win.geometry("820x520")
+        self.win.transient(parent)
+
+        self.text = tk.Text(self.win, font=("Courier New", 10), wrap="none")
+        self.text.pack(fill=tk.BOTH, expand=True, padx=8, pady=8)
+        self.text.config(state="disabled")
+
+        btn_frame = tk.Frame(self.win)
+        btn_frame.pack(pady=5)
+        tk.Button(btn_frame, text="Ghi ra JSONL", command=self.dump).pack(side=tk.LEFT, padx=5)
+        tk.Button(btn_frame, text="Xóa số liệu", command=self.clear).pack(side=tk.LEFT, padx=5)
+        tk.Button(btn_frame, text="Đóng", command=self.win.destroy).pack(side=tk.LEFT, padx=5)
+
+        self.status_label = tk.Label(self.win, text="", font=("Arial", 10))
+        self.status_label.pack(pady=(0, 5))
+
+        self.refresh()
+
+    def refresh(self):
+        if not self.win.winfo_exists():
+            return
+        self.text.config(state="normal")
+        self.text.delete("1.0", "end")
+        self.text.insert("1.0", self._render())
+        self.text.config(state="disabled")
+        self.win.after(REFRESH_MS, self.refresh)
+
+    def _render(self) -> str:
+        summary = self.recorder.summary()
+        lines = [
+            f"Số lần chấm: {summary['calls']}   theo nguồn: {summary['by_source']}",
+            f"Tỉ lệ cache hit: {_fmt(summary['cache_hit_rate'], 2)}   "
+            f"retry: {summary['retries']}   lỗi: {summary['errors']}   "
+            f"chi phí ước tính: ${summary['cost_usd']:.5f}",
+            "",
+            f"{'chỉ số':<32}{'n':>6}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}",
+        ]
+        for name, hist in summary["histograms"].items():
+            digits = 6 if name.endswith("cost_usd") else 1
+            lines.append(
+                f"{name:<32}{hist['count']:>6}"
+                + "".join(f"{_fmt(hist[k], digits):>10}" for k in ("mean", "p50", "p95", "p99", "max"))
+            )
+
+        lines += ["", "Gần nhất:"]
+        for rec in reversed(self.recorder.recent(15)):
+            lines.append(
+                f"{time.strftime('%H:%M:%S', time.localtime(rec['ts']))}  "
+                f"{rec.get('source', ''):<9}{_fmt(rec.get('wall_ms')):>9} ms  "
+                f"ttfb {_fmt(rec.get('ttfb_ms')):>7}  "
+                f"tok {_fmt(rec.get('prompt_tokens'))}/{_fmt(rec.get('completion_tokens'))}  "
+                f"retry {rec.get('retries', 0)}  {rec.get('error') or ''}"
+            )
+        return "\n".join(lines)
+
+    def dump(self):
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), DUMP_FILE)
+        count = self.recorder.dump_jsonl(path)
+        self.status_label.config(text=f"Đã ghi {count} dòng vào {path}")
+
+    def clear(self):
+        self.recorder.reset()
+        self.status_label.config(text="Đã xóa số liệu")
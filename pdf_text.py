@@ -0,0 +1,200 @@
+# pdf_text.py
+"""
+Lấy text passage từ PDF cho ReadingApp, có cache và trích song song từng trang.
+
+PyPDF2 đọc hết các trang mỗi lần mở bài -> PDF nhiều trang (nhất là bản scan)
+mất vài giây. Text đã trích được lưu vào PDF_CACHE_DIR (cạnh code), tên file
+là sha1 nội dung PDF (+ EXTRACTOR_VERSION): lần mở sau đọc lại ngay; PDF bị
+sửa -> hash khác -> tự trích lại, không bao giờ dùng nhầm text cũ.
+
+Chưa có cache thì iter_pdf_pages trả dần từng trang (generator): trang 1 trích
+ngay trong thread gọi, các trang sau chia cho process pool chạy song song,
+trả ra đúng thứ tự. ReadingApp hiện trang 1 trước, các trang sau nối dần.
+"""
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import PyPDF2
+
+from reading_catalog import file_sha1
+
+PDF_CACHE_DIR = "pdf_text_cache"
+
+# Tăng khi đổi cách trích text -> cache cũ không bị dùng lại
+EXTRACTOR_VERSION = "1"
+
+# PDF ít trang hơn thế này thì trích tuần tự (mở process tốn hơn lợi)
+PARALLEL_MIN_PAGES = 4
+PAGES_PER_TASK = 2
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+PAGE_SEPARATOR = "\n\n"
+
+_memory = {}        # key -> text, giữ trong lần chạy app
+_memory_lock = threading.Lock()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+# ---------- Trích text ----------
+
+def _page_text(page) -> str:
+    try:
+        return (page.extract_text() or "").strip()
+    except Exception:
+        return ""
+
+
+def _extract_pages(pdf_path: str, start: int, stop: int) -> list:
+    """Text các trang [start, stop) — chạy trong process con của pool."""
+    with open(pdf_path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        return [_page_text(reader.pages[i]) for i in range(start, min(stop, len(reader.pages)))]
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS)
+    return _pool
+
+
+def _iter_pages(pdf_path: str, parallel: bool):
+    """Như iter_pdf_pages nhưng lỗi đọc PDF thì ném ra."""
+    with open(pdf_path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        page_count = len(reader.pages)
+        tasks = []
+        if parallel and MAX_WORKERS > 1 and page_count >= PARALLEL_MIN_PAGES:
+            try:
+                pool = _get_pool()
+                tasks = [
+                    (start, pool.submit(_extract_pages, pdf_path, start, start + PAGES_PER_TASK))
+                    for start in range(1, page_count, PAGES_PER_TASK)
+                ]
+            except Exception as e:   # không tạo được process -> làm tuần tự
+                print("Không trích PDF song song được:", e)
+                tasks = []
+
+        # trang 1 trích ngay tại đây, không chờ process con khởi động
+        first = _page_text(reader.pages[0]) if page_count else ""
+        if first:
+            yield first
+        if not tasks:
+            for i in range(1, page_count):
+                text = _page_text(reader.pages[i])
+                if text:
+                    yield text
+            return
+
+    for start, future in tasks:
+        try:
+            texts = future.result()
+        except Exception as e:   # process con chết giữa chừng -> tự trích phần đó
+            print("Trích PDF song song lỗi, làm lại tuần tự:", e)
+            texts = _extract_pages(pdf_path, start, start + PAGES_PER_TASK)
+        for text in texts:
+            if text:
+                yield text
+
+
+def iter_pdf_pages(pdf_path: str, parallel: bool = True):
+    """
+    Generator: text từng trang (bỏ trang rỗng), đúng thứ tự trang.
+    Lỗi đọc PDF thì in ra và dừng (như extract_text trước đây).
+    """
+    try:
+        yield from _iter_pages(pdf_path, parallel)
+    except Exception as e:
+        print("Lỗi đọc PDF:", e)
+
+
+def extract_text(pdf_path: str) -> str:
+    """Đọc toàn bộ text từ PDF (không qua cache)."""
+    return PAGE_SEPARATOR.join(iter_pdf_pages(pdf_path))
+
+
+# ---------- Cache ----------
+
+def cache_dir() -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), PDF_CACHE_DIR)
+
+
+def _cache_key(pdf_path: str, sha1: str = None) -> str:
+    return f"{sha1 or file_sha1(pdf_path)}-v{EXTRACTOR_VERSION}"
+
+
+def cached_pdf_text(pdf_path: str, sha1: str = None):
+    """Text đã cache của PDF (RAM hoặc đĩa), None nếu chưa trích lần nào."""
+    key = _cache_key(pdf_path, sha1)
+    with _memory_lock:
+        text = _memory.get(key)
+    if text is not None:
+        return text
+    try:
+        with open(os.path.join(cache_dir(), key + ".txt"), "r", encoding="utf-8") as f:
+            text = f.read()
+    except OSError:
+        return None
+    with _memory_lock:
+        _memory[key] = text
+    return text
+
+
+def stream_pdf_text(pdf_path: str, sha1: str = None):
+    """
+    Generator: có cache thì trả cả text 1 lần; chưa có thì trả từng trang
+    (iter_pdf_pages) rồi ghi cache khi xong. Ghép các phần bằng PAGE_SEPARATOR.
+    """
+    sha1 = sha1 or file_sha1(pdf_path)
+    text = cached_pdf_text(pdf_path, sha1)
+    if text is not None:
+        yield text
+        return
+
+    pages = []
+    try:
+        for page in _iter_pages(pdf_path, parallel=True):
+            pages.append(page)
+            yield page
+    except Exception as e:
+        print("Lỗi đọc PDF:", e)
+        return   # text thiếu trang -> không cache
+    text = PAGE_SEPARATOR.join(pages)
+    key = _cache_key(pdf_path, sha1)
+    if text:   # PDF không có chữ (bản scan...) -> không cache, lần sau thử lại
+        _write_cache(os.path.join(cache_dir(), key + ".txt"), text)
+        with _memory_lock:
+            _memory[key] = text
+
+
+def load_pdf_text(pdf_path: str, sha1: str = None) -> str:
+    """
+    Text của PDF, ưu tiên lấy từ cache. sha1: hash nội dung PDF nếu đã biết
+    (vd catalog vừa kiểm tra xong) -> khỏi đọc file để tính lại.
+    """
+    return PAGE_SEPARATOR.join(stream_pdf_text(pdf_path, sha1))
+
+
+def _write_cache(path: str, text: str):
+    # preloader và UI thread có thể cùng trích 1 PDF -> mỗi lần ghi 1 file tạm riêng
+    tmp = None
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                   dir=os.path.dirname(path))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except OSError as e:
+        print("Không ghi được cache text PDF:", e)
+        if tmp is not None and os.path.exists(tmp):
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
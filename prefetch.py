@@ -0,0 +1,98 @@
+# prefetch.py
+"""
+Lấy trước câu mẫu + gợi ý (ai_teacher.get_word_hint) cho các từ sắp hỏi.
+
+Quiz gọi prefetch(words) mỗi khi sang câu mới với từ đang hỏi và K từ kế
+tiếp trong lịch ôn (scheduler.peek). Khi người học trả lời sai và bị đưa
+sang màn đặt câu, câu mẫu thường đã có sẵn -> hiện ngay, không phải chờ API.
+
+- Chạy trong ThreadPoolExecutor nhỏ, tối đa max_pending từ đang chờ cùng lúc
+  (quá thì bỏ qua, lần sau prefetch lại).
+- Kết quả giữ trong LRU ở RAM; ai_teacher còn cache ra đĩa nên mở lại app
+  vẫn dùng được.
+- Lỗi (mất mạng, thiếu key...) thì tạm không thử lại từ đó trong RETRY_AFTER giây.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = 2
+MAX_PENDING = 8
+MEMORY_ITEMS = 200
+RETRY_AFTER = 60.0
+
+
+def _default_fetch(word: str) -> dict:
+    from ai_teacher import get_word_hint
+
+    return get_word_hint(word)
+
+
+class HintPrefetcher:
+    def __init__(
+        self,
+        fetch_fn=None,
+        max_workers: int = MAX_WORKERS,
+        max_pending: int = MAX_PENDING,
+        memory_items: int = MEMORY_ITEMS,
+    ):
+        self.fetch_fn = fetch_fn or _default_fetch
+        self.max_pending = max_pending
+        self.memory_items = memory_items
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._hints = OrderedDict()   # word -> hint
+        self._pending = set()
+        self._failed = {}             # word -> thời điểm lỗi gần nhất
+        self._closed = False
+
+    def get(self, word: str):
+        """Hint đã lấy sẵn cho word, None nếu chưa có."""
+        with self._lock:
+            hint = self._hints.get(word)
+            if hint is not None:
+                self._hints.move_to_end(word)
+            return hint
+
+    def is_pending(self, word: str) -> bool:
+        with self._lock:
+            return word in self._pending
+
+    def prefetch(self, words):
+        """Xếp hàng lấy hint cho các từ (theo thứ tự ưu tiên), bỏ qua từ đã có / đang lấy."""
+        now = time.time()
+        with self._lock:
+            if self._closed:
+                return
+            for word in words:
+                if not word or word in self._hints or word in self._pending:
+                    continue
+                if now - self._failed.get(word, 0.0) < RETRY_AFTER:
+                    continue
+                if len(self._pending) >= self.max_pending:
+                    break
+                self._pending.add(word)
+                self._pool.submit(self._fetch, word)
+
+    def _fetch(self, word: str):
+        try:
+            hint = self.fetch_fn(word)
+        except Exception as e:
+            print("Lỗi lấy gợi ý cho từ:", word, e)
+            with self._lock:
+                self._pending.discard(word)
+                self._failed[word] = time.time()
+            return
+        with self._lock:
+            self._pending.discard(word)
+            self._failed.pop(word, None)
+            self._hints[word] = hint
+            self._hints.move_to_end(word)
+            while len(self._hints) > self.memory_items:
+                self._hints.popitem(last=False)
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,271 @@
+# pregrade.py
+"""
+Chấm sơ bộ câu ví dụ ngay trên máy, trước khi gọi AI (ai_teacher).
+
+Chỉ loại những câu SAI RÕ RÀNG, trả kết quả ngay, không tốn request:
+- câu rỗng / quá ngắn / chỉ chép lại đúng từ cần dùng
+- câu viết bằng tiếng Việt
+- câu không chứa từ mục tiêu, kể cả dạng chia: rule -> ruled / rules / ruling,
+  take -> took / taken, study -> studies, và cụm động từ bị tách:
+  'rule out' -> "rule it out", "ruled the idea out"
+- mạo từ (a / an / the) và "be" trong từ mục tiêu là tùy chọn:
+  'the vicious cycle of' khớp "a vicious cycle of", 'be predisposed' khớp
+  "become predisposed to"
+
+target_word nên là phần tiếng Anh GỐC của entry (item["en"], vd 'be + predisposed')
+để accepted_variants thấy được các dấu hiệu tùy chọn; key đã clean cũng dùng được.
+
+Câu qua được các kiểm tra này thì pregrade trả về None -> vẫn gửi AI chấm.
+Luật cố ý dễ dãi: thà để lọt câu sai (AI chấm lại) còn hơn đánh trượt câu đúng.
+Vì vậy câu có từ TRÔNG GIỐNG từ mục tiêu (chung phần đầu dài, vd dạng chia mà
+_lemmas chưa đoán ra) cũng để AI quyết định, không đánh trượt trên máy.
+"""
+import re
+
+from answer_variants import OBJECT_WORDS, PLACEHOLDERS, accepted_variants
+from vocab_store import clean_en
+
+MIN_WORDS = 3
+
+# Số từ tối đa chen giữa 2 phần của cụm: "rule [the possibility] out"
+MAX_GAP = 4
+
+# Tỉ lệ từ có chữ ngoài bảng ASCII vượt ngưỡng này -> coi là câu tiếng Việt
+NON_ENGLISH_RATIO = 0.5
+
+# Từ giữ chỗ trong cụm từ, không cần xuất hiện trong câu
+SKIP_TOKENS = set(OBJECT_WORDS) | PLACEHOLDERS | {
+    "one's", "oneself", "someone's", "somebody's",
+}
+
+# Mạo từ / "be" trong từ mục tiêu: người học hay đổi (the -> a, be -> become / get...)
+OPTIONAL_TOKENS = {"a", "an", "the", "be"}
+
+IRREGULAR_VERBS = {
+    "arise": ("arose", "arisen"), "be": ("am", "is", "are", "was", "were", "been"),
+    "bear": ("bore", "borne", "born"), "become": ("became",), "begin": ("began", "begun"),
+    "bend": ("bent",), "bind": ("bound",), "bite": ("bit", "bitten"), "blow": ("blew", "blown"),
+    "break": ("broke", "broken"), "bring": ("brought",), "build": ("built",),
+    "buy": ("bought",), "catch": ("caught",), "choose": ("chose", "chosen"),
+    "come": ("came",), "deal": ("dealt",), "dig": ("dug",), "do": ("did", "done", "does"),
+    "draw": ("drew", "drawn"), "drink": ("drank", "drunk"), "drive": ("drove", "driven"),
+    "eat": ("ate", "eaten"), "fall": ("fell", "fallen"), "feed": ("fed",),
+    "feel": ("felt",), "fight": ("fought",), "find": ("found",), "fly": ("flew", "flown"),
+    "forbid": ("forbade", "forbidden"), "forget": ("forgot", "forgotten"),
+    "forgive": ("forgave", "forgiven"), "freeze": ("froze", "frozen"),
+    "get": ("got", "gotten"), "give": ("gave", "given"), "go": ("went", "gone", "goes"),
+    "grow": ("grew", "grown"), "hang": ("hung",), "have": ("had", "has"),
+    "hear": ("heard",), "hide": ("hid", "hidden"), "hold": ("held",),
+    "keep": ("kept",), "know": ("knew", "known"), "lay": ("laid",), "lead": ("led",),
+    "lean": ("leant",), "leave": ("left",), "lend": ("lent",), "lie": ("lay", "lain"),
+    "lose": ("lost",), "make": ("made",), "mean": ("meant",), "meet": ("met",),
+    "mislead": ("misled",), "overcome": ("overcame",), "overtake": ("overtook", "overtaken"),
+    "pay": ("paid",), "ride": ("rode", "ridden"), "ring": ("rang", "rung"),
+    "rise": ("rose", "risen"), "run": ("ran",), "say": ("said",), "see": ("saw", "seen"),
+    "seek": ("sought",), "sell": ("sold",), "send": ("sent",), "shake": ("shook", "shaken"),
+    "shine": ("shone",), "shoot": ("shot",), "show": ("showed", "shown"),
+    "shrink": ("shrank", "shrunk"), "sing": ("sang", "sung"), "sink": ("sank", "sunk"),
+    "sit": ("sat",), "sleep": ("slept",), "slide": ("slid",), "speak": ("spoke", "spoken"),
+    "spend": ("spent",), "spin": ("spun",), "spring": ("sprang", "sprung"),
+    "stand": ("stood",), "steal": ("stole", "stolen"), "stick": ("stuck",),
+    "sting": ("stung",), "strike": ("struck", "stricken"), "strive": ("strove", "striven"),
+    "swear": ("swore", "sworn"), "sweep": ("swept",), "swim": ("swam", "swum"),
+    "swing": ("swung",), "take": ("took", "taken"), "teach": ("taught",),
+    "tear": ("tore", "torn"), "tell": ("told",), "think": ("thought",),
+    "throw": ("threw", "thrown"), "undergo": ("underwent", "undergone"),
+    "understand": ("understood",), "undertake": ("undertook", "undertaken"),
+    "uphold": ("upheld",), "wake": ("woke", "woken"), "wear": ("wore", "worn"),
+    "weave": ("wove", "woven"), "win": ("won",), "wind": ("wound",),
+    "withdraw": ("withdrew", "withdrawn"), "withhold": ("withheld",),
+    "withstand": ("withstood",), "write": ("wrote", "written"),
+}
+
+IRREGULAR_PLURALS = {
+    "child": ("children",), "man": ("men",), "woman": ("women",), "person": ("people",),
+    "foot": ("feet",), "tooth": ("teeth",), "goose": ("geese",), "mouse": ("mice",),
+    "ox": ("oxen",), "phenomenon": ("phenomena",), "criterion": ("criteria",),
+    "datum": ("data",), "medium": ("media",), "curriculum": ("curricula",),
+    "bacterium": ("bacteria",), "stimulus": ("stimuli",), "nucleus": ("nuclei",),
+    "fungus": ("fungi",), "cactus": ("cacti",), "index": ("indices",),
+    "appendix": ("appendices",), "matrix": ("matrices",), "vertex": ("vertices",),
+    "knife": ("knives",), "life": ("lives",), "wife": ("wives",), "leaf": ("leaves",),
+    "half": ("halves",), "shelf": ("shelves",), "thief": ("thieves",),
+    "wolf": ("wolves",), "calf": ("calves",),
+}
+
+# Phần đầu chung tối thiểu để coi 1 từ trong câu là "trông giống" từ mục tiêu
+SIMILAR_MIN_PREFIX = 3
+SIMILAR_SLACK = 2    # được lệch bấy nhiêu ký tự cuối (vd lie / lying, happy / happier)
+
+# dạng chia / số nhiều -> nguyên mẫu
+_IRREGULAR_BASE = {}
+for _table in (IRREGULAR_VERBS, IRREGULAR_PLURALS):
+    for _base, _forms in _table.items():
+        for _form in _forms:
+            _IRREGULAR_BASE.setdefault(_form, set()).add(_base)
+
+_WORD_RE = re.compile(r"[^\W\d_]+(?:['’-][^\W\d_]+)*")
+
+
+def tokenize(s: str) -> list:
+    return [w.replace("’", "'") for w in _WORD_RE.findall((s or "").lower())]
+
+
+def _lemmas(word: str) -> set:
+    """
+    Các nguyên mẫu có thể có của word (đoán thô, không cần từ điển):
+    studies -> study, ruled -> rule/rul, compelled -> compel, taken -> take...
+    Từ mục tiêu và từ trong câu khớp nhau nếu 2 tập này giao nhau.
+    """
+    result = {word}
+    result |= _IRREGULAR_BASE.get(word, set())
+
+    def add_stem(stem):
+        if len(stem) < 3:
+            return
+        result.add(stem)
+        result.add(stem + "e")
+        if len(stem) > 3 and stem[-1] == stem[-2] and stem[-1] not in "aeiou":
+            result.add(stem[:-1])    # stopped -> stop, compelled -> compel
+
+    if word.endswith("ies") or word.endswith("ied"):
+        add_stem(word[:-3] + "y")
+    if word.endswith("ier"):
+        add_stem(word[:-3] + "y")          # happier -> happy
+    if word.endswith("iest"):
+        add_stem(word[:-4] + "y")          # happiest -> happy
+    if word.endswith("ying") and len(word) >= 5:
+        result.add(word[:-4] + "ie")       # lying -> lie, dying -> die
+    for suffix in ("cked", "cking"):
+        if word.endswith(suffix):
+            add_stem(word[: -len(suffix)] + "c")    # panicked -> panic
+    if word.endswith("ses"):
+        add_stem(word[:-3] + "sis")        # analyses -> analysis, crises -> crisis
+    for suffix in ("ing", "ed", "es", "er", "est", "s", "d"):
+        if word.endswith(suffix):
+            add_stem(word[: -len(suffix)])
+    return result
+
+
+def _find_in_order(parts: list, sentence_lemmas: list) -> bool:
+    """Các phần của cụm xuất hiện đúng thứ tự, mỗi khoảng cách <= MAX_GAP từ."""
+
+    def match(part_index, start, first):
+        if part_index == len(parts):
+            return True
+        end = len(sentence_lemmas) if first else min(len(sentence_lemmas), start + MAX_GAP + 1)
+        for pos in range(start, end):
+            if parts[part_index] & sentence_lemmas[pos] and match(part_index + 1, pos + 1, False):
+                return True
+        return False
+
+    return match(0, 0, True)
+
+
+def _required_words(phrase: str) -> list:
+    """Các từ của cụm bắt buộc phải có trong câu (bỏ placeholder, mạo từ, "be")."""
+    words = [w for w in tokenize(phrase) if w not in SKIP_TOKENS]
+    # cụm chỉ gồm mạo từ / "be" (vd 'be') -> vẫn phải có chính nó
+    return [w for w in words if w not in OPTIONAL_TOKENS] or words
+
+
+def contains_target(target_word: str, sentence: str) -> bool:
+    """Câu có dùng từ / cụm từ mục tiêu (kể cả dạng chia, cụm bị tách) hay không."""
+    sentence_lemmas = [_lemmas(w) for w in tokenize(sentence)]
+    for variant in accepted_variants(target_word) or {target_word}:
+        parts = [_lemmas(w) for w in _required_words(variant)]
+        if parts and _find_in_order(parts, sentence_lemmas):
+            return True
+    return False
+
+
+def _common_prefix(a: str, b: str) -> int:
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+def looks_like_target(target_word: str, sentence: str) -> bool:
+    """
+    Không khớp nguyên mẫu nào, nhưng mỗi từ bắt buộc của 1 biến thể đều có từ
+    trong câu chung phần đầu dài với nó (vd dạng chia bất quy tắc chưa có trong
+    bảng) -> có thể đúng, để AI chấm.
+    """
+    tokens = tokenize(sentence)
+    for variant in accepted_variants(target_word) or {target_word}:
+        words = _required_words(variant)
+        if words and all(
+            any(
+                _common_prefix(word, token) >= max(SIMILAR_MIN_PREFIX, len(word) - SIMILAR_SLACK)
+                for token in tokens
+            )
+            for word in words
+        ):
+            return True
+    return False
+
+
+def _fail(feedback_vi: str) -> dict:
+    return {
+        "is_correct_usage": False,
+        "score": 0.0,
+        "feedback_vi": feedback_vi,
+        "suggested_sentence": "",
+        "offline": True,     # chấm trên máy, không qua AI
+    }
+
+
+def pregrade(target_word: str, sentence: str):
+    """
+    Kết quả (cùng dạng với ai_teacher.check_sentence) nếu câu sai rõ ràng,
+    None nếu cần AI chấm.
+    """
+    words = tokenize(sentence)
+    if not words:
+        return _fail("Bạn chưa viết câu tiếng Anh nào.")
+
+    non_english = sum(1 for w in words if not w.isascii())
+    if non_english / len(words) > NON_ENGLISH_RATIO:
+        return _fail("Câu của bạn có vẻ đang viết bằng tiếng Việt. Hãy đặt câu bằng tiếng Anh.")
+
+    shown_word = clean_en(target_word)
+    if not contains_target(target_word, sentence):
+        if looks_like_target(target_word, sentence):
+            return None    # chỉ AI được đánh trượt câu trông như có từ mục tiêu
+        return _fail(
+            f"Câu của bạn chưa dùng \"{shown_word}\" (hoặc dạng chia của nó). "
+            f"Hãy đặt lại câu có chứa từ này."
+        )
+
+    target_words = min(
+        (_required_words(v) for v in accepted_variants(target_word) or {target_word}), key=len
+    )
+    if len(words) < MIN_WORDS or len(words) <= len(target_words):
+        return _fail(
+            f"Câu quá ngắn, mới chỉ có \"{sentence.strip()}\". "
+            f"Hãy viết thành 1 câu hoàn chỉnh (có chủ ngữ, động từ) dùng \"{shown_word}\"."
+        )
+    return None
+
+
+def fallback_grade(target_word: str, sentence: str) -> dict:
+    """
+    Kết quả tạm khi không gọi được AI (mất mạng, API lỗi liên tiếp...).
+    Chỉ dùng cho câu đã qua pregrade. KHÔNG tính là đạt: mất mạng không được
+    thành cách thoát lượt đặt câu bị phạt; người học chấm lại khi AI phản hồi.
+    """
+    return {
+        "is_correct_usage": False,
+        "score": 0.0,
+        "feedback_vi": (
+            "AI chấm câu tạm thời không phản hồi nên câu CHƯA được chấm. "
+            f"Kiểm tra sơ bộ trên máy: câu có dùng \"{clean_en(target_word)}\" và đủ dài. "
+            "Hãy bấm chấm lại sau ít phút."
+        ),
+        "suggested_sentence": "",
+        "offline": True,
+        "fallback": True,    # kết quả tạm, không cache, không tính đúng / sai
+    }
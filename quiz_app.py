@@ -1,11 +1,22 @@
 # quiz_app.py
 import tkinter as tk
 from tkinter import messagebox
-import random
-import re  # <-- để xử lý bỏ (N), (adj)...
-from vocab_store import VocabStore
+import os
+import threading
+from vocab_store import VocabStore, clean_en
+from answer_variants import accepted_answers
+from scheduler import Sm2Scheduler
+from spell_index import SymDeleteIndex, edit_distance
+from grading import GradingExecutor
+from prefetch import HintPrefetcher
+from metrics_panel import MetricsPanel
 
 NUM_CORRECT_TO_EXIT = 40  # số câu đúng cần để thoát
+PREFETCH_AHEAD = 3        # lấy trước câu mẫu cho bao nhiêu từ sắp hỏi
+HINT_POLL_MS = 250        # màn đặt câu: chờ câu mẫu đang tải
+
+# Bật công cụ debug (F12: bảng số liệu chấm câu); người học bình thường không có
+DEBUG = bool(os.getenv("vocab_teacher_debug"))
 
 
 class VocabGuardApp:
@@ -30,7 +41,7 @@ class VocabGuardApp:
         self.root.bind("<FocusOut>", self.on_focus_out)
 
         # store quản lý vocab.json
-        self.store = VocabStore()
+        self.store = VocabStore(journal=True)
 
         if self.store.count() == 0:
             messagebox.showerror("Lỗi", "Không tìm thấy hoặc không có dữ liệu trong vocab.json")
@@ -40,20 +51,20 @@ class VocabGuardApp:
         # ---------- STATE CHUNG CHO QUIZ ----------
         self.correct_count = 0
         self.total_count = 0              # NEW: tổng số câu đã trả lời
-        self.current_index = None
-        self.last_index = None  # để tránh lặp lại đúng câu trước đó
-
-        # ---------- STATE CHO CƠ CHẾ DUOLINGO STYLE ----------
-        vocab = self.store.all()
-        self.total_words = len(vocab)         # NEW: tổng số từ hiện có
+        self.current_id = None   # id (trong store) của từ đang hỏi
+        self.last_id = None      # để tránh lặp lại đúng câu trước đó
 
-        # NEW: danh sách index sẽ được hỏi trong "vòng hiện tại"
-        # (ban đầu là tất cả từ, sau này sẽ thay bằng các từ sai, v.v.)
-        self.remaining_indices = list(range(self.total_words))
-        random.shuffle(self.remaining_indices)
+        # ---------- LỊCH ÔN TẬP (SM-2) ----------
+        # Trạng thái từng từ (hạn ôn, ease...) lưu cạnh file vocab,
+        # giữ qua các lần mở app. Từ sai sẽ được hỏi lại sau ít phút,
+        # từ đúng được giãn dần sang các ngày sau.
+        # Mỗi thẻ gắn với id của entry nên thêm/sửa/xóa từ khác không ảnh hưởng.
+        # write_behind: lịch được ghi ở thread nền, không ghi file sau mỗi câu trên UI thread
+        self.scheduler = Sm2Scheduler(self.store.filename + ".srs.json", write_behind=True)
+        self._sync_cards()
 
-        # NEW: lưu lại các index mà người dùng đã trả lời sai ít nhất 1 lần
-        self.wrong_indices = []
+        # Thêm/sửa/xóa từ -> chỉ cập nhật đúng thẻ, dòng Listbox, index chính tả
+        self.store.subscribe(self._on_vocab_change)
 
         # NEW: dùng cho chế độ "sai là bị bắt đặt câu ngay"
         # nếu != None nghĩa là đang bị ép practice từ này
@@ -62,6 +73,25 @@ class VocabGuardApp:
 
         # ---------- QUẢN LÝ CỬA SỔ TỪ VỰNG ----------
         self.vocab_frame = None
+
+        # ---------- INDEX CHÍNH TẢ (gõ gần đúng) ----------
+        # build ở thread nền; trong lúc build các thay đổi vocab được xếp hàng
+        self.spell_index = None
+        self._spell_lock = threading.Lock()
+        self._spell_pending = []
+        threading.Thread(target=self._build_spell_index, daemon=True).start()
+
+        # ---------- CHẤM CÂU BẰNG AI (chạy nền, không làm đứng UI) ----------
+        self.grader = GradingExecutor(self.root)
+        # câu mẫu + gợi ý cho các từ sắp hỏi, để màn đặt câu có sẵn ví dụ
+        self.prefetcher = HintPrefetcher()
+        self.root.bind("<Destroy>", self._on_destroy, add="+")
+
+        # F12: bảng số liệu chấm câu (thời gian, token, cache...) để debug,
+        # chỉ bật khi đặt biến môi trường vocab_teacher_debug
+        self.metrics_panel = None
+        if DEBUG:
+            self.root.bind("<F12>", self.open_metrics_panel)
         
         # ---------- XÂY UI + BẮT ĐẦU QUIZ ----------
         self.build_ui()
@@ -152,37 +182,43 @@ class VocabGuardApp:
         if self.on_request_switch is not None:
             self.on_request_switch()
 
-    def _setup_practice_for_current_index(self):
-        vocab = self.store.all()
-        if self.current_index is None or not vocab:
+    def _current_item(self):
+        """Entry đang hỏi, None nếu chưa hỏi hoặc vừa bị xóa."""
+        if self.current_id is None:
+            return None
+        return self.store.get(self.current_id)
+
+    def _setup_practice_for_current_word(self):
+        item = self._current_item()
+        if item is None:
             return
-        word_raw = vocab[self.current_index]["en"]
-        self.current_target_word = self.clean_en(word_raw)
+        # "key" = clean_en(en) đã được store tính sẵn -> hiển thị / lấy câu mẫu;
+        # chấm câu dùng en gốc để pregrade còn thấy phần tùy chọn ('be + ...')
+        self.current_target_word = item["key"]
+        self.current_target_en = item["en"]
         # nếu có label hiển thị từ trong practice_frame thì update ở show_practice_frame
         
     def prepare_practice(self):
         """
         Người dùng tự bấm nút 'Đặt câu ví dụ' (practice tự nguyện).
         """
-        vocab = self.store.all()
-        if self.current_index is None or not vocab:
+        if self._current_item() is None:
             return
 
         self.practice_mode = "free"
-        self._setup_practice_for_current_index()
+        self._setup_practice_for_current_word()
         self.show_practice_frame()
 
     def start_forced_practice(self):
         """
         Bị ép practice sau khi trả lời SAI trong quiz.
-        Dùng CHÍNH self.current_index (từ vừa sai).
+        Dùng CHÍNH self.current_id (từ vừa sai).
         """
-        vocab = self.store.all()
-        if self.current_index is None or not vocab:
+        if self._current_item() is None:
             return
 
         self.practice_mode = "forced_from_quiz"
-        self._setup_practice_for_current_index()
+        self._setup_practice_for_current_word()
         self.show_practice_frame()
 
     def update_progress_label(self):
@@ -217,6 +253,13 @@ class VocabGuardApp:
             )
             self.practice_word_label.pack(pady=10)
 
+            # câu mẫu / gợi ý lấy trước (prefetch) cho từ này
+            self.practice_hint_label = tk.Label(
+                self.practice_frame, text="", font=("Arial", 12, "italic"),
+                fg="dark green", wraplength=900, justify="left"
+            )
+            self.practice_hint_label.pack(pady=5)
+
             tk.Label(
                 self.practice_frame,
                 text="Hãy đặt 1 câu tiếng Anh sử dụng từ trên:",
@@ -235,10 +278,11 @@ class VocabGuardApp:
             self.result_box.config(state="disabled")
             self.result_box.pack(pady=10)
 
-            tk.Button(
+            self.grade_button = tk.Button(
                 self.practice_frame, text="Chấm câu",
                 font=("Arial", 14), command=self.grade_sentence
-            ).pack(pady=5)
+            )
+            self.grade_button.pack(pady=5)
 
             tk.Button(
                 self.practice_frame, text="Quay về bài học",
@@ -250,11 +294,14 @@ class VocabGuardApp:
         self.practice_word_label.config(
             text=f"Từ cần dùng: {self.current_target_word}"
         )
+        self._show_practice_hint(self.current_target_word)
 
         # Xóa input cũ
         self.practice_input.delete("1.0", "end")
 
-        # Xóa feedback cũ
+        # Xóa feedback cũ (và bỏ kết quả chấm của từ trước nếu còn đang chờ)
+        self.grader.cancel("practice")
+        self.grade_button.config(state="normal")
         self.result_box.config(state="normal")
         self.result_box.delete("1.0", "end")
         self.result_box.config(state="disabled")
@@ -267,12 +314,11 @@ class VocabGuardApp:
 
     #----------- AI Window ----------
     def open_practice_window(self):
-        vocab = self.store.all()
-        if self.current_index is None:
+        item = self._current_item()
+        if item is None:
             return
 
-        word_raw = vocab[self.current_index]["en"]
-        target_word = self.clean_en(word_raw)
+        target_word = item["key"]
 
         win = tk.Toplevel(self.root)
         win.title(f"Đặt câu với: {target_word}")
@@ -291,71 +337,118 @@ class VocabGuardApp:
         result_box.pack(pady=10)
 
         def submit_sentence():
-            from ai_teacher import check_sentence
-
             user_sentence = input_box.get("1.0", "end").strip()
             if not user_sentence:
-                result_box.config(text="Bạn chưa nhập câu!", fg="red")
+                self._set_result_text(result_box, "Bạn chưa nhập câu!")
                 return
+            self._start_grading(item["en"], user_sentence, result_box, submit_button, tag=win)
 
-            try:
-                result = check_sentence(target_word, user_sentence)
-            except Exception as e:
-                result_box.config(text=f"Lỗi API: {e}", fg="red")
-                return
+        def close_window():
+            self.grader.cancel(win)
+            win.destroy()
 
-            feedback = (
-                f"Đúng ngữ cảnh: {'✔' if result['is_correct_usage'] else '❌'}\n"
-                f"Điểm: {result['score']:.2f}\n\n"
-                f"Nhận xét:\n{result['feedback_vi']}\n\n"
-                f"Gợi ý tốt hơn:\n{result['suggested_sentence']}"
-            )
+        submit_button = tk.Button(win, text="Chấm câu", font=("Arial", 12), command=submit_sentence)
+        submit_button.pack(pady=5)
 
-            result_box.config(state="normal")
-            result_box.delete("1.0", "end")
-            result_box.insert("1.0", feedback)
-            result_box.config(state="disabled")
+        tk.Button(win, text="Đóng", font=("Arial", 12), command=close_window).pack(pady=5)
 
-        tk.Button(win, text="Chấm câu", font=("Arial", 12), command=submit_sentence).pack(pady=5)
+    # ---------- Chấm câu (gọi AI ở thread nền) ----------
 
-        tk.Button(win, text="Đóng", font=("Arial", 12), command=win.destroy).pack(pady=5)
+    @staticmethod
+    def _set_result_text(box, text: str):
+        box.config(state="normal")
+        box.delete("1.0", "end")
+        box.insert("1.0", text)
+        box.config(state="disabled")
 
-    def grade_sentence(self):
-        from ai_teacher import check_sentence
+    @staticmethod
+    def _format_grade(result: dict) -> str:
+        if result.get("fallback"):
+            # AI không phản hồi -> chưa có điểm, chỉ có lời nhắn chấm lại
+            return f"⏳ Chưa chấm được câu này.\n\n{result.get('feedback_vi', '')}"
+        is_correct = bool(result.get("is_correct_usage", False))
+        text = (
+            f"Đúng ngữ cảnh: {'✔' if is_correct else '❌'}\n"
+            f"Điểm: {result.get('score', 0.0):.2f}\n\n"
+            f"Nhận xét:\n{result.get('feedback_vi', '')}"
+        )
+        # chấm sơ bộ trên máy (pregrade) không có câu gợi ý
+        if result.get("suggested_sentence"):
+            text += f"\n\nGợi ý tốt hơn:\n{result['suggested_sentence']}"
+        return text
 
-        user_sentence = self.practice_input.get("1.0", "end").strip()
-        if not user_sentence:
-            self.result_box.config(state="normal")
-            self.result_box.delete("1.0", "end")
-            self.result_box.insert("1.0", "Bạn chưa nhập câu!")
-            self.result_box.config(state="disabled")
+    def _stream_renderer(self, box):
+        """
+        on_event cho chấm stream: hiện đúng/sai + điểm ngay khi model trả về,
+        rồi nối dần từng đoạn nhận xét / gợi ý vào box.
+        """
+        headers = {
+            "feedback_vi": "Nhận xét:\n",
+            "suggested_sentence": "\n\nGợi ý tốt hơn:\n",
+        }
+        shown = set()
+
+        def append(text):
+            box.config(state="normal")
+            box.insert("end", text)
+            box.config(state="disabled")
+
+        def on_event(kind, key, value):
+            if not shown:
+                self._set_result_text(box, "")   # bỏ dòng "Đang chấm..."
+            if kind == "value" and key == "is_correct_usage":
+                append(f"Đúng ngữ cảnh: {'✔' if value else '❌'}\n")
+            elif kind == "value" and key == "score" and isinstance(value, (int, float)):
+                append(f"Điểm: {value:.2f}\n\n")
+            elif kind == "delta" and key in headers:
+                if key not in shown:
+                    append(headers[key])
+                append(value)
+            shown.add(key)
+
+        return on_event
+
+    def _start_grading(self, target_word, sentence, box, button, tag, on_result=None):
+        """
+        Gửi câu đi chấm ở nền (stream): hiện trạng thái chờ trong box, khóa nút
+        chấm tới khi có kết quả; kết quả hiện dần trong lúc model còn đang viết.
+        on_result(result) chạy trên thread Tk sau khi hiện kết quả đầy đủ.
+        """
+        def done(result):
+            button.config(state="normal")
+            self._set_result_text(box, self._format_grade(result))
+            if on_result is not None:
+                on_result(result)
+
+        def failed(e):
+            button.config(state="normal")
+            self._set_result_text(box, f"Lỗi API: {e}")
+
+        job = self.grader.submit_stream(
+            target_word, sentence, self._stream_renderer(box), done, failed, tag=tag
+        )
+        if job is None:
+            self._set_result_text(box, "Đang chấm nhiều câu cùng lúc, hãy đợi một chút rồi thử lại.")
             return
+        button.config(state="disabled")
+        self._set_result_text(box, "⏳ Đang chấm câu...")
 
-        try:
-            result = check_sentence(self.current_target_word, user_sentence)
-        except Exception as e:
-            self.result_box.config(state="normal")
-            self.result_box.delete("1.0", "end")
-            self.result_box.insert("1.0", f"Lỗi API: {e}")
-            self.result_box.config(state="disabled")
+    def grade_sentence(self):
+        user_sentence = self.practice_input.get("1.0", "end").strip()
+        if not user_sentence:
+            self._set_result_text(self.result_box, "Bạn chưa nhập câu!")
             return
 
-        is_correct = bool(result.get("is_correct_usage", False))
-        score = result.get("score", 0.0)
-        feedback_vi = result.get("feedback_vi", "")
-        suggested = result.get("suggested_sentence", "")
-
-        feedback = (
-            f"Đúng ngữ cảnh: {'✔' if is_correct else '❌'}\n"
-            f"Điểm: {score:.2f}\n\n"
-            f"Nhận xét:\n{feedback_vi}\n\n"
-            f"Gợi ý tốt hơn:\n{suggested}"
+        self._start_grading(
+            self.current_target_en, user_sentence,
+            self.result_box, self.grade_button,
+            tag="practice", on_result=self._after_graded,
         )
 
-        self.result_box.config(state="normal")
-        self.result_box.delete("1.0", "end")
-        self.result_box.insert("1.0", feedback)
-        self.result_box.config(state="disabled")
+    def _after_graded(self, result: dict):
+        # kết quả tạm lúc AI không phản hồi (fallback) không bao giờ đạt
+        # -> bị phạt đặt câu thì vẫn ở lại, chờ chấm lại
+        is_correct = bool(result.get("is_correct_usage", False)) and not result.get("fallback")
 
         # Nếu đây là câu bị phạt và AI chấm ĐÚNG → quay lại quiz + sang câu mới
         if is_correct and getattr(self, "practice_mode", None) == "forced_from_quiz":
@@ -370,7 +463,25 @@ class VocabGuardApp:
             # free practice hoặc vẫn sai -> ở lại màn practice
             pass
 
+    def _on_destroy(self, event):
+        # <Destroy> của Toplevel cũng bắn cho từng widget con -> chỉ xử lý khi chính root đóng
+        if event.widget is self.root:
+            self.grader.shutdown()
+            self.prefetcher.shutdown()
+            try:
+                self.scheduler.close()   # ghi nốt lịch ôn tập còn chờ
+            except OSError as e:
+                print("Lỗi lưu lịch ôn tập:", e)
+
+    def open_metrics_panel(self, event=None):
+        if self.metrics_panel is not None and self.metrics_panel.win.winfo_exists():
+            self.metrics_panel.win.lift()
+            return
+        self.metrics_panel = MetricsPanel(self.root)
+
     def return_to_quiz(self):
+        # rời màn practice -> kết quả chấm còn đang chờ không còn cần nữa
+        self.grader.cancel("practice")
         self._show_only(self.main_frame)
 
     # ---------- Chặn/giảm thiểu phím tắt ----------
@@ -379,12 +490,11 @@ class VocabGuardApp:
         self.root.attributes("-topmost", False)
         self.disable_force_focus = True
 
-        vocab = self.store.all()
-        if self.current_index is None:
+        item = self._current_item()
+        if item is None:
             return
 
-        word_raw = vocab[self.current_index]["en"]
-        target_word = self.clean_en(word_raw)
+        target_word = item["key"]
 
         win = tk.Toplevel(self.root)
         win.title(f"Đặt câu với: {target_word}")
@@ -407,39 +517,23 @@ class VocabGuardApp:
 
         # Submit
         def submit_sentence():
-            from ai_teacher import check_sentence
-
             user_sentence = input_box.get("1.0", "end").strip()
             if not user_sentence:
-                result_box.config(state="normal")
-                return
-
-            try:
-                result = check_sentence(target_word, user_sentence)
-            except Exception as e:
-                result_box.config(text=f"Lỗi API: {e}", fg="red")
+                self._set_result_text(result_box, "Bạn chưa nhập câu!")
                 return
-
-            feedback = (
-                f"Đúng ngữ cảnh: {'✔' if result['is_correct_usage'] else '❌'}\n"
-                f"Điểm: {result['score']:.2f}\n\n"
-                f"Nhận xét:\n{result['feedback_vi']}\n\n"
-                f"Gợi ý tốt hơn:\n{result['suggested_sentence']}"
-            )
-            result_box.config(state="normal")
-            result_box.delete("1.0", "end")
-            result_box.insert("1.0", feedback)
-            result_box.config(state="disabled")
+            self._start_grading(item["en"], user_sentence, result_box, submit_button, tag=win)
 
         def close_window():
+            self.grader.cancel(win)
             win.destroy()
             # BẬT LẠI KHÓA MÀN HÌNH
             self.root.attributes("-topmost", True)
             self.disable_force_focus = False
             self.force_focus()  # gọi lại focus nếu bạn muốn
 
-        tk.Button(win, text="Chấm câu", font=("Arial", 12),
-                command=submit_sentence).pack(pady=5)
+        submit_button = tk.Button(win, text="Chấm câu", font=("Arial", 12),
+                command=submit_sentence)
+        submit_button.pack(pady=5)
 
         tk.Button(win, text="Đóng", font=("Arial", 12),
                 command=close_window).pack(pady=5)
@@ -468,40 +562,8 @@ class VocabGuardApp:
 
 
     def clean_en(self, s: str) -> str:
-        """
-        Chuẩn hóa phần tiếng Anh:
-        - Bỏ các tag loại từ trong ngoặc: (N), (Adj), (Verb), (phrV), (idiom)...
-        ở BẤT KỲ vị trí nào trong chuỗi.
-        - Bỏ dấu '+' dùng làm ký hiệu cấu trúc.
-        - Đưa về lowercase + gọn khoảng trắng.
-        Ví dụ:
-            'apple (N)'                  -> 'apple'
-            'go up (phrV)'               -> 'go up'
-            'rule out (Verb) + something' -> 'rule out something'
-            'break down (phrv) (N)'      -> 'break down'
-        """
-        if not s:
-            return ""
-
-        # Chuẩn trước
-        s = s.strip()
-
-        # 1) Bỏ các dấu '+' dùng để mô tả cấu trúc: "verb + object"...
-        #    'rule out (Verb) + something' -> 'rule out (Verb) something'
-        s = re.sub(r"\s*\+\s*", " ", s)
-
-        # 2) Bỏ các (tag) loại từ ở BẤT KỲ vị trí nào
-        #    Bạn có thể thêm/bớt tag trong nhóm dưới đây tùy bộ từ vựng.
-        tag_pattern = r"\s*\((?:n|noun|v|verb|adj|adjective|adv|adverb|phrv|phr\s*verb|idiom|prep|preposition)\)\s*"
-        s = re.sub(tag_pattern, " ", s, flags=re.IGNORECASE)
-
-        # 3) Phòng hờ: nếu vẫn còn ngoặc ở CUỐI chuỗi thì xóa nốt
-        #    (vẫn giữ behavior cũ của bạn)
-        s = re.sub(r"\s*\([^)]*\)\s*$", "", s)
-
-        # 4) Gọn khoảng trắng + lowercase
-        s = re.sub(r"\s+", " ", s)
-        return s.strip().lower()
+        """Chuẩn hóa phần tiếng Anh, xem vocab_store.clean_en."""
+        return clean_en(s)
 
     def normalize_answer(self, s: str) -> str:
         """
@@ -517,45 +579,39 @@ class VocabGuardApp:
             messagebox.showerror("Lỗi", "Không còn từ vựng nào. Hãy thêm từ vựng trước.")
             return
 
-        # Nếu vocab thay đổi (thêm/xóa từ), reset lại tracking
-        if self.total_words != len(vocab):
-            self.total_words = len(vocab)
-            self.remaining_indices = list(range(self.total_words))
-            random.shuffle(self.remaining_indices)
-            self.wrong_indices = []
-
         # Nếu đang có từ phải practice ép, không được nhảy câu mới
         if self.pending_practice_index is not None:
             return
 
-        # Hết từ trong vòng hiện tại
-        if not self.remaining_indices:
-            if self.wrong_indices:
-                # chuyển sang vòng ôn lại các từ đã sai
-                self.remaining_indices = self.wrong_indices
-                self.wrong_indices = []
-                random.shuffle(self.remaining_indices)
-                self.info_label.config(text="Đang ôn lại các từ bạn đã sai 🔁")
-            else:
-                # Không còn từ sai nữa -> bắt đầu vòng mới với toàn bộ từ
-                self.remaining_indices = list(range(self.total_words))
-                random.shuffle(self.remaining_indices)
-                self.info_label.config(
-                    text=f"Cần trả lời đúng {NUM_CORRECT_TO_EXIT} câu để mở khóa"
-                )
-
-        if not self.remaining_indices:
+        # Lấy thẻ kế tiếp từ lịch: đến hạn -> từ mới -> ôn trước hạn
+        item = None
+        avoid = self._card_key(self.last_id) if self.last_id is not None else None
+        while item is None:
+            key, state = self.scheduler.next_card(avoid=avoid)
+            if key is None:
+                break
+            item = self.store.get(int(key)) if key.isdigit() else None
+            if item is None:
+                # thẻ của từ đã bị xóa khỏi deck
+                self.scheduler.remove_card(key)
+
+        if item is None:
             self.question_label.config(text="Không còn từ vựng nào để hỏi.")
             return
 
-        # Lấy index kế tiếp
-        idx = self.remaining_indices.pop()
+        if state == "due" and self.scheduler.cards[key]["lapses"]:
+            self.info_label.config(text="Đang ôn lại các từ bạn đã sai 🔁")
+        elif state == "ahead":
+            self.info_label.config(text="Đã ôn hết từ đến hạn, đang ôn trước 📚")
+        else:
+            self.info_label.config(
+                text=f"Cần trả lời đúng {NUM_CORRECT_TO_EXIT} câu để mở khóa"
+            )
 
-        # Giữ lại last_index nếu bạn còn dùng chỗ khác
-        self.current_index = idx
-        self.last_index = idx
+        self.current_id = item["id"]
+        self.last_id = item["id"]
+        self._prefetch_upcoming()
 
-        item = vocab[self.current_index]
         vi = item.get("vi", "")
 
         self.question_label.config(
@@ -570,23 +626,175 @@ class VocabGuardApp:
         self.answer_entry.focus()
         self.feedback_label.config(text="", fg="black")
 
-    def check_answer(self, event=None):
-        vocab = self.store.all()
-        if self.current_index is None or not vocab:
+    # ---------- Câu mẫu lấy trước ----------
+
+    def _prefetch_upcoming(self):
+        """Lấy trước câu mẫu cho từ đang hỏi + PREFETCH_AHEAD từ kế tiếp trong lịch."""
+        words = [self._current_item()["key"]]
+        for key in self.scheduler.peek(PREFETCH_AHEAD + 1):
+            item = self.store.get(int(key)) if key.isdigit() else None
+            if item is not None:
+                words.append(item["key"])
+        self.prefetcher.prefetch(words)
+
+    def _show_practice_hint(self, word: str, tries: int = 0):
+        if getattr(self, "current_target_word", None) != word:
+            return   # đã sang từ khác
+        hint = self.prefetcher.get(word)
+        if hint is None and tries == 0:
+            self.prefetcher.prefetch([word])
+
+        if hint is not None:
+            text = f"Câu mẫu: {hint['example_sentence']}\nGợi ý: {hint['hint_vi']}"
+        elif self.prefetcher.is_pending(word) and tries < 40:
+            text = "⏳ Đang lấy câu mẫu..."
+            self.root.after(HINT_POLL_MS, lambda: self._show_practice_hint(word, tries + 1))
+        else:
+            text = ""
+        self.practice_hint_label.config(text=text)
+
+    # ---------- Lịch ôn tập ----------
+
+    @staticmethod
+    def _card_key(entry_id: int) -> str:
+        return str(entry_id)
+
+    def _sync_cards(self):
+        """
+        Đưa mọi từ vào lịch (thẻ đã có trạng thái thì giữ nguyên).
+        Chỉ chạy lúc mở app; sau đó thêm/xóa từ chỉ thêm/xóa đúng 1 thẻ.
+        """
+        # File lịch cũ dùng key "en\tvi" -> đổi sang id, giữ nguyên tiến độ
+        legacy = [key for key in self.scheduler.cards if not key.isdigit()]
+        if legacy:
+            by_pair = {f"{item['en']}\t{item['vi']}": item["id"] for item in self.store.all()}
+            for key in legacy:
+                entry_id = by_pair.get(key)
+                if entry_id is None:
+                    self.scheduler.remove_card(key)
+                else:
+                    self.scheduler.rename_card(key, self._card_key(entry_id))
+            try:
+                self.scheduler.save()
+            except OSError as e:
+                print("Lỗi lưu lịch ôn tập:", e)
+
+        self.scheduler.add_cards(self._card_key(item["id"]) for item in self.store.all())
+
+    def _review_current(self, correct: bool):
+        if self._current_item() is None:
             return
+        # lưu ở thread nền (write-behind của scheduler)
+        self.scheduler.review(self._card_key(self.current_id), correct)
+
+    # ---------- Theo dõi thay đổi vocab ----------
+
+    def _on_vocab_change(self, change):
+        """Nhận VocabChange từ store, chỉ sửa phần bị ảnh hưởng."""
+        card_key = self._card_key(change.id)
+        if change.kind == "added":
+            self.scheduler.add_card(card_key)
+            self._patch_spell_index(new_key=change.entry["key"])
+        elif change.kind == "updated":
+            self._patch_spell_index(old_key=change.old["key"], new_key=change.entry["key"])
+        elif change.kind == "removed":
+            self.scheduler.remove_card(card_key)
+            self._patch_spell_index(old_key=change.entry["key"])
+
+        if self.vocab_frame is not None:
+            self._patch_vocab_listbox(change)
+
+    # ---------- Gõ gần đúng / nhầm từ ----------
+
+    def _build_spell_index(self):
+        index = SymDeleteIndex()
+        for item in self.store.all():
+            index.add(item["key"])
+        with self._spell_lock:
+            for old_key, new_key in self._spell_pending:
+                if old_key:
+                    index.remove(old_key)
+                if new_key:
+                    index.add(new_key)
+            self._spell_pending = []
+            self.spell_index = index
+
+    def _patch_spell_index(self, old_key=None, new_key=None):
+        with self._spell_lock:
+            if self.spell_index is None:
+                self._spell_pending.append((old_key, new_key))
+                return
+            index = self.spell_index
+        if old_key:
+            index.remove(old_key)
+        if new_key:
+            index.add(new_key)
+
+    @staticmethod
+    def _allowed_typos(answer: str) -> int:
+        # từ ngắn mà sai 1-2 ký tự thì thường đã là từ khác
+        if len(answer) <= 3:
+            return 0
+        if len(answer) <= 6:
+            return 1
+        return 2
+
+    def is_other_deck_word(self, user_answer: str, item: dict) -> bool:
+        """user_answer trùng đúng phần tiếng Anh của 1 entry khác trong deck."""
+        index = self.spell_index
+        if index is not None and user_answer not in index:
+            return False   # không phải từ nào trong deck
+        return any(other["id"] != item["id"] for other in self.store.find(user_answer))
+
+    def near_miss_distance(self, user_answer: str, item: dict):
+        """Số ký tự gõ sai nếu user_answer chỉ lệch chính tả với đáp án, ngược lại None."""
+        best = None
+        for answer in accepted_answers(item):
+            allowed = self._allowed_typos(answer)
+            if not allowed:
+                continue
+            dist = edit_distance(user_answer, answer, allowed)
+            if dist <= allowed and (best is None or dist < best):
+                best = dist
+        return best
+
+    def confused_with(self, user_answer: str, item: dict):
+        """Từ khác trong deck mà câu trả lời giống nhất (tra index, không quét cả deck)."""
+        if self.spell_index is None:
+            # index chưa build xong -> chỉ nhận ra được từ gõ trùng khớp
+            others = [other for other in self.store.find(user_answer) if other["id"] != item["id"]]
+            return others[0] if others else None
+        answers = accepted_answers(item)
+        for term, dist in self.spell_index.lookup(user_answer):
+            if term in answers or dist > self._allowed_typos(term):
+                continue
+            matches = self.store.find(term)
+            if matches:
+                return matches[0]
+        return None
 
-        item = vocab[self.current_index]
+    def check_answer(self, event=None):
+        item = self._current_item()
+        if item is None:
+            return
 
         raw_user_answer = self.answer_entry.get().strip()
         user_answer = self.normalize_answer(self.answer_entry.get())
-        correct_answer = self.normalize_answer(item.get("en", ""))
 
         if not user_answer:
             self.feedback_label.config(text="Bạn chưa nhập gì cả!", fg="red")
             return
 
+        # tập các đáp án chấp nhận được đã tính sẵn -> 1 phép tra set
+        is_correct = user_answer in accepted_answers(item)
+        # gõ đúng 1 từ KHÁC trong deck (effect / affect) là nhầm từ, không phải lỗi chính tả
+        typo_distance = None
+        if not is_correct and not self.is_other_deck_word(user_answer, item):
+            typo_distance = self.near_miss_distance(user_answer, item)
+
         # ================== TRƯỜNG HỢP TRẢ LỜI ĐÚNG ==================
-        if user_answer == correct_answer:
+        if is_correct:
+            self._review_current(True)
             self.correct_count += 1
             self.update_progress_label()
             remaining = NUM_CORRECT_TO_EXIT - self.correct_count
@@ -647,22 +855,40 @@ class VocabGuardApp:
                 # Chờ 0.5s rồi sang câu mới như cũ
                 self.root.after(500, self.next_question)
 
+        # ================== GẦN ĐÚNG: CHỈ SAI CHÍNH TẢ ==================
+        elif typo_distance is not None:
+            # không phạt, cho sửa lại ngay
+            self.feedback_label.config(
+                text=(
+                    "GẦN ĐÚNG! Kiểm tra lại chính tả "
+                    f"(lệch {typo_distance} ký tự) rồi trả lời lại."
+                ),
+                fg="orange",
+            )
+            self.answer_entry.focus()
+
         # ================== TRƯỜNG HỢP TRẢ LỜI SAI ==================
         else:
-            correct_display = self.clean_en(item.get("en", ""))
+            correct_display = item["key"]
+            confused_line = ""
+            other = self.confused_with(user_answer, item)
+            if other is not None:
+                confused_line = (
+                    f"Có vẻ bạn nhầm với từ: {other['en']} ({other['vi']})\n"
+                )
             self.feedback_label.config(
                 text=(
                     "SAI.\n"
                     f"Bạn trả lời: {raw_user_answer or '(trống)'}\n"
-                    f"Đáp án đúng: {correct_display}\n\n"
+                    f"Đáp án đúng: {correct_display}\n"
+                    f"{confused_line}\n"
                     "Bây giờ hãy đặt 1 câu ví dụ với từ này."
                 ),
                 fg="red",
             )
 
-            # ghi nhớ từ sai để vòng sau hỏi lại
-            if self.current_index not in self.wrong_indices:
-                self.wrong_indices.append(self.current_index)
+            # ghi nhớ từ sai -> lịch sẽ hỏi lại sau ít phút
+            self._review_current(False)
 
             # đánh dấu đang ở chế độ “bị phạt”
             self.practice_mode = "forced_from_quiz"
@@ -804,18 +1030,35 @@ class VocabGuardApp:
             )
             note_label.grid(row=4, column=0, columnspan=2, pady=10, sticky="w")
 
-        # Cập nhật danh sách mỗi lần mở
-        self.refresh_vocab_listbox()
+            # Điền danh sách 1 lần; sau đó _on_vocab_change giữ Listbox khớp với store
+            self.refresh_vocab_listbox()
 
         # Hiện frame vocab, ẩn frame khác
         self._show_only(self.vocab_frame)
 
+    @staticmethod
+    def _vocab_row_text(item: dict) -> str:
+        return f"{item.get('en', '')} - {item.get('vi', '')}"
+
     def refresh_vocab_listbox(self):
         self.vocab_listbox.delete(0, tk.END)
         for item in self.store.all():
-            en = item.get("en", "")
-            vi = item.get("vi", "")
-            self.vocab_listbox.insert(tk.END, f"{en} - {vi}")
+            self.vocab_listbox.insert(tk.END, self._vocab_row_text(item))
+
+    def _patch_vocab_listbox(self, change):
+        """Sửa đúng 1 dòng Listbox theo VocabChange (cùng thứ tự với store.all())."""
+        if change.index is None:
+            return
+        if change.kind == "added":
+            self.vocab_listbox.insert(change.index, self._vocab_row_text(change.entry))
+        elif change.kind == "updated":
+            selected = change.index in self.vocab_listbox.curselection()
+            self.vocab_listbox.delete(change.index)
+            self.vocab_listbox.insert(change.index, self._vocab_row_text(change.entry))
+            if selected:
+                self.vocab_listbox.selection_set(change.index)
+        elif change.kind == "removed":
+            self.vocab_listbox.delete(change.index)
 
     def on_vocab_select(self, event):
         selection = self.vocab_listbox.curselection()
@@ -837,10 +1080,8 @@ class VocabGuardApp:
             messagebox.showwarning("Thiếu dữ liệu", "Vui lòng nhập đầy đủ Tiếng Anh và Tiếng Việt.")
             return
         self.store.add(en, vi)
-        self.refresh_vocab_listbox()
         self.en_entry.delete(0, tk.END)
         self.vi_entry.delete(0, tk.END)
-        self.last_index = None
 
     def update_vocab(self):
         selection = self.vocab_listbox.curselection()
@@ -853,9 +1094,8 @@ class VocabGuardApp:
         if not en or not vi:
             messagebox.showwarning("Thiếu dữ liệu", "Vui lòng nhập đầy đủ Tiếng Anh và Tiếng Việt.")
             return
-        self.store.update(index, en, vi)
-        self.refresh_vocab_listbox()
-        self.last_index = None
+        # Listbox theo thứ tự all() -> đổi dòng được chọn sang id
+        self.store.update(self.store.all()[index]["id"], en, vi)
 
     def delete_vocab(self):
         selection = self.vocab_listbox.curselection()
@@ -874,11 +1114,9 @@ class VocabGuardApp:
             f"Bạn có chắc muốn xóa từ:\n{item.get('en', '')} - {item.get('vi', '')} ?",
         )
         if ok:
-            self.store.delete(index)
-            self.refresh_vocab_listbox()
+            self.store.delete(item["id"])
             self.en_entry.delete(0, tk.END)
             self.vi_entry.delete(0, tk.END)
-            self.last_index = None
 
     def close_vocab_window(self):
         # Quay lại màn quiz chính
@@ -1,14 +1,16 @@
-import os
-import json
-import random
+import threading
 import tkinter as tk
+from collections import deque
 from tkinter import messagebox, ttk
 
-import PyPDF2
+from pdf_text import PAGE_SEPARATOR, extract_text, stream_pdf_text
+from reading_tests import ReadingDataError, prepare_random_test, prepare_test
 
 
 # ----------------- Helpers ----------------- #
 
+PASSAGE_POLL_MS = 30   # passage từ PDF đang trích: bao lâu nối thêm trang 1 lần
+
 ROMAN_NUMS = [
     "i", "ii", "iii", "iv", "v",
     "vi", "vii", "viii", "ix", "x",
@@ -26,8 +28,10 @@ def int_to_roman(n: int) -> str:
 class ReadingApp:
     """
     ReadingApp kiểu IELTS:
-    - Mỗi lần mở: chọn ngẫu nhiên 1 folder trong ./Reading
+    - Mỗi lần mở: chọn ngẫu nhiên 1 folder trong ./Reading (qua catalog đã
+      index sẵn, xem reading_catalog.py)
       folder đó phải chứa AnswerKey.json + file PDF.
+      Hoặc đọc từ kho 1 file reading_bank.sqlite3 (reading_bank.py) nếu có.
     - AnswerKey.json chứa các question_groups với nhiều dạng:
       * matching_heading
       * matching_person
@@ -39,12 +43,16 @@ class ReadingApp:
         root: tk.Toplevel,
         on_completed=None,
         on_request_switch=None,
-        reading_root: str = "Reading",
+        reading_root: str = None,
+        test_data: dict = None,
+        test_id=None,
     ):
         self.root = root
         self.on_completed = on_completed
         self.on_request_switch = on_request_switch
+        # thư mục Reading/ hoặc file kho (reading_bank.py); None -> kho nếu có, không thì Reading/
         self.reading_root = reading_root
+        self.test_id = test_id     # mở đúng 1 bài (id trong kho / tên folder) thay vì chọn ngẫu nhiên
 
         self.root.title("Reading Guard")
 
@@ -69,7 +77,8 @@ class ReadingApp:
         self.group_states = []
 
         # --------- Load 1 bài ngẫu nhiên ---------
-        self.test_data = self.load_random_test()
+        # test_data: bài đã được tải trước (reading_tests.ReadingPreloader) -> khỏi đọc file
+        self.test_data = test_data or self.load_random_test()
         if not self.test_data:
             # Không có dữ liệu hợp lệ -> thoát luôn
             return
@@ -83,110 +92,68 @@ class ReadingApp:
     def load_random_test(self) -> dict | None:
         """
         Chọn ngẫu nhiên 1 folder con trong self.reading_root
-        chứa file AnswerKey.json. Ưu tiên đọc passage từ JSON.
+        chứa file AnswerKey.json (chọn trong catalog, không quét lại thư mục).
+        Ưu tiên đọc passage từ JSON.
         Nếu JSON không có 'passage' thì mới fallback sang PDF.
+        Chi tiết ở reading_tests.prepare_random_test.
         """
-        if not os.path.isdir(self.reading_root):
-            messagebox.showerror(
-                "Lỗi dữ liệu",
-                f"Không tìm thấy thư mục '{self.reading_root}'.",
-                parent=self.root,
-            )
-            self.root.destroy()
-            return None
-
-        # liệt kê các folder con
-        subfolders = [
-            os.path.join(self.reading_root, name)
-            for name in os.listdir(self.reading_root)
-            if os.path.isdir(os.path.join(self.reading_root, name))
-        ]
-
-        valid_folders = []
-        for folder in subfolders:
-            ans_path = os.path.join(folder, "AnswerKey.json")
-            if os.path.exists(ans_path):
-                valid_folders.append(folder)
-
-        if not valid_folders:
-            messagebox.showerror(
-                "Lỗi dữ liệu",
-                "Không tìm thấy folder nào trong 'Reading/' có AnswerKey.json.\n"
-                "Mỗi bài nên nằm trong 1 folder con, chứa AnswerKey.json (và PDF nếu cần).",
-                parent=self.root,
-            )
-            self.root.destroy()
-            return None
-
-        chosen_folder = random.choice(valid_folders)
-        answer_path = os.path.join(chosen_folder, "AnswerKey.json")
-
         try:
-            with open(answer_path, "r", encoding="utf-8") as f:
-                meta = json.load(f)
-        except Exception as e:
-            messagebox.showerror(
-                "Lỗi đọc AnswerKey.json",
-                f"Không thể đọc file:\n{answer_path}\n\nChi tiết: {e}",
-                parent=self.root,
-            )
+            if self.test_id is not None:
+                return prepare_test(self.reading_root, self.test_id)
+            return prepare_random_test(self.reading_root)
+        except ReadingDataError as e:
+            messagebox.showerror(e.title, e.message, parent=self.root)
             self.root.destroy()
             return None
 
-        title = meta.get("title", os.path.basename(chosen_folder))
-        question_groups = meta.get("question_groups", [])
-        if not question_groups:
-            messagebox.showerror(
-                "Lỗi dữ liệu",
-                "AnswerKey.json không chứa 'question_groups'.",
-                parent=self.root,
-            )
-            self.root.destroy()
-            return None
-
-        # 🔥 ƯU TIÊN: nếu JSON có 'passage' thì dùng luôn, KHÔNG cần PDF
-        passage_text = meta.get("passage")
-
-        if passage_text is None:
-            # Fallback: vẫn hỗ trợ kiểu cũ dùng PDF
-            pdf_name = meta.get("pdf_file", "passage.pdf")
-            pdf_path = os.path.join(chosen_folder, pdf_name)
-            if not os.path.exists(pdf_path):
-                messagebox.showerror(
-                    "Lỗi dữ liệu",
-                    f"Không tìm thấy file PDF '{pdf_name}' trong folder:\n{chosen_folder}\n"
-                    "Và AnswerKey.json cũng không có trường 'passage'.",
-                    parent=self.root,
-                )
-                self.root.destroy()
-                return None
+    def extract_text_from_pdf(self, pdf_path: str) -> str:
+        """Đọc toàn bộ text từ PDF (không qua cache)."""
+        return extract_text(pdf_path)
 
-            passage_text = self.extract_text_from_pdf(pdf_path)
+    def stream_passage_from_pdf(self, path: str, sha1: str = None):
+        """
+        Trích PDF ở thread nền (pdf_text.stream_pdf_text, các trang chạy song
+        song); trang nào xong thì _poll_passage nối vào ô passage qua root.after,
+        trang 1 hiện ngay không phải chờ cả file.
+        """
+        self._passage_pages = deque()
+        self._passage_done = False
+        self._passage_has_text = False
 
-        return {
-            "folder": chosen_folder,
-            "title": title,
-            "passage_text": passage_text,
-            "question_groups": question_groups,
-        }
+        def worker():
+            try:
+                for page in stream_pdf_text(path, sha1):
+                    self._passage_pages.append(page)
+            finally:
+                self._passage_done = True
 
+        threading.Thread(target=worker, daemon=True).start()
+        self.passage_label.config(text="Reading Passage (đang tải...)")
+        self.root.after(PASSAGE_POLL_MS, self._poll_passage)
 
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
-        """Đọc toàn bộ text từ PDF (đơn giản)."""
-        text_parts = []
+    def _poll_passage(self):
         try:
-            with open(pdf_path, "rb") as f:
-                reader = PyPDF2.PdfReader(f)
-                for page in reader.pages:
-                    try:
-                        t = page.extract_text() or ""
-                    except Exception:
-                        t = ""
-                    if t:
-                        text_parts.append(t.strip())
-        except Exception as e:
-            print("Lỗi đọc PDF:", e)
-        return "\n\n".join(text_parts)
+            if not self.root.winfo_exists():
+                return
+        except tk.TclError:
+            return
+        done = self._passage_done   # đọc trước khi lấy trang -> không sót trang cuối
+        if self._passage_pages:
+            self.passage_text.config(state="normal")
+            while self._passage_pages:
+                page = self._passage_pages.popleft()
+                if self._passage_has_text:
+                    page = PAGE_SEPARATOR + page
+                self.passage_text.insert("end", page)
+                self._passage_has_text = True
+            self.passage_text.config(state="disabled")
+        if done:
+            if self._passage_has_text:
+                self.passage_label.config(text="Reading Passage")
+            else:
+                self.passage_label.config(text="Reading Passage (không đọc được PDF)")
+            return
+        self.root.after(PASSAGE_POLL_MS, self._poll_passage)
 
     # ============================================================
     # 2) UI CHUNG
@@ -213,7 +180,7 @@ class ReadingApp:
         left_frame = tk.Frame(body_frame)
         left_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 10))
 
-        passage_label = tk.Label(
+        self.passage_label = passage_label = tk.Label(
             left_frame,
             text="Reading Passage",
             font=("Arial", 14, "bold"),
@@ -239,6 +206,8 @@ class ReadingApp:
 
         self.passage_text.insert("1.0", self.test_data["passage_text"])
         self.passage_text.config(state="disabled")
+        if self.test_data.get("pending_pdf"):
+            self.stream_passage_from_pdf(**self.test_data["pending_pdf"])
 
         # ---------- RIGHT: QUESTIONS ----------
         right_frame = tk.Frame(body_frame, width=400)
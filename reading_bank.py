@@ -0,0 +1,245 @@
+# reading_bank.py
+"""
+Kho bài Reading đóng gói trong 1 file SQLite (thay cho hàng nghìn folder nhỏ).
+
+Mỗi bài là 1 dòng trong bảng tests:
+    id, folder, title, question_count, answer_key (JSON), passage_text
+    (passage trong JSON hoặc text đã trích sẵn từ PDF), translate (translate.txt),
+    pdf (bản gốc, chỉ khi build với --with-pdf), source_sha1
+Mở 1 bài = 1 lần đọc theo khóa chính; không cần PyPDF2 lúc chạy.
+Chép kho sang máy khác = chép 1 file.
+
+Build / cập nhật từ thư mục Reading/ (folder không đổi thì bỏ qua):
+    python reading_bank.py build Reading reading_bank.sqlite3 [--with-pdf]
+    python reading_bank.py list reading_bank.sqlite3
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+
+from pdf_text import load_pdf_text
+from reading_catalog import ANSWER_KEY, DEFAULT_PDF, count_questions
+
+BANK_SUFFIXES = (".sqlite3", ".db")
+TRANSLATE_FILE = "translate.txt"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tests (
+    id              INTEGER PRIMARY KEY,
+    folder          TEXT NOT NULL UNIQUE,
+    title           TEXT NOT NULL,
+    question_count  INTEGER NOT NULL,
+    answer_key      TEXT NOT NULL,
+    passage_text    TEXT NOT NULL,
+    translate       TEXT,
+    pdf             BLOB,
+    source_sha1     TEXT NOT NULL
+);
+"""
+
+
+def is_bank(path: str) -> bool:
+    return bool(path) and os.path.isfile(path) and path.endswith(BANK_SUFFIXES)
+
+
+class ReadingBank:
+    """Đọc kho (chỉ đọc). Danh sách id giữ trong RAM, nạp lại khi file kho đổi."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        # mode=ro: kho có thể nằm trên ổ mạng / thư mục không ghi được
+        uri = "file:" + os.path.abspath(path).replace("\\", "/") + "?mode=ro"
+        self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        self._ids = None
+        self._mtime = None
+
+    def ids(self) -> list:
+        mtime = os.stat(self.path).st_mtime_ns
+        with self._lock:
+            if self._ids is None or mtime != self._mtime:
+                self._ids = [row[0] for row in self._conn.execute("SELECT id FROM tests ORDER BY id")]
+                self._mtime = mtime
+            return list(self._ids)
+
+    def pick_random_id(self, exclude=None):
+        exclude = set(exclude or ())
+        ids = self.ids()
+        choices = [i for i in ids if i not in exclude] or ids
+        return random.choice(choices) if choices else None
+
+    def load(self, test_id: int):
+        """Dữ liệu 1 bài (answer key đã parse + passage), None nếu không có id này."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT folder, title, answer_key, passage_text FROM tests WHERE id = ?",
+                (test_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        folder, title, answer_key, passage_text = row
+        return {
+            "id": test_id,
+            "folder": folder,
+            "title": title,
+            "meta": json.loads(answer_key),
+            "passage_text": passage_text,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_banks = {}
+_banks_lock = threading.Lock()
+
+
+def get_bank(path: str) -> ReadingBank:
+    """ReadingBank dùng chung trong 1 lần chạy app (mỗi file 1 kết nối)."""
+    key = os.path.abspath(path)
+    with _banks_lock:
+        bank = _banks.get(key)
+        if bank is None:
+            bank = _banks[key] = ReadingBank(path)
+        return bank
+
+
+# ---------- Build kho từ thư mục ----------
+
+def _read_bytes(path: str):
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _folder_row(folder: str, with_pdf: bool):
+    """Đọc 1 folder bài -> (sha1, dữ liệu dòng), None nếu folder không hợp lệ."""
+    raw_key = _read_bytes(os.path.join(folder, ANSWER_KEY))
+    if raw_key is None:
+        return None
+    try:
+        meta = json.loads(raw_key.decode("utf-8"))
+    except ValueError as e:
+        print("Bỏ qua (AnswerKey.json lỗi):", folder, e)
+        return None
+    question_groups = meta.get("question_groups", [])
+    if not question_groups:
+        print("Bỏ qua (không có question_groups):", folder)
+        return None
+
+    pdf_path = os.path.join(folder, meta.get("pdf_file", DEFAULT_PDF))
+    pdf_bytes = _read_bytes(pdf_path) if (with_pdf or meta.get("passage") is None) else None
+    translate = _read_bytes(os.path.join(folder, TRANSLATE_FILE))
+
+    h = hashlib.sha1(raw_key)
+    for part in (pdf_bytes, translate):
+        h.update(b"\0" + (part or b""))
+    return h.hexdigest(), meta, pdf_path, pdf_bytes, translate
+
+
+def build_bank(reading_root: str, bank_path: str, with_pdf: bool = False) -> dict:
+    """
+    Thêm / cập nhật các bài trong reading_root vào bank_path (giữ nguyên id của
+    bài cũ, folder không còn thì xóa). Trả số bài thêm / sửa / giữ / xóa.
+    """
+    conn = sqlite3.connect(bank_path)
+    conn.execute("PRAGMA journal_mode=DELETE")   # 1 file duy nhất, không có -wal
+    conn.executescript(SCHEMA)
+    existing = dict(conn.execute("SELECT folder, source_sha1 FROM tests"))
+    stats = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+
+    names = sorted(
+        name for name in os.listdir(reading_root)
+        if os.path.isdir(os.path.join(reading_root, name)) and not name.startswith(".")
+    )
+    seen = set()
+    with conn:
+        for name in names:
+            row = _folder_row(os.path.join(reading_root, name), with_pdf)
+            if row is None:
+                continue
+            seen.add(name)
+            sha1, meta, pdf_path, pdf_bytes, translate = row
+            if existing.get(name) == sha1:
+                stats["unchanged"] += 1
+                continue
+
+            passage_text = meta.get("passage")
+            if passage_text is None:
+                if pdf_bytes is None:
+                    print("Bỏ qua (không có passage lẫn PDF):", name)
+                    seen.discard(name)
+                    continue
+                passage_text = load_pdf_text(pdf_path)
+
+            values = (
+                meta.get("title", name),
+                count_questions(meta["question_groups"]),
+                json.dumps(meta, ensure_ascii=False),
+                passage_text,
+                translate.decode("utf-8", errors="replace") if translate is not None else None,
+                pdf_bytes if with_pdf else None,
+                sha1,
+                name,
+            )
+            if name in existing:
+                conn.execute(
+                    "UPDATE tests SET title=?, question_count=?, answer_key=?, passage_text=?, "
+                    "translate=?, pdf=?, source_sha1=? WHERE folder=?",
+                    values,
+                )
+                stats["updated"] += 1
+            else:
+                conn.execute(
+                    "INSERT INTO tests (title, question_count, answer_key, passage_text, "
+                    "translate, pdf, source_sha1, folder) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    values,
+                )
+                stats["added"] += 1
+
+        for name in existing:
+            if name not in seen:
+                conn.execute("DELETE FROM tests WHERE folder = ?", (name,))
+                stats["removed"] += 1
+    conn.execute("VACUUM")
+    conn.close()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Đóng gói kho bài Reading thành 1 file SQLite")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_build = sub.add_parser("build", help="Thêm / cập nhật bài từ thư mục Reading/")
+    p_build.add_argument("reading_root")
+    p_build.add_argument("bank")
+    p_build.add_argument("--with-pdf", action="store_true", help="lưu cả file PDF gốc vào kho")
+
+    p_list = sub.add_parser("list", help="Liệt kê các bài trong kho")
+    p_list.add_argument("bank")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        stats = build_bank(args.reading_root, args.bank, args.with_pdf)
+        print(
+            f"Thêm {stats['added']}, cập nhật {stats['updated']}, "
+            f"giữ nguyên {stats['unchanged']}, xóa {stats['removed']} bài."
+        )
+    else:
+        conn = sqlite3.connect(args.bank)
+        for test_id, folder, title, count in conn.execute(
+            "SELECT id, folder, title, question_count FROM tests ORDER BY id"
+        ):
+            print(f"{test_id:>6}  {count:>3} câu  {title}  ({folder})")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
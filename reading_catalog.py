@@ -0,0 +1,283 @@
+# reading_catalog.py
+"""
+Danh mục (catalog) các bài Reading, lưu thành file index cạnh thư mục Reading/
+(Reading -> Reading.catalog.json; để ngoài thư mục để việc ghi index không làm
+đổi mtime của chính Reading/).
+
+Trước đây mỗi lần mở ReadingApp phải listdir Reading/, stat từng folder con
+tìm AnswerKey.json rồi mới chọn bài -> với kho vài nghìn bài trên ổ mạng mất
+vài giây. Giờ:
+- Index giữ cho mỗi bài: tiêu đề, folder, số câu hỏi, nguồn
+  passage (json / pdf), mtime + size + sha1 của AnswerKey.json và PDF.
+- Chỉ quét lại Reading/ khi mtime của chính thư mục đó đổi (thêm / xóa /
+  đổi tên folder con). Folder con nào có file đổi mtime / size thì chỉ đọc
+  lại folder đó.
+- Folder chưa dùng được (chưa có / hỏng AnswerKey.json, vd đang chép dở) vẫn
+  nằm trong index dưới dạng entry "invalid" kèm chữ ký file; mỗi lần refresh
+  stat lại riêng các folder này -> sửa / chép xong là hiện ra, không cần
+  Reading/ đổi mtime.
+- Chọn ngẫu nhiên là chọn trong RAM; chỉ bài được chọn mới bị stat lại để
+  chắc index còn đúng, rồi mới đọc AnswerKey.json của riêng bài đó.
+
+Không ghi được index (ổ chỉ đọc...) thì vẫn chạy, chỉ là lần sau phải quét lại.
+"""
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+
+CATALOG_SUFFIX = ".catalog.json"
+CATALOG_VERSION = 2
+ANSWER_KEY = "AnswerKey.json"
+DEFAULT_PDF = "passage.pdf"
+
+
+def file_sha1(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _file_sig(path: str):
+    """(mtime_ns, size) của file, None nếu không có."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def count_questions(question_groups: list) -> int:
+    total = 0
+    for group in question_groups:
+        if group.get("type") == "multiple_choice_single":
+            total += len(group.get("questions", []))
+        else:
+            total += len(group.get("answers", []))
+    return total
+
+
+class ReadingCatalog:
+    def __init__(self, reading_root: str = "Reading", index_path: str = None):
+        self.reading_root = reading_root
+        self.index_path = index_path or os.path.normpath(reading_root) + CATALOG_SUFFIX
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()   # preloader + UI thread có thể cùng refresh
+        self._tests = {}          # tên folder -> entry (kể cả entry "invalid")
+        self._root_mtime = None
+        self._dirty = False
+        self._load()
+
+    # ---------- Đọc / ghi index ----------
+
+    def _load(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != CATALOG_VERSION:
+            return
+        self._tests = data.get("tests", {})
+        self._root_mtime = data.get("root_mtime")
+
+    def save(self):
+        # preloader và UI thread dùng chung catalog: chụp dữ liệu trong lock,
+        # mỗi lần ghi 1 file tạm riêng rồi mới thay file index
+        with self._lock:
+            if not self._dirty:
+                return
+            text = json.dumps(
+                {"version": CATALOG_VERSION, "root_mtime": self._root_mtime, "tests": self._tests},
+                ensure_ascii=False,
+            )
+            self._dirty = False
+        tmp = None
+        try:
+            fd, tmp = tempfile.mkstemp(
+                prefix=os.path.basename(self.index_path) + ".",
+                suffix=".tmp",
+                dir=os.path.dirname(os.path.abspath(self.index_path)),
+            )
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp, self.index_path)
+        except OSError as e:
+            print("Không ghi được catalog Reading:", e)
+            if tmp is not None and os.path.exists(tmp):
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+
+    # ---------- Quét / kiểm tra ----------
+
+    def _index_folder(self, name: str):
+        """
+        Đọc AnswerKey.json của 1 folder -> entry. Folder không hợp lệ -> entry
+        "invalid" (để lần sau kiểm tra lại); folder không còn -> None.
+        """
+        folder = os.path.join(self.reading_root, name)
+        if not os.path.isdir(folder):
+            return None
+        answer_path = os.path.join(folder, ANSWER_KEY)
+        answer_sig = _file_sig(answer_path)
+        invalid = {"folder": name, "invalid": True, "answer_key": answer_sig}
+        if answer_sig is None:
+            return invalid
+        try:
+            with open(answer_path, "rb") as f:
+                raw = f.read()
+            meta = json.loads(raw.decode("utf-8"))
+        except (OSError, ValueError) as e:
+            print("Bỏ qua bài Reading lỗi:", answer_path, e)
+            return invalid
+
+        question_groups = meta.get("question_groups", [])
+        if not question_groups:
+            return invalid
+
+        entry = {
+            "folder": name,
+            "title": meta.get("title", name),
+            "question_count": count_questions(question_groups),
+            "passage_source": "json" if meta.get("passage") is not None else "pdf",
+            "answer_key": answer_sig,
+            "answer_key_sha1": hashlib.sha1(raw).hexdigest(),
+            "pdf_file": None,
+            "pdf": None,
+            "pdf_sha1": None,
+        }
+        if entry["passage_source"] == "pdf":
+            pdf_name = meta.get("pdf_file", DEFAULT_PDF)
+            pdf_path = os.path.join(folder, pdf_name)
+            entry["pdf_file"] = pdf_name
+            entry["pdf"] = _file_sig(pdf_path)
+            if entry["pdf"] is not None:
+                entry["pdf_sha1"] = file_sha1(pdf_path)
+        return entry
+
+    def _is_fresh(self, entry: dict) -> bool:
+        folder = os.path.join(self.reading_root, entry["folder"])
+        if _file_sig(os.path.join(folder, ANSWER_KEY)) != entry["answer_key"]:
+            return False
+        if entry.get("pdf_file") is not None:
+            return _file_sig(os.path.join(folder, entry["pdf_file"])) == entry["pdf"]
+        return True
+
+    def _revalidate(self, name: str):
+        """
+        Entry còn đúng thì giữ, file đổi thì đọc lại, folder mất thì bỏ.
+        Trả entry dùng được, None nếu folder không hợp lệ / không còn.
+        """
+        entry = self._tests.get(name)
+        if entry is None or not self._is_fresh(entry):
+            entry = self._index_folder(name)
+            with self._lock:
+                if entry is None:
+                    self._tests.pop(name, None)
+                else:
+                    self._tests[name] = entry
+                self._dirty = True
+        if entry is None or entry.get("invalid"):
+            return None
+        return entry
+
+    def refresh(self, full: bool = False):
+        """
+        Đồng bộ index với Reading/. Mặc định chỉ quét khi mtime của Reading/ đổi
+        (có folder được thêm / xóa), ngoài ra chỉ stat lại các folder "invalid";
+        full=True -> kiểm tra lại cả từng folder.
+        """
+        with self._refresh_lock:
+            self._refresh(full)
+        self.save()
+
+    def _refresh(self, full: bool):
+        try:
+            root_mtime = os.stat(self.reading_root).st_mtime_ns
+        except OSError:
+            return
+        if not full and root_mtime == self._root_mtime:
+            # danh sách folder không đổi -> chỉ xem lại folder chưa dùng được
+            with self._lock:
+                invalid = [name for name, entry in self._tests.items() if entry.get("invalid")]
+            for name in invalid:
+                self._revalidate(name)
+            return
+
+        names = set()
+        with os.scandir(self.reading_root) as it:
+            for item in it:
+                if item.is_dir() and not item.name.startswith("."):
+                    names.add(item.name)
+
+        with self._lock:
+            for name in list(self._tests):
+                if name not in names:
+                    del self._tests[name]
+            self._root_mtime = root_mtime
+            self._dirty = True
+            todo = [
+                name for name in sorted(names)
+                if full or name not in self._tests or self._tests[name].get("invalid")
+            ]
+        for name in todo:
+            self._revalidate(name)
+
+    # ---------- Dùng ----------
+
+    def entries(self) -> list:
+        """Các bài dùng được (bỏ folder "invalid")."""
+        with self._lock:
+            return [entry for entry in self._tests.values() if not entry.get("invalid")]
+
+    def __len__(self):
+        return len(self.entries())
+
+    def pick_random(self, exclude=None):
+        """
+        Chọn ngẫu nhiên 1 bài (trong RAM), bỏ qua folder trong exclude nếu còn bài khác.
+        Bài được chọn được kiểm tra lại mtime trước khi trả về; None nếu kho rỗng.
+        """
+        self.refresh()
+        exclude = set(exclude or ())
+        while True:
+            with self._lock:
+                valid = [n for n, entry in self._tests.items() if not entry.get("invalid")]
+            names = [n for n in valid if n not in exclude] or valid
+            if not names:
+                return None
+            name = random.choice(names)
+            entry = self._revalidate(name)
+            if entry is not None:
+                self.save()
+                return entry
+            exclude.add(name)
+
+    def get(self, name: str):
+        """Entry của folder name (kiểm tra lại mtime), None nếu không có / không hợp lệ."""
+        entry = self._revalidate(name)
+        self.save()
+        return entry
+
+    def folder_path(self, entry: dict) -> str:
+        return os.path.join(self.reading_root, entry["folder"])
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(reading_root: str = "Reading") -> ReadingCatalog:
+    """Catalog dùng chung trong 1 lần chạy app (mỗi thư mục Reading 1 catalog)."""
+    key = os.path.abspath(reading_root)
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = _catalogs[key] = ReadingCatalog(reading_root)
+        return catalog
@@ -0,0 +1,220 @@
+# reading_tests.py
+"""
+Chuẩn bị dữ liệu 1 bài Reading (không dính tới UI) + tải trước bài kế tiếp.
+
+- prepare_random_test / prepare_test: chọn bài (ngẫu nhiên / theo id) rồi lấy
+  câu hỏi + passage. Nguồn bài là thư mục Reading/ (catalog, AnswerKey.json,
+  passage JSON / cache text PDF / trích PDF) hoặc file kho đóng gói
+  (reading_bank.py, 1 lần đọc theo id). Dữ liệu lỗi (kể cả file kho hỏng /
+  không phải SQLite) -> ReadingDataError (title, message) để ReadingApp hiện
+  messagebox như trước. Kho mặc định hỏng thì chọn bài từ Reading/.
+- test_id của 1 bài: tên folder (nguồn thư mục) hoặc id trong kho.
+- ReadingPreloader: StudyMasterApp cho chạy ở thread nền khi mở app / bắt đầu
+  luyện từ vựng, chuẩn bị sẵn trọn 1 bài (kể cả text PDF). Lúc mở Reading chỉ
+  việc take() -> ReadingApp dựng UI ngay, không I/O trên UI thread.
+"""
+import json
+import os
+import sqlite3
+import threading
+
+from pdf_text import cached_pdf_text, load_pdf_text
+from reading_bank import get_bank, is_bank
+from reading_catalog import ANSWER_KEY, DEFAULT_PDF, get_catalog
+
+# Có file kho này (build bằng reading_bank.py) thì app đọc bài từ kho, không thì từ Reading/
+DEFAULT_BANK = "reading_bank.sqlite3"
+DEFAULT_READING_ROOT = "Reading"
+
+
+class ReadingDataError(Exception):
+    def __init__(self, title: str, message: str):
+        super().__init__(message)
+        self.title = title
+        self.message = message
+
+
+def default_source() -> str:
+    return DEFAULT_BANK if is_bank(DEFAULT_BANK) else DEFAULT_READING_ROOT
+
+
+def prepare_random_test(reading_root: str = None, exclude=None, wait_for_pdf: bool = False) -> dict:
+    """
+    Chọn ngẫu nhiên 1 bài (bỏ qua test_id trong exclude nếu còn bài khác).
+    reading_root: thư mục Reading/ hoặc file kho; None -> default_source().
+    Xem prepare_test.
+    """
+    if reading_root is None:
+        reading_root = default_source()
+        if is_bank(reading_root):
+            try:
+                return _prepare_random_bank_test(reading_root, exclude)
+            except ReadingDataError as e:
+                # kho mặc định hỏng (file rỗng / chép dở...) -> vẫn còn Reading/
+                if not os.path.isdir(DEFAULT_READING_ROOT):
+                    raise
+                print("Kho bài Reading lỗi, dùng thư mục Reading/:", e.message)
+                reading_root = DEFAULT_READING_ROOT
+    if is_bank(reading_root):
+        return _prepare_random_bank_test(reading_root, exclude)
+
+    if not os.path.isdir(reading_root):
+        raise ReadingDataError("Lỗi dữ liệu", f"Không tìm thấy thư mục '{reading_root}'.")
+    entry = get_catalog(reading_root).pick_random(exclude)
+    if entry is None:
+        raise ReadingDataError(
+            "Lỗi dữ liệu",
+            "Không tìm thấy folder nào trong 'Reading/' có AnswerKey.json.\n"
+            "Mỗi bài nên nằm trong 1 folder con, chứa AnswerKey.json (và PDF nếu cần).",
+        )
+    return _prepare_folder_test(reading_root, entry, wait_for_pdf)
+
+
+def prepare_test(reading_root: str, test_id, wait_for_pdf: bool = False) -> dict:
+    """
+    Dữ liệu bài test_id (id trong kho / tên folder trong Reading/).
+    Ưu tiên passage trong JSON; không có thì lấy text PDF: có cache thì dùng,
+    chưa có thì wait_for_pdf=True -> trích luôn, False -> trả "pending_pdf"
+    để ReadingApp hiện dần từng trang. Bài trong kho luôn có passage sẵn.
+    """
+    reading_root = reading_root or default_source()
+    if is_bank(reading_root):
+        try:
+            test_id = int(test_id)
+        except (TypeError, ValueError):
+            raise ReadingDataError("Lỗi dữ liệu", f"Id bài trong kho không hợp lệ: {test_id!r}.")
+        return _prepare_bank_test(reading_root, test_id)
+
+    if not os.path.isdir(reading_root):
+        raise ReadingDataError("Lỗi dữ liệu", f"Không tìm thấy thư mục '{reading_root}'.")
+    entry = get_catalog(reading_root).get(test_id)
+    if entry is None:
+        raise ReadingDataError(
+            "Lỗi dữ liệu", f"Không có bài '{test_id}' (folder có AnswerKey.json) trong '{reading_root}'."
+        )
+    return _prepare_folder_test(reading_root, entry, wait_for_pdf)
+
+
+def _prepare_random_bank_test(bank_path: str, exclude) -> dict:
+    try:
+        test_id = get_bank(bank_path).pick_random_id(exclude)
+    except (sqlite3.Error, OSError) as e:
+        # file rỗng / hỏng / không phải SQLite -> "no such table", "not a database"...
+        raise ReadingDataError("Lỗi đọc kho bài", f"Không thể đọc kho:\n{bank_path}\n\nChi tiết: {e}")
+    if test_id is None:
+        raise ReadingDataError("Lỗi dữ liệu", f"Kho bài '{bank_path}' chưa có bài nào.")
+    return _prepare_bank_test(bank_path, test_id)
+
+
+def _prepare_bank_test(bank_path: str, test_id: int) -> dict:
+    try:
+        data = get_bank(bank_path).load(test_id)
+    except Exception as e:
+        raise ReadingDataError("Lỗi đọc kho bài", f"Không thể đọc kho:\n{bank_path}\n\nChi tiết: {e}")
+    if data is None:
+        raise ReadingDataError("Lỗi dữ liệu", f"Kho bài không có bài id={test_id}.")
+    return {
+        "test_id": test_id,
+        "folder": data["folder"],
+        "title": data["title"],
+        "passage_text": data["passage_text"],
+        "pending_pdf": None,
+        "question_groups": data["meta"].get("question_groups", []),
+    }
+
+
+def _prepare_folder_test(reading_root: str, entry: dict, wait_for_pdf: bool) -> dict:
+    catalog = get_catalog(reading_root)
+    chosen_folder = catalog.folder_path(entry)
+    answer_path = os.path.join(chosen_folder, ANSWER_KEY)
+
+    try:
+        with open(answer_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except Exception as e:
+        raise ReadingDataError(
+            "Lỗi đọc AnswerKey.json",
+            f"Không thể đọc file:\n{answer_path}\n\nChi tiết: {e}",
+        )
+
+    title = meta.get("title", os.path.basename(chosen_folder))
+    question_groups = meta.get("question_groups", [])
+    if not question_groups:
+        raise ReadingDataError("Lỗi dữ liệu", "AnswerKey.json không chứa 'question_groups'.")
+
+    # 🔥 ƯU TIÊN: nếu JSON có 'passage' thì dùng luôn, KHÔNG cần PDF
+    passage_text = meta.get("passage")
+    pending_pdf = None
+
+    if passage_text is None:
+        # Fallback: vẫn hỗ trợ kiểu cũ dùng PDF
+        pdf_name = meta.get("pdf_file", DEFAULT_PDF)
+        pdf_path = os.path.join(chosen_folder, pdf_name)
+        if not os.path.exists(pdf_path):
+            raise ReadingDataError(
+                "Lỗi dữ liệu",
+                f"Không tìm thấy file PDF '{pdf_name}' trong folder:\n{chosen_folder}\n"
+                "Và AnswerKey.json cũng không có trường 'passage'.",
+            )
+
+        # text đã trích được cache theo hash nội dung PDF (pdf_text.py);
+        # catalog vừa kiểm tra file nên dùng luôn hash trong index
+        known_sha1 = entry["pdf_sha1"] if entry.get("pdf_file") == pdf_name else None
+        if wait_for_pdf:
+            passage_text = load_pdf_text(pdf_path, known_sha1)
+        else:
+            passage_text = cached_pdf_text(pdf_path, known_sha1)
+            if passage_text is None:
+                # chưa cache -> build_ui hiện dần từng trang khi trích xong
+                passage_text = ""
+                pending_pdf = {"path": pdf_path, "sha1": known_sha1}
+
+    return {
+        "test_id": entry["folder"],
+        "folder": chosen_folder,
+        "title": title,
+        "passage_text": passage_text,
+        "pending_pdf": pending_pdf,
+        "question_groups": question_groups,
+    }
+
+
+class ReadingPreloader:
+    """Giữ sẵn 1 bài đã chuẩn bị xong; take() lấy bài đó và tải trước bài tiếp theo."""
+
+    def __init__(self, reading_root: str = None):
+        self.reading_root = reading_root
+        self._lock = threading.Lock()
+        self._ready = None
+        self._loading = False
+        self._last_test_id = None    # bài vừa làm -> lần sau tránh chọn lại
+
+    def start(self):
+        """Bắt đầu chuẩn bị bài kế tiếp ở thread nền (bỏ qua nếu đã có / đang tải)."""
+        with self._lock:
+            if self._ready is not None or self._loading:
+                return
+            self._loading = True
+            exclude = [self._last_test_id] if self._last_test_id is not None else None
+        threading.Thread(target=self._load, args=(exclude,), daemon=True).start()
+
+    def _load(self, exclude):
+        test_data = None
+        try:
+            test_data = prepare_random_test(self.reading_root, exclude, wait_for_pdf=True)
+        except Exception as e:
+            # lỗi dữ liệu -> để ReadingApp tự tải lại và báo lỗi khi mở
+            print("Không tải trước được bài Reading:", e)
+        with self._lock:
+            self._ready = test_data
+            self._loading = False
+
+    def take(self):
+        """Bài đã chuẩn bị sẵn (rồi tải trước bài tiếp), None nếu chưa xong."""
+        with self._lock:
+            test_data, self._ready = self._ready, None
+            if test_data is not None:
+                self._last_test_id = test_data["test_id"]
+        if test_data is not None:
+            self.start()
+        return test_data
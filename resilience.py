@@ -0,0 +1,132 @@
+# resilience.py
+"""
+Giới hạn thời gian chờ khi gọi API: retry có backoff + jitter và circuit breaker.
+
+- RetryPolicy: số lần thử, backoff mũ (base * 2^n, tối đa max_delay) với
+  "full jitter" (ngẫu nhiên trong [0, backoff]) để nhiều client không retry
+  cùng lúc; deadline tổng cho cả lần gọi.
+- CircuitBreaker: lỗi liên tiếp >= failure_threshold -> "open", mọi lần gọi
+  báo lỗi ngay (CircuitOpenError) trong reset_timeout giây, sau đó cho 1 lần
+  thử ("half-open"): thành công thì đóng lại, lỗi thì mở tiếp.
+- call_with_retry: ghép 2 thứ trên quanh 1 hàm gọi API.
+
+sleep / clock / rng truyền vào được để test không phải chờ thật.
+"""
+import random
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """API đang bị ngắt (circuit open), không gửi request."""
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 4.0,
+        deadline: float = 45.0,
+        rng=None,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self._rng = rng or random.Random()
+
+    def backoff(self, retry: int) -> float:
+        """Thời gian chờ trước lần retry thứ retry (0, 1, ...)."""
+        cap = min(self.max_delay, self.base_delay * (2 ** retry))
+        return self._rng.uniform(0, cap)
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Có được gửi request không. Half-open: chỉ 1 request thử tại 1 thời điểm."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+                self._trial_running = False
+            if self._state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = self._clock()
+
+
+def call_with_retry(fn, policy: RetryPolicy, breaker: CircuitBreaker = None, retryable=None,
+                    on_retry=None, sleep=time.sleep, clock=time.monotonic):
+    """
+    Gọi fn(remaining) với remaining = số giây còn lại của deadline (để đặt
+    timeout cho từng lần thử). Lỗi retryable(exc) == True thì chờ backoff rồi
+    thử lại; lỗi khác ném ra ngay. on_retry(retry_index, exc, delay) được gọi
+    trước mỗi lần chờ. Hết lượt / hết deadline -> ném lỗi của lần thử cuối.
+    """
+    retryable = retryable or (lambda exc: False)
+    start = clock()
+    for attempt in range(policy.max_attempts):
+        if breaker is not None and not breaker.allow():
+            raise CircuitOpenError("API tạm thời bị ngắt do lỗi liên tiếp")
+
+        remaining = policy.deadline - (clock() - start)
+        try:
+            result = fn(remaining)
+        except Exception as exc:
+            if not retryable(exc):
+                if breaker is not None:
+                    # lỗi phía mình (sai key, request sai...): API vẫn trả lời, không tính là sập
+                    breaker.record_success()
+                raise
+            if breaker is not None:
+                breaker.record_failure()
+            if attempt + 1 >= policy.max_attempts:
+                raise
+            delay = policy.backoff(attempt)
+            if clock() - start + delay >= policy.deadline:
+                raise
+            if on_retry is not None:
+                on_retry(attempt, exc, delay)
+            sleep(delay)
+            continue
+
+        if breaker is not None:
+            breaker.record_success()
+        return result
@@ -0,0 +1,148 @@
+# response_cache.py
+"""
+Cache kết quả chấm câu của AI (ai_teacher.check_sentence).
+
+Người học hay gửi lại cùng 1 câu (hoặc chỉ khác khoảng trắng / hoa thường)
+cho cùng 1 từ -> trả kết quả cũ ngay thay vì gọi model lần nữa.
+
+- Key: (từ mục tiêu, câu đã chuẩn hóa, phiên bản prompt, model).
+  Đổi prompt hoặc model thì tự động không dùng lại kết quả cũ.
+- Tầng 1: LRU trong RAM (OrderedDict).
+- Tầng 2: SQLite trên đĩa, giữ qua các lần mở app. Bản ghi quá TTL bị bỏ;
+  tổng dung lượng vượt max_disk_bytes thì xóa bản ghi lâu không dùng nhất.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+MEMORY_ITEMS = 256
+DISK_MAX_BYTES = 8 * 1024 * 1024
+TTL_SECONDS = 30 * 24 * 60 * 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key       TEXT PRIMARY KEY,
+    value     TEXT NOT NULL,
+    size      INTEGER NOT NULL,
+    created   REAL NOT NULL,
+    accessed  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed);
+"""
+
+
+def normalize_sentence(s: str) -> str:
+    """Gộp khoảng trắng + chữ thường: 'I  Like it ' == 'i like it'."""
+    return " ".join((s or "").split()).lower()
+
+
+def make_key(target_word: str, sentence: str, prompt_version: str, model: str) -> str:
+    parts = [normalize_sentence(target_word), normalize_sentence(sentence), prompt_version, model]
+    raw = json.dumps(parts, ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        path: str = None,
+        memory_items: int = MEMORY_ITEMS,
+        max_disk_bytes: int = DISK_MAX_BYTES,
+        ttl: float = TTL_SECONDS,
+    ):
+        """path=None: chỉ cache trong RAM."""
+        self.path = path
+        self.memory_items = memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()     # key -> (created, value)
+        self._conn = None
+        if path is not None:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            self._conn.commit()
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created > self.ttl
+
+    def _remember(self, key, created, value):
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str):
+        """Kết quả đã cache (dict), None nếu chưa có hoặc đã hết hạn."""
+        now = time.time()
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is not None:
+                created, value = hit
+                if not self._expired(created, now):
+                    self._memory.move_to_end(key)
+                    return json.loads(value)
+                del self._memory[key]
+
+            if self._conn is None:
+                return None
+            row = self._conn.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            with self._conn:
+                if self._expired(created, now):
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    return None
+                self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._remember(key, created, value)
+        return json.loads(value)
+
+    def put(self, key: str, result: dict):
+        now = time.time()
+        value = json.dumps(result, ensure_ascii=False)
+        with self._lock:
+            self._remember(key, now, value)
+            if self._conn is None:
+                return
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, size, created, accessed) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, value, len(value), now, now),
+                )
+                self._evict(now)
+
+    def _evict(self, now: float):
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+        # xóa bản ghi lâu không dùng nhất tới khi về dưới giới hạn
+        stale = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            if total <= self.max_disk_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute("DELETE FROM responses")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
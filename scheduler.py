@@ -0,0 +1,300 @@
+# scheduler.py
+"""
+Lịch ôn tập kiểu SM-2 (spaced repetition) cho quiz từ vựng.
+
+- Mỗi thẻ (card) có: due (thời điểm đến hạn), ease, interval (ngày), reps, lapses.
+- Thẻ đã học nằm trong heap theo due -> lấy thẻ kế tiếp O(log n).
+- Thẻ mới (chưa học lần nào) nằm trong hàng đợi riêng, không lưu ra file.
+  Thứ tự "ngẫu nhiên" của chúng lấy từ hash của key -> giống nhau giữa các
+  lần mở app, và lúc mở chỉ cần heapify 1 lần (O(n)), không xáo cả deck.
+- Thứ tự lấy thẻ: thẻ đã đến hạn -> thẻ mới -> (hết cả 2) thẻ gần hạn nhất.
+- Trạng thái được lưu ra file JSON cạnh file vocab. write_behind=True: chấm
+  xong chỉ đánh dấu "dirty", thread nền gom lại rồi ghi (như JsonVocabBackend),
+  UI thread không phải ghi lại cả file sau mỗi câu trả lời.
+"""
+import atexit
+import heapq
+import json
+import os
+import threading
+import time
+import zlib
+
+from vocab_store import SAVE_DELAY, SAVE_MAX_DELAY, atomic_write
+
+DAY = 24 * 60 * 60
+
+# Trả lời sai: hỏi lại sau RELEARN_DELAY giây (trong cùng buổi học)
+RELEARN_DELAY = 60
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+
+# Chất lượng câu trả lời theo thang SM-2 (0..5)
+QUALITY_CORRECT = 4
+QUALITY_WRONG = 1
+
+
+def _new_priority(key) -> int:
+    """Thứ tự thẻ mới: trông như ngẫu nhiên nhưng cố định theo key."""
+    # crc32 rẻ hơn hash mật mã nhiều; nhân hằng số Knuth để xáo thêm các key liền nhau
+    return (zlib.crc32(str(key).encode("utf-8")) * 2654435761) & 0xFFFFFFFF
+
+
+def _new_card() -> dict:
+    return {"due": 0.0, "ease": DEFAULT_EASE, "interval": 0.0, "reps": 0, "lapses": 0}
+
+
+class Sm2Scheduler:
+    def __init__(self, path: str, write_behind: bool = False, save_delay: float = SAVE_DELAY):
+        self.path = path
+        self.cards = {}          # key -> trạng thái thẻ đã học
+        self._heap = []          # (due, version, key) của thẻ đã học
+        self._new = []           # (_new_priority(key), key) của thẻ mới
+        self._new_keys = set()
+        self._version = {}       # key -> version, để bỏ qua entry cũ trong heap
+        self._load()
+
+        # write-behind: thread ghi đọc self.cards -> sửa thẻ phải giữ _lock
+        self.write_behind = write_behind
+        self.save_delay = save_delay
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()   # chỉ 1 lần ghi file tại 1 thời điểm
+        self._dirty = False
+        self._closed = False
+        self._wake = threading.Event()
+        self._writer_thread = None
+        if write_behind:
+            self._writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+            self._writer_thread.start()
+            atexit.register(self.close)
+
+    # ---------- Load / save ----------
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        for key, card in data.get("cards", {}).items():
+            if isinstance(card, dict) and "due" in card:
+                self.cards[key] = {**_new_card(), **card}
+        self._heap = [(card["due"], 0, key) for key, card in self.cards.items()]
+        heapq.heapify(self._heap)
+        self._version = {key: 0 for key in self.cards}
+
+    def save(self):
+        with self._write_lock:
+            with self._lock:
+                raw = json.dumps({"version": 1, "cards": self.cards}, ensure_ascii=False)
+                self._dirty = False
+            atomic_write(self.path, raw.encode("utf-8"))
+
+    # ---------- Write-behind ----------
+
+    def _changed(self):
+        """Trạng thái thẻ đã học vừa đổi -> báo thread ghi (write_behind)."""
+        if not self.write_behind:
+            return
+        with self._lock:
+            self._dirty = True
+        self._wake.set()
+
+    def _writer_loop(self):
+        while not self._closed:
+            self._wake.wait()
+            self._wake.clear()
+            # Gom các lần chấm liên tiếp: đợi tới khi yên lặng save_delay giây
+            started = time.monotonic()
+            while not self._closed and self._wake.wait(self.save_delay):
+                self._wake.clear()
+                if time.monotonic() - started >= SAVE_MAX_DELAY:
+                    break
+            try:
+                self.flush()
+            except OSError as e:
+                print("Lỗi lưu lịch ôn tập:", e)
+
+    def flush(self):
+        """Ghi ngay nếu còn thay đổi chưa lưu."""
+        if self._dirty:
+            self.save()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        if self._writer_thread is not None:
+            self._writer_thread.join()
+        self.flush()
+
+    # ---------- Quản lý thẻ ----------
+
+    def __contains__(self, key):
+        return key in self.cards or key in self._new_keys
+
+    def add_card(self, key):
+        """Thêm thẻ vào lịch (thẻ đã có trạng thái thì giữ nguyên)."""
+        if key in self:
+            return
+        self._new_keys.add(key)
+        heapq.heappush(self._new, (_new_priority(key), key))
+
+    def add_cards(self, keys):
+        """Như add_card cho nhiều thẻ (lúc mở app): gom lại rồi heapify 1 lần."""
+        fresh = [key for key in keys if key not in self]
+        if not fresh:
+            return
+        self._new_keys.update(fresh)
+        self._new.extend((_new_priority(key), key) for key in fresh)
+        heapq.heapify(self._new)
+
+    def remove_card(self, key):
+        """Xóa lười: entry trong heap sẽ bị bỏ qua khi tới lượt."""
+        with self._lock:
+            learned = self.cards.pop(key, None) is not None
+        self._new_keys.discard(key)
+        self._version.pop(key, None)
+        if learned:
+            self._changed()
+
+    def rename_card(self, old_key, new_key):
+        """Đổi key của thẻ, giữ nguyên trạng thái (dùng khi đổi cách đặt key)."""
+        with self._lock:
+            card = self.cards.pop(old_key, None)
+        if old_key in self._new_keys:
+            self._new_keys.discard(old_key)
+            self.add_card(new_key)
+        self._version.pop(old_key, None)
+        if card is not None and new_key not in self.cards:
+            self._new_keys.discard(new_key)
+            with self._lock:
+                self.cards[new_key] = card
+            self._push(new_key)
+        if card is not None:
+            self._changed()
+
+    def _push(self, key):
+        version = self._version.get(key, 0) + 1
+        self._version[key] = version
+        heapq.heappush(self._heap, (self.cards[key]["due"], version, key))
+
+    def _is_live(self, entry, is_new: bool) -> bool:
+        if is_new:
+            return entry[1] in self._new_keys
+        due, version, key = entry
+        return key in self.cards and self._version.get(key) == version
+
+    def _clean_top(self, heap, is_new: bool):
+        while heap and not self._is_live(heap[0], is_new):
+            heapq.heappop(heap)
+
+    # ---------- Chọn thẻ ----------
+
+    def next_card(self, avoid=None, now: float = None):
+        """
+        Trả về (key, trạng thái) với trạng thái là "due", "new" hoặc "ahead"
+        (ôn trước hạn vì không còn gì đến hạn). Hết thẻ -> (None, None).
+        avoid: key vừa hỏi, tránh hỏi lại ngay nếu còn thẻ khác.
+        """
+        now = time.time() if now is None else now
+        self._clean_top(self._heap, False)
+        self._clean_top(self._new, True)
+
+        order = []
+        if self._heap and self._heap[0][0] <= now:
+            order.append((self._heap, False, "due"))
+        if self._new:
+            order.append((self._new, True, "new"))
+        if self._heap and self._heap[0][0] > now:
+            order.append((self._heap, False, "ahead"))
+
+        for heap, is_new, state in order:
+            key = heap[0][-1]
+            if key != avoid:
+                return key, state
+            # thẻ đầu trùng avoid -> thử thẻ thứ 2 cùng loại
+            second = self._second_live(heap, is_new)
+            if second is not None and (state != "due" or self.cards[second]["due"] <= now):
+                return second, state
+
+        if order:
+            # chỉ còn đúng thẻ vừa hỏi
+            heap, _, state = order[0]
+            return heap[0][-1], state
+        return None, None
+
+    def _second_live(self, heap, is_new: bool):
+        top = heapq.heappop(heap)
+        try:
+            self._clean_top(heap, is_new)
+            return heap[0][-1] if heap else None
+        finally:
+            heapq.heappush(heap, top)
+
+    def _top_live(self, heap, is_new: bool, k: int) -> list:
+        """
+        K entry còn dùng được nhỏ nhất của heap: pop ra rồi push lại -> O(k log n),
+        không duyệt cả heap như nsmallest. Entry đã cũ gặp trên đường thì bỏ luôn.
+        """
+        taken = []
+        try:
+            while heap and len(taken) < k:
+                entry = heapq.heappop(heap)
+                if self._is_live(entry, is_new):
+                    taken.append(entry)
+        finally:
+            for entry in taken:
+                heapq.heappush(heap, entry)
+        return taken
+
+    def peek(self, k: int, now: float = None) -> list:
+        """K thẻ sắp được hỏi (không lấy ra khỏi lịch)."""
+        now = time.time() if now is None else now
+        due = self._top_live(self._heap, False, k)
+        new = self._top_live(self._new, True, k)
+        result = [e[-1] for e in due if e[0] <= now]
+        result += [e[-1] for e in new]
+        result += [e[-1] for e in due if e[0] > now]
+        return result[:k]
+
+    def due_count(self, now: float = None) -> int:
+        now = time.time() if now is None else now
+        return sum(1 for card in self.cards.values() if card["due"] <= now)
+
+    # ---------- Chấm ----------
+
+    def review(self, key, correct: bool, now: float = None):
+        """Cập nhật lịch theo SM-2 sau 1 lần trả lời."""
+        now = time.time() if now is None else now
+        with self._lock:
+            card = self.cards.get(key)
+            if card is None:
+                card = _new_card()
+                self.cards[key] = card
+                self._new_keys.discard(key)
+
+            q = QUALITY_CORRECT if correct else QUALITY_WRONG
+            card["ease"] = max(MIN_EASE, card["ease"] + 0.1 - (5 - q) * (0.08 + (5 - q) * 0.02))
+
+            if q < 3:
+                card["reps"] = 0
+                card["interval"] = 0.0
+                card["lapses"] += 1
+                card["due"] = now + RELEARN_DELAY
+            else:
+                card["reps"] += 1
+                if card["reps"] == 1:
+                    card["interval"] = 1.0
+                elif card["reps"] == 2:
+                    card["interval"] = 6.0
+                else:
+                    card["interval"] = round(card["interval"] * card["ease"], 2)
+                card["due"] = now + card["interval"] * DAY
+
+        self._push(key)
+        self._changed()
@@ -0,0 +1,160 @@
+# spell_index.py
+"""
+Index kiểu SymSpell (symmetric delete) để tìm từ gần đúng chính tả.
+
+Thay vì so Levenshtein với từng từ trong deck (O(n) mỗi lần tra),
+lúc thêm từ ta sinh sẵn mọi biến thể "xóa bớt tối đa max_distance ký tự"
+và map biến thể -> các từ gốc. Khi tra, sinh biến thể xóa của câu trả lời,
+lấy các từ gốc trùng biến thể rồi chỉ kiểm tra khoảng cách thật trên vài
+ứng viên đó. Thời gian tra không phụ thuộc kích thước deck.
+
+prefix_length: chỉ sinh biến thể trên prefix_length ký tự đầu (như SymSpell),
+giúp index nhỏ đi nhiều mà vẫn tìm đúng với lỗi nằm ở cuối từ.
+"""
+import threading
+
+MAX_DISTANCE = 2
+PREFIX_LENGTH = 7
+
+
+def edit_distance(a: str, b: str, max_distance: int = MAX_DISTANCE) -> int:
+    """
+    Khoảng cách Damerau-Levenshtein (optimal string alignment) giữa a và b.
+    Trả về max_distance + 1 ngay khi biết chắc khoảng cách vượt ngưỡng.
+    Chỉ tính trong dải |i - j| <= max_distance của bảng DP.
+    """
+    if a == b:
+        return 0
+    too_far = max_distance + 1
+    if abs(len(a) - len(b)) > max_distance:
+        return too_far
+
+    # Bỏ phần đầu / cuối giống nhau, chỉ so đoạn khác nhau ở giữa
+    start = 0
+    limit = min(len(a), len(b))
+    while start < limit and a[start] == b[start]:
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    a, b = a[start:end_a], b[start:end_b]
+    if not a or not b:
+        return min(max(len(a), len(b)), too_far)
+
+    n, m = len(a), len(b)
+    big = too_far
+    prev_prev = None
+    prev = [j if j <= max_distance else big for j in range(m + 1)]
+    for i in range(1, n + 1):
+        cur = [big] * (m + 1)
+        if i <= max_distance:
+            cur[0] = i
+        lo = max(1, i - max_distance)
+        hi = min(m, i + max_distance)
+        row_min = cur[0]
+        ai = a[i - 1]
+        for j in range(lo, hi + 1):
+            cost = 0 if ai == b[j - 1] else 1
+            v = prev[j - 1] + cost
+            if prev[j] + 1 < v:
+                v = prev[j] + 1
+            if cur[j - 1] + 1 < v:
+                v = cur[j - 1] + 1
+            if (
+                prev_prev is not None
+                and j > 1
+                and ai == b[j - 2]
+                and a[i - 2] == b[j - 1]
+                and prev_prev[j - 2] + 1 < v
+            ):
+                v = prev_prev[j - 2] + 1
+            cur[j] = v
+            if v < row_min:
+                row_min = v
+        if row_min > max_distance:
+            return too_far
+        prev_prev, prev = prev, cur
+    return min(prev[m], too_far)
+
+
+def _deletes(word: str, max_distance: int, prefix_length: int) -> set:
+    """Mọi chuỗi thu được khi xóa tối đa max_distance ký tự (trên prefix)."""
+    word = word[:prefix_length]
+    result = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        nxt = set()
+        for w in frontier:
+            for i in range(len(w)):
+                nxt.add(w[:i] + w[i + 1:])
+        nxt -= result
+        result |= nxt
+        frontier = nxt
+    return result
+
+
+class SymDeleteIndex:
+    def __init__(self, max_distance: int = MAX_DISTANCE, prefix_length: int = PREFIX_LENGTH):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self._lock = threading.Lock()
+        self._deletes = {}      # biến thể xóa -> set các term
+        self._terms = {}        # term -> số entry đang dùng term đó
+
+    def __len__(self):
+        return len(self._terms)
+
+    def __contains__(self, term):
+        return term in self._terms
+
+    def add(self, term: str):
+        if not term:
+            return
+        with self._lock:
+            count = self._terms.get(term, 0)
+            self._terms[term] = count + 1
+            if count:
+                return
+            for d in _deletes(term, self.max_distance, self.prefix_length):
+                self._deletes.setdefault(d, set()).add(term)
+
+    def remove(self, term: str):
+        with self._lock:
+            count = self._terms.get(term, 0)
+            if count > 1:
+                self._terms[term] = count - 1
+                return
+            if not count:
+                return
+            del self._terms[term]
+            for d in _deletes(term, self.max_distance, self.prefix_length):
+                bucket = self._deletes.get(d)
+                if bucket is not None:
+                    bucket.discard(term)
+                    if not bucket:
+                        del self._deletes[d]
+
+    def lookup(self, word: str, max_distance: int = None) -> list:
+        """
+        Các term cách word không quá max_distance, dạng [(term, distance)],
+        sắp theo khoảng cách tăng dần.
+        """
+        if max_distance is None:
+            max_distance = self.max_distance
+        max_distance = min(max_distance, self.max_distance)
+
+        with self._lock:
+            candidates = set()
+            for d in _deletes(word, max_distance, self.prefix_length):
+                bucket = self._deletes.get(d)
+                if bucket:
+                    candidates |= bucket
+
+        results = []
+        for term in candidates:
+            dist = edit_distance(word, term, max_distance)
+            if dist <= max_distance:
+                results.append((term, dist))
+        results.sort(key=lambda x: (x[1], x[0]))
+        return results
@@ -0,0 +1,66 @@
+# test_vocab_store.py
+"""Kiểm tra journal của JsonVocabBackend: compact chạy xen với add không nhân đôi entry."""
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from vocab_store import JsonVocabBackend
+
+
+class JournalCompactTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "vocab.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def _reopen(self):
+        backend = JsonVocabBackend(self.path, journal=True)
+        items = [(item["id"], item["en"]) for item in backend.all()]
+        backend.close()
+        return items
+
+    def test_add_interleaved_with_compact(self):
+        backend = JsonVocabBackend(self.path, journal=True)
+        stop = threading.Event()
+
+        def compact_loop():
+            while not stop.is_set():
+                backend.compact()
+
+        compactor = threading.Thread(target=compact_loop)
+        compactor.start()
+        try:
+            for i in range(200):
+                backend.add(f"word{i}", f"nghĩa {i}")
+        finally:
+            stop.set()
+            compactor.join()
+        backend.close()
+
+        items = self._reopen()
+        self.assertEqual(len(items), 200)
+        self.assertEqual(sorted(en for _, en in items), sorted(f"word{i}" for i in range(200)))
+        self.assertEqual(len({entry_id for entry_id, _ in items}), 200)
+
+    def test_replayed_add_already_in_snapshot_is_skipped(self):
+        backend = JsonVocabBackend(self.path, journal=True)
+        backend.add("a", "một")
+        entry_id = backend.add("apple", "táo")
+        backend.compact()
+        backend.close()
+
+        # record "add" vẫn nằm trong journal dù snapshot đã có entry đó
+        with open(self.path + ".journal", "a", encoding="utf-8") as f:
+            rec = {"op": "add", "id": entry_id, "en": "apple", "vi": "táo", "seq": 10**6}
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+        self.assertEqual(self._reopen(), [(1, "a"), (entry_id, "apple")])
+
+
+if __name__ == "__main__":
+    unittest.main()
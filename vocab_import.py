@@ -0,0 +1,166 @@
+# vocab_import.py
+"""
+Đọc file từ vựng lớn theo dạng stream để import vào VocabStore.
+
+Hỗ trợ:
+- CSV  (.csv)        : en,vi
+- TSV  (.tsv, .tab)  : en<TAB>vi
+- Anki (.txt)        : "Notes in Plain Text" export, có các dòng header
+                       #separator:..., #html:true, #guid column:1, ...
+
+Dòng đầu dạng tiêu đề (en/vi, english/vietnamese, front/back) sẽ được bỏ qua.
+"""
+import csv
+import html
+import itertools
+import os
+import re
+
+from vocab_store import dedupe_key, normalize_entry
+
+FORMAT_BY_EXT = {
+    ".csv": "csv",
+    ".tsv": "tsv",
+    ".tab": "tsv",
+    ".txt": "anki",
+}
+
+HEADER_ROWS = {
+    ("en", "vi"),
+    ("english", "vietnamese"),
+    ("front", "back"),
+}
+
+ANKI_SEPARATORS = {
+    "tab": "\t",
+    "comma": ",",
+    "semicolon": ";",
+    "pipe": "|",
+    "space": " ",
+}
+
+# Các cột metadata trong Anki export (không phải field của note)
+ANKI_META_COLUMNS = ("guid", "notetype", "deck", "tags")
+
+_HTML_BREAK_RE = re.compile(r"<br\s*/?>|</div>|</p>", re.IGNORECASE)
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
+_ANKI_SOUND_RE = re.compile(r"\[sound:[^\]]*\]")
+
+
+def detect_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext in FORMAT_BY_EXT:
+        return FORMAT_BY_EXT[ext]
+    # Không rõ đuôi: nhìn dòng đầu
+    with open(path, "r", encoding="utf-8-sig") as f:
+        first = f.readline()
+    if first.startswith("#"):
+        return "anki"
+    return "tsv" if "\t" in first else "csv"
+
+
+def _strip_html(s: str) -> str:
+    s = _ANKI_SOUND_RE.sub("", s)
+    s = _HTML_BREAK_RE.sub(" ", s)
+    s = _HTML_TAG_RE.sub("", s)
+    return html.unescape(s).replace("\xa0", " ")
+
+
+def _iter_csv(f, delimiter: str):
+    rows = csv.reader(f, delimiter=delimiter)
+    first = next(rows, None)
+    if first is None:
+        return
+    head = tuple(cell.strip().lower() for cell in first[:2])
+    if head not in HEADER_ROWS:
+        yield first
+    yield from rows
+
+
+def _iter_anki(f):
+    # Đọc các dòng header '#key:value' ở đầu file
+    options = {}
+    line = f.readline()
+    while line.startswith("#"):
+        key, _, value = line[1:].strip().partition(":")
+        options[key.strip().lower()] = value.strip()
+        line = f.readline()
+
+    sep = options.get("separator", "tab")
+    delimiter = ANKI_SEPARATORS.get(sep.lower(), sep[:1] or "\t")
+    is_html = options.get("html", "false").lower() == "true"
+
+    # cột 1-based của metadata -> bỏ đi, phần còn lại là field của note
+    meta_cols = set()
+    for name in ANKI_META_COLUMNS:
+        col = options.get(f"{name} column")
+        if col and col.isdigit():
+            meta_cols.add(int(col) - 1)
+
+    for row in csv.reader(itertools.chain([line], f), delimiter=delimiter):
+        fields = [cell for i, cell in enumerate(row) if i not in meta_cols]
+        if is_html:
+            fields = [_strip_html(cell) for cell in fields]
+        yield fields
+
+
+def read_rows(path: str, fmt: str = None):
+    """
+    Generator (en, vi) đọc từng dòng, không load cả file vào RAM.
+    Dòng thiếu cột trả về vi=None để bên import đếm là dòng lỗi.
+    """
+    fmt = fmt or detect_format(path)
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if fmt == "anki":
+            rows = _iter_anki(f)
+        elif fmt == "tsv":
+            rows = _iter_csv(f, "\t")
+        elif fmt == "csv":
+            rows = _iter_csv(f, ",")
+        else:
+            raise ValueError(f"Không hỗ trợ định dạng '{fmt}'")
+
+        for row in rows:
+            if not row or not any(cell.strip() for cell in row):
+                continue
+            en = row[0]
+            vi = row[1] if len(row) > 1 else None
+            yield en, vi
+
+
+def import_rows(store, rows, batch_size: int = 1000) -> dict:
+    """
+    Thêm các cặp (en, vi) vào store:
+    - chuẩn hóa qua normalize_entry (cùng luật với _load)
+    - bỏ dòng trùng với vocab đang có và trùng trong chính file
+    - add_many theo batch, toàn bộ nằm trong store.bulk() -> persist 1 lần
+    """
+    stats = {"read": 0, "added": 0, "duplicates": 0, "invalid": 0}
+    seen = {dedupe_key(item) for item in store.all()}
+    batch = []
+
+    with store.bulk():
+        for en, vi in rows:
+            stats["read"] += 1
+            entry = normalize_entry(en, vi) if vi is not None else None
+            if entry is None:
+                stats["invalid"] += 1
+                continue
+
+            key = dedupe_key(entry)
+            if key in seen:
+                stats["duplicates"] += 1
+                continue
+            seen.add(key)
+
+            batch.append(entry)
+            if len(batch) >= batch_size:
+                store.add_many(batch)
+                stats["added"] += len(batch)
+                batch = []
+
+        if batch:
+            store.add_many(batch)
+            stats["added"] += len(batch)
+
+    return stats
@@ -0,0 +1,246 @@
+# vocab_sqlite.py
+"""
+Backend SQLite cho VocabStore.
+
+- Không load cả bộ từ vào RAM: chỉ giữ mảng id (8 byte/từ) để map
+  vị trí trong list <-> dòng trong bảng, lấy nội dung khi cần.
+- Mỗi add/update/delete là 1 transaction nhỏ (B-tree, O(log n)).
+- Index trên en_key (clean_en của phần tiếng Anh) và trên vi.
+- id của entry chính là id (rowid) của dòng -> get(id) là 1 lần tra khóa chính.
+
+Chuyển vocab.json sang SQLite:
+    python vocab_sqlite.py vocab.json vocab.db
+"""
+import sqlite3
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+from collections.abc import Sequence
+from contextlib import contextmanager
+
+from vocab_store import JsonVocabBackend, clean_en
+
+# Số dòng đọc mỗi lần khi duyệt toàn bộ bảng
+FETCH_CHUNK = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS vocab (
+    id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    en      TEXT NOT NULL,
+    vi      TEXT NOT NULL,
+    en_key  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_vocab_en_key ON vocab(en_key);
+CREATE INDEX IF NOT EXISTS idx_vocab_vi ON vocab(vi);
+"""
+
+
+class _SqliteVocabView(Sequence):
+    """
+    Thay cho list trả về từ all(): len(), vocab[i], for item in vocab
+    đều chạy thẳng trên database.
+    """
+
+    def __init__(self, backend: "SqliteVocabBackend"):
+        self._backend = backend
+
+    def __len__(self):
+        return self._backend.count()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        item = self._backend.get_at(index)
+        if item is None:
+            raise IndexError("vocab index out of range")
+        return item
+
+    def __iter__(self):
+        return self._backend.iter_all()
+
+
+def _row_entry(row) -> dict:
+    return {"id": row[0], "en": row[1], "vi": row[2], "key": row[3]}
+
+
+class SqliteVocabBackend:
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(filename, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        # mảng id theo thứ tự, load lười ở lần đầu cần truy cập theo vị trí
+        self._ids = None
+
+    def _id_list(self) -> array:
+        if self._ids is None:
+            ids = array("q")
+            cur = self._conn.execute("SELECT id FROM vocab ORDER BY id")
+            while True:
+                rows = cur.fetchmany(FETCH_CHUNK * 10)
+                if not rows:
+                    break
+                ids.extend(row[0] for row in rows)
+            self._ids = ids
+        return self._ids
+
+    # ---------- API backend ----------
+
+    def all(self):
+        return _SqliteVocabView(self)
+
+    def count(self) -> int:
+        with self._lock:
+            if self._ids is not None:
+                return len(self._ids)
+            return self._conn.execute("SELECT COUNT(*) FROM vocab").fetchone()[0]
+
+    def get_at(self, index: int):
+        with self._lock:
+            ids = self._id_list()
+            if not 0 <= index < len(ids):
+                return None
+            entry_id = ids[index]
+        return self.get(entry_id)
+
+    def get(self, entry_id: int):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, en, vi, en_key FROM vocab WHERE id = ?", (entry_id,)
+            ).fetchone()
+        return _row_entry(row) if row is not None else None
+
+    def index_of(self, entry_id: int):
+        with self._lock:
+            ids = self._id_list()
+            i = bisect_left(ids, entry_id)
+            if i < len(ids) and ids[i] == entry_id:
+                return i
+        return None
+
+    def iter_all(self):
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, en, vi, en_key FROM vocab WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, FETCH_CHUNK),
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield _row_entry(row)
+            last_id = rows[-1][0]
+
+    def add(self, en: str, vi: str) -> int:
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "INSERT INTO vocab (en, vi, en_key) VALUES (?, ?, ?)",
+                (en, vi, clean_en(en)),
+            )
+            if self._ids is not None:
+                self._ids.append(cur.lastrowid)
+        return cur.lastrowid
+
+    def update(self, entry_id: int, en: str, vi: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE vocab SET en = ?, vi = ?, en_key = ? WHERE id = ?",
+                (en, vi, clean_en(en), entry_id),
+            )
+
+    def delete(self, entry_id: int):
+        with self._lock:
+            with self._conn:
+                cur = self._conn.execute("DELETE FROM vocab WHERE id = ?", (entry_id,))
+            if cur.rowcount and self._ids is not None:
+                i = bisect_left(self._ids, entry_id)
+                if i < len(self._ids) and self._ids[i] == entry_id:
+                    self._ids.pop(i)
+
+    def add_many(self, entries: list) -> list:
+        """Thêm cả batch trong 1 transaction, trả về list id mới."""
+        with self._lock, self._conn:
+            last_id = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM vocab").fetchone()[0]
+            self._conn.executemany(
+                "INSERT INTO vocab (en, vi, en_key) VALUES (?, ?, ?)",
+                ((e["en"], e["vi"], clean_en(e["en"])) for e in entries),
+            )
+            new_ids = [
+                row[0]
+                for row in self._conn.execute(
+                    "SELECT id FROM vocab WHERE id > ? ORDER BY id", (last_id,)
+                )
+            ]
+            if self._ids is not None:
+                self._ids.extend(new_ids)
+        return new_ids
+
+    @contextmanager
+    def bulk(self):
+        # mỗi batch đã là 1 transaction, không cần gom thêm
+        yield
+
+    def find(self, en: str):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, en, vi, en_key FROM vocab WHERE en_key = ? ORDER BY id", (clean_en(en),)
+            ).fetchall()
+        return [_row_entry(row) for row in rows]
+
+    def find_vi(self, vi: str):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, en, vi, en_key FROM vocab WHERE vi = ? ORDER BY id", (vi,)
+            ).fetchall()
+        return [_row_entry(row) for row in rows]
+
+    def flush(self):
+        # mỗi thay đổi đã commit ngay trong transaction riêng
+        pass
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# ---------- Migrate vocab.json -> SQLite ----------
+
+
+def migrate_json(json_path: str, db_path: str) -> int:
+    """
+    Chép toàn bộ vocab.json (kể cả journal nếu có) vào database SQLite.
+    Chỉ chạy trên database rỗng, tránh nhân đôi dữ liệu khi chạy lại.
+    Giữ nguyên id của từng entry (dữ liệu ôn tập gắn theo id vẫn dùng được).
+    File JSON nguồn (và journal) không bị sửa.
+    Trả về số từ đã chép.
+    """
+    # chỉ đọc: không ghi id vừa gán / gộp journal vào file nguồn -> migrate
+    # lỗi giữa chừng thì vocab.json vẫn y nguyên
+    source = JsonVocabBackend(json_path, read_only=True)
+    backend = SqliteVocabBackend(db_path)
+    try:
+        if backend.count() > 0:
+            raise ValueError(f"Database '{db_path}' đã có dữ liệu, không migrate đè.")
+        with backend._lock, backend._conn:
+            backend._conn.executemany(
+                "INSERT INTO vocab (id, en, vi, en_key) VALUES (?, ?, ?, ?)",
+                ((item["id"], item["en"], item["vi"], item["key"]) for item in source.all()),
+            )
+        return backend.count()
+    finally:
+        backend.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Cách dùng: python vocab_sqlite.py vocab.json vocab.db")
+        sys.exit(1)
+    n = migrate_json(sys.argv[1], sys.argv[2])
+    print(f"Đã chuyển {n} từ sang {sys.argv[2]}")
@@ -1,41 +1,489 @@
 # vocab_store.py
+import argparse
+import atexit
+import hashlib
 import json
 import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import namedtuple
+from contextlib import contextmanager
+from operator import itemgetter
 
+# Khi file journal vượt ngưỡng này thì gộp (compact) về snapshot vocab.json
+JOURNAL_COMPACT_BYTES = 256 * 1024
 
-class VocabStore:
-    def __init__(self, filename: str = "vocab.json"):
-        # Đảm bảo file nằm cùng thư mục với code
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        self.filename = os.path.join(base_dir, filename)
-        self.vocab = self._load()
+# write_behind: chờ yên lặng bấy nhiêu giây rồi mới ghi,
+# nhưng không để thay đổi nằm trong RAM quá SAVE_MAX_DELAY giây
+SAVE_DELAY = 0.5
+SAVE_MAX_DELAY = 5.0
+
+# Đuôi file được coi là database SQLite thay vì JSON
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+
+
+# Các pattern dùng trong clean_en, compile 1 lần khi import module
+_PLUS_RE = re.compile(r"\s*\+\s*")
+_TAG_RE = re.compile(
+    r"\s*\((?:n|noun|v|verb|adj|adjective|adv|adverb|phrv|phr\s*verb|idiom|prep|preposition)\)\s*",
+    re.IGNORECASE,
+)
+_TRAILING_PAREN_RE = re.compile(r"\s*\([^)]*\)\s*$")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def clean_en(s: str) -> str:
+    """
+    Chuẩn hóa phần tiếng Anh:
+    - Bỏ các tag loại từ trong ngoặc: (N), (Adj), (Verb), (phrV), (idiom)...
+    ở BẤT KỲ vị trí nào trong chuỗi.
+    - Bỏ dấu '+' dùng làm ký hiệu cấu trúc.
+    - Đưa về lowercase + gọn khoảng trắng.
+    Ví dụ:
+        'apple (N)'                  -> 'apple'
+        'go up (phrV)'               -> 'go up'
+        'rule out (Verb) + something' -> 'rule out something'
+        'break down (phrv) (N)'      -> 'break down'
+    """
+    if not s:
+        return ""
+
+    # Chuẩn trước
+    s = s.strip()
+
+    # 1) Bỏ các dấu '+' dùng để mô tả cấu trúc: "verb + object"...
+    #    'rule out (Verb) + something' -> 'rule out (Verb) something'
+    s = _PLUS_RE.sub(" ", s)
+
+    # 2) Bỏ các (tag) loại từ ở BẤT KỲ vị trí nào
+    #    Bạn có thể thêm/bớt tag trong _TAG_RE tùy bộ từ vựng.
+    s = _TAG_RE.sub(" ", s)
+
+    # 3) Phòng hờ: nếu vẫn còn ngoặc ở CUỐI chuỗi thì xóa nốt
+    #    (vẫn giữ behavior cũ của bạn)
+    s = _TRAILING_PAREN_RE.sub("", s)
+
+    # 4) Gọn khoảng trắng + lowercase
+    s = _SPACES_RE.sub(" ", s)
+    return s.strip().lower()
+
+
+def atomic_write(path: str, raw: bytes):
+    """
+    Ghi ra file tạm rồi os.replace -> file đích luôn là bản cũ hoặc bản mới
+    đầy đủ, không bao giờ bị ghi dở khi crash/mất điện.
+    """
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(raw)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _clean_item(item):
+    """Trả về {"en", "vi"} nếu item hợp lệ, ngược lại None."""
+    if isinstance(item, dict) and "en" in item and "vi" in item:
+        return {"en": str(item["en"]), "vi": str(item["vi"])}
+    return None
+
+
+def _with_key(entry: dict) -> dict:
+    """
+    Gắn sẵn "key" = clean_en(en) vào entry (chỉ nằm trong RAM, không ghi ra file),
+    để quiz so đáp án bằng 1 lần tra dict thay vì chuẩn hóa lại mỗi câu.
+    """
+    entry["key"] = clean_en(entry["en"])
+    return entry
+
+
+def _public(entry: dict) -> dict:
+    """Phần entry được ghi ra file."""
+    return {"id": entry["id"], "en": entry["en"], "vi": entry["vi"]}
+
+
+_entry_id = itemgetter("id")
+
+
+def normalize_entry(en, vi):
+    """
+    Chuẩn hóa 1 cặp en/vi nhập từ ngoài (form, file import):
+    cùng luật với _load + bỏ khoảng trắng thừa, bỏ dòng rỗng.
+    """
+    entry = _clean_item({"en": en, "vi": vi})
+    if entry is None:
+        return None
+    entry = {"en": entry["en"].strip(), "vi": entry["vi"].strip()}
+    if not entry["en"] or not entry["vi"]:
+        return None
+    return entry
+
+
+def dedupe_key(entry) -> tuple:
+    """2 entry coi là trùng nếu cùng clean_en(en) và cùng nghĩa (không phân biệt hoa thường)."""
+    key = entry.get("key")
+    if key is None:
+        key = clean_en(entry["en"])
+    return key, entry["vi"].strip().lower()
+
+
+class JsonVocabBackend:
+    """
+    Backend lưu toàn bộ vocab trong 1 list + file vocab.json.
+
+    - Mặc định: mỗi lần add/update/delete ghi lại toàn bộ file (như cũ).
+    - journal=True: mỗi thay đổi chỉ append 1 dòng nhỏ vào 'vocab.json.journal'.
+      Khi load: đọc snapshot vocab.json rồi replay journal lên trên.
+      Khi journal lớn hơn compact_threshold: gộp lại vào snapshot ở thread nền.
+    - write_behind=True (khi không dùng journal): thay đổi chỉ đánh dấu "dirty",
+      thread nền gom lại và ghi 1 lần sau save_delay giây yên lặng.
+      Khi thoát app (atexit / close) sẽ flush phần còn lại.
+    - read_only=True: chỉ đọc (snapshot + replay journal), không ghi gì ra đĩa,
+      kể cả id vừa gán; add/update/delete báo lỗi. Dùng khi migrate.
+
+    Mọi lần ghi vocab.json đều qua file tạm + rename (atomic).
+
+    Mỗi entry có "id" (int, tăng dần, không tái sử dụng) ghi kèm trong file.
+    File cũ chưa có id sẽ được gán id theo thứ tự và lưu lại ngay khi load.
+    Vì entry mới luôn được append với id lớn hơn, list luôn sắp theo id
+    -> tìm vị trí theo id bằng bisect.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        journal: bool = False,
+        compact_threshold: int = JOURNAL_COMPACT_BYTES,
+        write_behind: bool = False,
+        save_delay: float = SAVE_DELAY,
+        read_only: bool = False,
+    ):
+        self.filename = filename
+        self.read_only = read_only
+        self.journal_filename = self.filename + ".journal"
+        self.journal = journal
+        self.compact_threshold = compact_threshold
+
+        self._lock = threading.RLock()
+        self._seq = 0                 # số thứ tự record cuối cùng trong journal
+        self._compact_thread = None
+
+        # write-behind
+        self.write_behind = write_behind and not journal
+        self.save_delay = save_delay
+        self._dirty = False
+        self._bulk = False
+        self._closed = False
+        self._wake = threading.Event()
+        self._write_lock = threading.Lock()   # chỉ 1 lần ghi file tại 1 thời điểm
+        self._writer_thread = None
+
+        self.vocab = []
+        self._by_id = {}              # id -> entry
+        self._ids_by_key = {}         # key (clean_en) -> [id], để find không quét cả deck
+        self._next_id = 1
+        self._ids_sorted = True       # False nếu file bị sửa tay làm lệch thứ tự id
+        self._assigned_ids = False    # có entry cũ vừa được gán id lúc load
+        self._load()
+
+        if read_only:
+            pass
+        elif os.path.exists(self.journal_filename) and not self.journal:
+            # Còn journal từ lần chạy journal trước -> gộp luôn vào snapshot
+            self.save()
+            os.remove(self.journal_filename)
+        elif self._assigned_ids:
+            # Lưu ngay id vừa gán để lần sau load vẫn là các id đó
+            if self.journal:
+                self.compact()
+            else:
+                self.save()
+
+        if self.write_behind and not read_only:
+            self._writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+            self._writer_thread.start()
+            atexit.register(self.close)
 
     def _load(self):
-        if not os.path.exists(self.filename):
-            return []
-        try:
-            with open(self.filename, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except json.JSONDecodeError:
-            return []
+        data, digest = self._read_snapshot()
 
-        cleaned = []
         if isinstance(data, list):
+            items = []
             for item in data:
-                if isinstance(item, dict) and "en" in item and "vi" in item:
-                    cleaned.append(
-                        {
-                            "en": str(item["en"]),
-                            "vi": str(item["vi"]),
-                        }
-                    )
-        return cleaned
+                entry = _clean_item(item)
+                if entry is not None:
+                    items.append((entry, item.get("id")))
+            # id có sẵn được giữ; entry thiếu id nhận id sau id lớn nhất
+            known = [i for _, i in items if isinstance(i, int) and i > 0]
+            self._next_id = max(known, default=0) + 1
+            for entry, entry_id in items:
+                self._append(entry, entry_id)
+
+        self._replay_journal(digest)
+
+    def _append(self, entry: dict, entry_id=None) -> dict:
+        """Thêm entry vào cuối list, gán id nếu chưa có / bị trùng."""
+        if not isinstance(entry_id, int) or entry_id <= 0 or entry_id in self._by_id:
+            entry_id = self._next_id
+            self._assigned_ids = True
+        if self.vocab and entry_id < self.vocab[-1]["id"]:
+            self._ids_sorted = False
+        self._next_id = max(self._next_id, entry_id + 1)
+
+        entry = _with_key({"id": entry_id, "en": entry["en"], "vi": entry["vi"]})
+        self.vocab.append(entry)
+        self._by_id[entry_id] = entry
+        self._ids_by_key.setdefault(entry["key"], []).append(entry_id)
+        return entry
+
+    def _unindex_key(self, entry: dict):
+        ids = self._ids_by_key.get(entry["key"])
+        if ids is not None:
+            ids.remove(entry["id"])
+            if not ids:
+                del self._ids_by_key[entry["key"]]
+
+    def index_of(self, entry_id: int):
+        """Vị trí của entry trong all(), None nếu không có."""
+        entry = self._by_id.get(entry_id)
+        if entry is None:
+            return None
+        if self._ids_sorted:
+            return bisect_left(self.vocab, entry_id, key=_entry_id)
+        for i, item in enumerate(self.vocab):
+            if item is entry:
+                return i
+        return None
+
+    def _read_snapshot(self):
+        """Đọc vocab.json, trả về (data, sha1 của nội dung file)."""
+        if not os.path.exists(self.filename):
+            return [], None
+        with open(self.filename, "rb") as f:
+            raw = f.read()
+        digest = hashlib.sha1(raw).hexdigest()
+        try:
+            return json.loads(raw.decode("utf-8")), digest
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return [], digest
 
     def save(self):
-        with open(self.filename, "w", encoding="utf-8") as f:
-            json.dump(self.vocab, f, ensure_ascii=False, indent=2)
+        with self._write_lock:
+            with self._lock:
+                data = [_public(item) for item in self.vocab]
+                self._dirty = False
+            raw = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+            atomic_write(self.filename, raw)
 
-    # ---------- APIs đơn giản để dùng ở UI ----------
+    # ---------- Write-behind ----------
+
+    def _mark_dirty(self):
+        with self._lock:
+            self._dirty = True
+        self._wake.set()
+
+    def _writer_loop(self):
+        while not self._closed:
+            self._wake.wait()
+            self._wake.clear()
+            # Gom các thay đổi dồn dập: đợi tới khi yên lặng save_delay giây
+            started = time.monotonic()
+            while not self._closed and self._wake.wait(self.save_delay):
+                self._wake.clear()
+                if time.monotonic() - started >= SAVE_MAX_DELAY:
+                    break
+            self.flush()
+
+    def flush(self):
+        """Ghi ngay nếu còn thay đổi chưa lưu."""
+        if self._dirty:
+            self.save()
+
+    # ---------- Journal ----------
+
+    def _read_journal(self):
+        """
+        Trả về (header, records).
+        Dòng cuối bị ghi dở (app crash giữa chừng) sẽ bị bỏ qua.
+        """
+        header = None
+        records = []
+        if not os.path.exists(self.journal_filename):
+            return header, records
+        with open(self.journal_filename, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                if not isinstance(rec, dict):
+                    break
+                if rec.get("op") == "base":
+                    header = rec
+                else:
+                    records.append(rec)
+        return header, records
+
+    def _replay_journal(self, digest):
+        header, records = self._read_journal()
+        if not header and not records:
+            return
+
+        # Header ghi lại snapshot mà journal được tính từ đó.
+        # Nếu snapshot hiện tại đúng là snapshot đó -> bỏ các record đã gộp.
+        # Nếu không (crash giữa lúc compact) -> journal vẫn tính từ snapshot cũ,
+        # replay toàn bộ.
+        skip_upto = 0
+        if header and header.get("sha1") == digest:
+            skip_upto = int(header.get("seq", 0))
+        self._seq = int(header.get("seq", 0)) if header else 0
+
+        for rec in records:
+            seq = int(rec.get("seq", 0))
+            self._seq = max(self._seq, seq)
+            if seq <= skip_upto:
+                continue
+            self._apply_record(rec)
+
+    def _record_index(self, rec):
+        # record mới theo id; record kiểu cũ (trước khi có id) theo vị trí
+        if "id" in rec:
+            return self.index_of(rec["id"])
+        index = rec.get("index", -1)
+        return index if 0 <= index < len(self.vocab) else None
+
+    def _apply_record(self, rec):
+        # replay phải idempotent: record "add" mà id đã có (vd đã được gộp vào
+        # snapshot) thì bỏ qua, không gán id mới -> không nhân đôi entry
+        op = rec.get("op")
+        if op == "add":
+            entry = _clean_item(rec)
+            if entry is not None and rec.get("id") not in self._by_id:
+                self._append(entry, rec.get("id"))
+        elif op == "add_many":
+            for item in rec.get("items", []):
+                entry = _clean_item(item)
+                if entry is not None and item.get("id") not in self._by_id:
+                    self._append(entry, item.get("id"))
+        elif op == "update":
+            index = self._record_index(rec)
+            entry = _clean_item(rec)
+            if entry is not None and index is not None:
+                self._replace(index, entry)
+        elif op == "delete":
+            index = self._record_index(rec)
+            if index is not None:
+                self._pop(index)
+
+    def _replace(self, index: int, entry: dict) -> dict:
+        old = self.vocab[index]
+        entry_id = old["id"]
+        entry = _with_key({"id": entry_id, "en": entry["en"], "vi": entry["vi"]})
+        self.vocab[index] = entry
+        self._by_id[entry_id] = entry
+        if entry["key"] != old["key"]:
+            self._unindex_key(old)
+            self._ids_by_key.setdefault(entry["key"], []).append(entry_id)
+        return entry
+
+    def _pop(self, index: int) -> dict:
+        entry = self.vocab.pop(index)
+        del self._by_id[entry["id"]]
+        self._unindex_key(entry)
+        return entry
+
+    def _append_journal(self, rec: dict):
+        """
+        Gọi khi ĐANG giữ _lock, ngay sau khi sửa dữ liệu: thay đổi và record
+        (kèm seq) cùng 1 critical section -> compact() không thể chụp snapshot
+        đã có thay đổi mà seq_hi lại nhỏ hơn seq của record.
+        """
+        with self._lock:
+            if not os.path.exists(self.journal_filename):
+                # journal mới -> header trỏ về snapshot hiện tại
+                _, digest = self._read_snapshot()
+                self._write_journal({"op": "base", "sha1": digest, "seq": self._seq}, [])
+
+            self._seq += 1
+            rec = dict(rec, seq=self._seq)
+            with open(self.journal_filename, "a", encoding="utf-8") as f:
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+    def _write_journal(self, header: dict, records: list):
+        lines = [json.dumps(header, ensure_ascii=False)]
+        lines += [json.dumps(rec, ensure_ascii=False) for rec in records]
+        atomic_write(self.journal_filename, ("\n".join(lines) + "\n").encode("utf-8"))
+
+    def _check_writable(self):
+        if self.read_only:
+            raise PermissionError(f"'{self.filename}' đang mở chỉ đọc")
+
+    def _log(self, rec: dict):
+        """Ghi record vào journal (nếu bật) — gọi trong cùng khối lock với thay đổi."""
+        if self.journal:
+            self._append_journal(rec)
+
+    def _persist(self, rec: dict):
+        """Phần ghi file sau khi đã nhả lock (journal đã ghi trong _log)."""
+        if self.journal:
+            self._maybe_compact()
+        elif self._bulk:
+            # đang import -> chỉ ghi 1 lần khi kết thúc bulk()
+            with self._lock:
+                self._dirty = True
+        elif self.write_behind:
+            self._mark_dirty()
+        else:
+            self.save()
+
+    # ---------- Compact ----------
+
+    def _maybe_compact(self):
+        try:
+            size = os.path.getsize(self.journal_filename)
+        except OSError:
+            return
+        if size < self.compact_threshold:
+            return
+        with self._lock:
+            if self._compact_thread is not None and self._compact_thread.is_alive():
+                return
+            self._compact_thread = threading.Thread(target=self.compact, daemon=True)
+            self._compact_thread.start()
+
+    def compact(self):
+        """
+        Gộp journal vào snapshot vocab.json.
+
+        Thứ tự ghi đảm bảo crash ở bất kỳ bước nào cũng không mất/nhân đôi dữ liệu:
+        1) ghi snapshot mới ra file tạm (ngoài lock, phần tốn thời gian nhất)
+        2) journal = header(snapshot mới) + TOÀN BỘ record
+        3) thay snapshot bằng file tạm
+        4) journal = header + chỉ các record ghi sau lúc chụp snapshot
+        """
+        with self._lock:
+            data = [_public(item) for item in self.vocab]
+            seq_hi = self._seq
+
+        tmp_snapshot = self.filename + ".compact.tmp"
+        raw = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+        with open(tmp_snapshot, "wb") as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        digest = hashlib.sha1(raw).hexdigest()
+
+        with self._lock:
+            _, records = self._read_journal()
+            header = {"op": "base", "sha1": digest, "seq": seq_hi}
+            self._write_journal(header, records)
+            os.replace(tmp_snapshot, self.filename)
+            tail = [rec for rec in records if int(rec.get("seq", 0)) > seq_hi]
+            self._write_journal(header, tail)
+
+    # ---------- API backend ----------
 
     def all(self):
         return self.vocab
@@ -43,16 +491,270 @@ class VocabStore:
     def count(self) -> int:
         return len(self.vocab)
 
-    def add(self, en: str, vi: str):
-        self.vocab.append({"en": en, "vi": vi})
-        self.save()
+    def get(self, entry_id: int):
+        return self._by_id.get(entry_id)
 
-    def update(self, index: int, en: str, vi: str):
-        if 0 <= index < len(self.vocab):
-            self.vocab[index] = {"en": en, "vi": vi}
-            self.save()
+    def add(self, en: str, vi: str) -> int:
+        self._check_writable()
+        with self._lock:
+            entry = self._append({"en": en, "vi": vi})
+            rec = dict(_public(entry), op="add")
+            self._log(rec)
+        self._persist(rec)
+        return entry["id"]
 
-    def delete(self, index: int):
-        if 0 <= index < len(self.vocab):
-            self.vocab.pop(index)
-            self.save()
+    def update(self, entry_id: int, en: str, vi: str):
+        self._check_writable()
+        with self._lock:
+            index = self.index_of(entry_id)
+            if index is None:
+                return
+            self._replace(index, {"en": en, "vi": vi})
+            rec = {"op": "update", "id": entry_id, "en": en, "vi": vi}
+            self._log(rec)
+        self._persist(rec)
+
+    def delete(self, entry_id: int):
+        self._check_writable()
+        with self._lock:
+            index = self.index_of(entry_id)
+            if index is None:
+                return
+            self._pop(index)
+            rec = {"op": "delete", "id": entry_id}
+            self._log(rec)
+        self._persist(rec)
+
+    def add_many(self, entries: list) -> list:
+        if not entries:
+            return []
+        self._check_writable()
+        with self._lock:
+            added = [self._append(e) for e in entries]
+            rec = {"op": "add_many", "items": [_public(e) for e in added]}
+            self._log(rec)
+        self._persist(rec)
+        return [e["id"] for e in added]
+
+    @contextmanager
+    def bulk(self):
+        """Trong khối này các thay đổi không ghi file, ra khỏi khối mới ghi 1 lần."""
+        self._bulk = True
+        try:
+            yield
+        finally:
+            self._bulk = False
+            if self.write_behind:
+                self._mark_dirty()
+            else:
+                self.flush()
+
+    def find(self, en: str):
+        ids = self._ids_by_key.get(clean_en(en))
+        if not ids:
+            return []
+        entries = [self._by_id[entry_id] for entry_id in ids]
+        if len(entries) > 1:
+            # giữ thứ tự như trong all()
+            entries.sort(key=lambda entry: self.index_of(entry["id"]))
+        return entries
+
+    def find_vi(self, vi: str):
+        return [item for item in self.vocab if item["vi"] == vi]
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        if self._writer_thread is not None:
+            self._writer_thread.join()
+        if self._compact_thread is not None:
+            self._compact_thread.join()
+        self.flush()
+
+
+# Sự kiện thay đổi vocab gửi cho các subscriber của VocabStore:
+# - kind : "added" | "updated" | "removed"
+# - id   : id của entry
+# - index: vị trí trong all() (với "removed": vị trí trước khi xóa)
+# - entry: entry mới ("added"/"updated") hoặc entry vừa xóa ("removed")
+# - old  : entry trước khi sửa (chỉ có với "updated")
+VocabChange = namedtuple("VocabChange", "kind id index entry old", defaults=(None,))
+
+
+class VocabStore:
+    """
+    API vocab dùng ở UI. Mỗi entry là dict {"id", "en", "vi", "key"}:
+    - "id": số định danh cố định của entry (không đổi khi thêm/xóa từ khác),
+      mọi API sửa/xóa đều theo id.
+    - "key" = clean_en(en) được tính sẵn khi load / khi sửa.
+    Phần lưu trữ nằm ở backend:
+    - file .json (mặc định)       -> JsonVocabBackend (tùy chọn journal)
+    - file .db/.sqlite/.sqlite3   -> SqliteVocabBackend (vocab_sqlite.py)
+    Có thể truyền backend tự viết qua tham số backend=, miễn có cùng các hàm
+    all/count/get/index_of/add/update/delete/add_many/bulk/find/find_vi/flush/close.
+
+    subscribe(callback): nhận VocabChange sau mỗi thay đổi, để UI chỉ cập nhật
+    đúng dòng / thẻ bị ảnh hưởng thay vì vẽ lại cả danh sách.
+    Callback chạy trên thread gọi hàm sửa vocab.
+    """
+
+    def __init__(
+        self,
+        filename: str = "vocab.json",
+        journal: bool = False,
+        compact_threshold: int = JOURNAL_COMPACT_BYTES,
+        write_behind: bool = False,
+        backend=None,
+    ):
+        # Đảm bảo file nằm cùng thư mục với code
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        self.filename = os.path.join(base_dir, filename)
+
+        if backend is None:
+            if self.filename.lower().endswith(SQLITE_EXTENSIONS):
+                from vocab_sqlite import SqliteVocabBackend
+
+                backend = SqliteVocabBackend(self.filename)
+            else:
+                backend = JsonVocabBackend(
+                    self.filename,
+                    journal=journal,
+                    compact_threshold=compact_threshold,
+                    write_behind=write_behind,
+                )
+        self.backend = backend
+        self._listeners = []
+
+    # ---------- Change feed ----------
+
+    def subscribe(self, callback):
+        """Đăng ký nhận VocabChange. Trả về hàm hủy đăng ký."""
+        self._listeners.append(callback)
+        return lambda: self.unsubscribe(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _emit(self, change: VocabChange):
+        for callback in list(self._listeners):
+            try:
+                callback(change)
+            except Exception as e:
+                # 1 subscriber lỗi không được làm hỏng thao tác đã lưu xong
+                print("Lỗi khi xử lý thay đổi vocab:", e)
+
+    # ---------- APIs đơn giản để dùng ở UI ----------
+
+    def all(self):
+        return self.backend.all()
+
+    def count(self) -> int:
+        return self.backend.count()
+
+    def get(self, entry_id: int):
+        """Entry theo id, None nếu đã bị xóa."""
+        return self.backend.get(entry_id)
+
+    def index_of(self, entry_id: int):
+        """Vị trí hiện tại của entry trong all() (vd: dòng trong Listbox)."""
+        return self.backend.index_of(entry_id)
+
+    def add(self, en: str, vi: str) -> int:
+        """Thêm từ mới, trả về id của entry."""
+        entry_id = self.backend.add(en, vi)
+        if self._listeners:
+            # entry mới luôn nằm cuối all()
+            index = self.backend.count() - 1
+            self._emit(VocabChange("added", entry_id, index, self.backend.get(entry_id)))
+        return entry_id
+
+    def update(self, entry_id: int, en: str, vi: str):
+        if not self._listeners:
+            self.backend.update(entry_id, en, vi)
+            return
+        old = self.backend.get(entry_id)
+        if old is None:
+            return
+        self.backend.update(entry_id, en, vi)
+        self._emit(
+            VocabChange(
+                "updated", entry_id, self.backend.index_of(entry_id),
+                self.backend.get(entry_id), old,
+            )
+        )
+
+    def delete(self, entry_id: int):
+        if not self._listeners:
+            self.backend.delete(entry_id)
+            return
+        old = self.backend.get(entry_id)
+        if old is None:
+            return
+        index = self.backend.index_of(entry_id)
+        self.backend.delete(entry_id)
+        self._emit(VocabChange("removed", entry_id, index, old))
+
+    def add_many(self, entries: list) -> list:
+        """Thêm nhiều entry {"en", "vi"} một lần, trả về list id."""
+        ids = self.backend.add_many(entries)
+        if self._listeners and ids:
+            first = self.backend.count() - len(ids)
+            for offset, entry_id in enumerate(ids):
+                self._emit(
+                    VocabChange("added", entry_id, first + offset, self.backend.get(entry_id))
+                )
+        return ids
+
+    def bulk(self):
+        """Gom các thay đổi bên trong khối with, chỉ persist 1 lần khi ra khỏi khối."""
+        return self.backend.bulk()
+
+    def import_file(self, path: str, fmt: str = None, batch_size: int = 1000) -> dict:
+        """
+        Import hàng loạt từ file CSV / TSV / Anki export (xem vocab_import.py).
+        Đọc dạng stream, bỏ dòng lỗi + dòng trùng, ghi theo từng batch
+        và chỉ persist 1 lần ở cuối. Trả về thống kê số dòng.
+        """
+        from vocab_import import import_rows, read_rows
+
+        return import_rows(self, read_rows(path, fmt), batch_size=batch_size)
+
+    def find(self, en: str):
+        """Các entry có phần tiếng Anh trùng (sau clean_en) với en."""
+        return self.backend.find(en)
+
+    def find_vi(self, vi: str):
+        return self.backend.find_vi(vi)
+
+    def flush(self):
+        """Ghi ngay các thay đổi đang chờ (write-behind)."""
+        self.backend.flush()
+
+    def close(self):
+        self.backend.close()
+
+
+# ---------- CLI ----------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quản lý vocab từ dòng lệnh")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_import = sub.add_parser("import", help="Import từ file CSV/TSV/Anki export")
+    p_import.add_argument("path")
+    p_import.add_argument("--format", choices=("csv", "tsv", "anki"), default=None)
+    p_import.add_argument("--store", default="vocab.json", help="vocab.json hoặc file .db")
+    p_import.add_argument("--batch-size", type=int, default=1000)
+
+    args = parser.parse_args()
+    if args.command == "import":
+        store = VocabStore(args.store)
+        stats = store.import_file(args.path, fmt=args.format, batch_size=args.batch_size)
+        store.close()
+        print(
+            f"Đã đọc {stats['read']} dòng: thêm {stats['added']}, "
+            f"trùng {stats['duplicates']}, lỗi {stats['invalid']}."
+        )